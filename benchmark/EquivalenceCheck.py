@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+"""EquivalenceCheck.py: Shared parts of the checks that a faster algorithm gives the same results as the one it replaced."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+import InvoiceGenerator
+
+# (line items, pages, ruling lines) of the invoices written for every template
+CORPUS_SHAPES = [(3, 1, 0), (25, 2, 0), (60, 3, 40), (150, 5, 200)]
+
+def write_corpus(corpus_folder):
+    """ Generated invoices of every template, short and long, with and without stray ruling. The pdf file names. """
+
+    os.makedirs(corpus_folder, exist_ok=True)
+    list_pdf_files = []
+    for template_name in InvoiceGenerator.TEMPLATE_NAMES:
+        for number, (lineitems, pages, rules) in enumerate(CORPUS_SHAPES):
+            pdf_file_name = os.path.join(corpus_folder, "%s-%d.pdf" % (template_name, number))
+            InvoiceGenerator.write_invoice(template_name, pdf_file_name, lineitems, pages, rules, number)
+            list_pdf_files.append(pdf_file_name)
+    return list_pdf_files
+
+def load_reference_module(module_name, revision, module_folder):
+    """ The module src/<module_name>.py as of the git revision, e.g. from before the change being checked. It is imported
+    from module_folder and uses the other modules of the working tree. """
+
+    source = subprocess.run(["git", "show", revision + ":src/" + module_name + ".py"], check=True, stdout=subprocess.PIPE, \
+        cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    module_file_name = os.path.join(module_folder, "Reference" + module_name + ".py")
+    with open(module_file_name, "wb") as write_file:
+        write_file.write(source)
+
+    spec = importlib.util.spec_from_file_location("Reference" + module_name, module_file_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def get_row_locations(container_instance):
+    """ (page number, y1) of every row of the document, top to bottom. """
+
+    list_row_locations = []
+    for page_number, rows_of_y1_textboxes in enumerate(container_instance.pagewise_rows_of_y1_textboxes):
+        for key_y1 in reversed(rows_of_y1_textboxes):
+            list_row_locations.append((page_number, key_y1))
+    return list_row_locations
+
+def get_regex_lineitems(objectlayoutalgo_module, objectlayoutalgo_instance, list_line_regexes, list_of_columns, start_page, \
+    start_location, end_page, end_location):
+    """ get_regex_lineitems of either revision, from before and after the line patterns were compiled into a program. """
+
+    if hasattr(objectlayoutalgo_module, "RegexLineItemProgram"):
+        regex_lineitem_program = objectlayoutalgo_module.RegexLineItemProgram(list_line_regexes, list_of_columns)
+        return objectlayoutalgo_instance.get_regex_lineitems(regex_lineitem_program, start_page, start_location, end_page, \
+            end_location)
+    return objectlayoutalgo_instance.get_regex_lineitems(list_line_regexes, list_of_columns, start_page, start_location, end_page, \
+        end_location)
+
+def report(trials, differences):
+
+    print("Trials = %d, Differences = %d" % (trials, differences))
+    sys.exit(0 if differences == 0 else 1)
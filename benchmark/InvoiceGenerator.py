@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+
+"""InvoiceGenerator.py: Deterministic synthetic invoices in the layouts of the shipped templates, for the benchmarks."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import json
+import os
+import random
+
+from PdfWriter import PdfWriter
+
+FONT_SIZE = 9
+# Helvetica digits are 556/1000 of the font size wide
+DIGIT_WIDTH = 0.556 * FONT_SIZE
+TEMPLATE_NAMES = ["Amazon-Storeji", "FlipKart-WSRetail", "FlipKart-ShreyasRetail"]
+
+def _new_page(writer):
+    writer.add_page()
+    return 800
+
+def _write_rules(writer, rules):
+
+    # Ruling that is not part of the invoice (borders, stamps, form lines), in the bottom margin of the first page
+    for index in range(rules):
+        x = 40 + (index * 37) % 500
+        y = 12 + (index * 7) % 36
+        if index % 2 == 0:
+            writer.line(x, y, x + 20, y)
+        else:
+            writer.line(x, y, x, y + 8)
+
+def _write_extra_pages(writer, pages, random_generator):
+
+    # Terms and conditions, text the templates do not look at
+    for page_number in range(pages - 1):
+        _new_page(writer)
+        for row in range(40):
+            writer.text(40, 800 - 18 * row, "Terms and conditions clause %d.%d applies to the purchase of %d units" % \
+                (page_number, row, random_generator.randint(1, 99)), FONT_SIZE)
+
+def write_amazon_storeji(pdf_file_name, lineitems = 3, pages = 1, rules = 0, seed = 1):
+
+    # Ruled table, every cell boxed by horizontal and vertical lines
+    random_generator = random.Random(seed)
+    writer = PdfWriter()
+    y = _new_page(writer)
+    writer.text(40, 800, "Storeji Pvt Ltd", FONT_SIZE)
+    writer.text(40, 760, "Invoice Number:", FONT_SIZE)
+    writer.text(160, 760, "IN-%05d" % random_generator.randint(1, 99999), FONT_SIZE)
+    writer.text(40, 745, "Invoice Date:", FONT_SIZE)
+    writer.text(160, 745, "14.10.2017", FONT_SIZE)
+    _write_rules(writer, rules)
+
+    list_columns = [(30, ["Sl.", "No"]), (70, ["Description"]), (230, ["Unit", "Price"]), (280, ["Quantity"]), \
+        (335, ["Net", "Amount"]), (385, ["Tax", "Rate"]), (425, ["Tax", "Type"]), (465, ["Tax", "Amount"]), (515, ["Total", "Amount"])]
+    list_column_x = [x for x, _ in list_columns] + [570]
+
+    def write_row_lines(y_top, y_bottom):
+        for x in list_column_x:
+            writer.line(x, y_bottom, x, y_top)
+        writer.line(list_column_x[0], y_top, list_column_x[-1], y_top)
+        writer.line(list_column_x[0], y_bottom, list_column_x[-1], y_bottom)
+
+    y = 700
+    write_row_lines(y, y - 30)
+    for x, list_header_lines in list_columns:
+        for line_number, header_line in enumerate(list_header_lines):
+            writer.text(x + 4, y - 12 - 10 * line_number, header_line, FONT_SIZE)
+    y = y - 30
+
+    total = 0.0
+    for number in range(lineitems):
+        if y < 80:
+            y = _new_page(writer)
+        net_amount = round(random_generator.uniform(10, 900), 2)
+        tax_amount = round(net_amount * 0.28, 2)
+        total_amount = round(net_amount + tax_amount, 2)
+        total = total + total_amount
+        write_row_lines(y, y - 30)
+        list_values = [str(number + 1), "Item %d Car Antenna" % (number + 1), "%.2f" % net_amount, "1", "%.2f" % net_amount, \
+            "28%", "IGST", "%.2f" % tax_amount, "%.2f" % total_amount]
+        for (x, _), value in zip(list_columns, list_values):
+            writer.text(x + 4, y - 14, value, FONT_SIZE)
+        y = y - 30
+
+    if y < 100:
+        y = _new_page(writer)
+    write_row_lines(y, y - 20)
+    writer.text(34, y - 14, "TOTAL:", FONT_SIZE)
+    writer.text(list_columns[7][0] + 4, y - 14, "%.2f" % 0.0, FONT_SIZE)
+    writer.text(list_columns[8][0] + 4, y - 14, "%.2f" % total, FONT_SIZE)
+    y = y - 40
+    writer.text(40, y, "Amount in Words:", FONT_SIZE)
+    writer.text(40, y - 14, "Some Amount only", FONT_SIZE)
+
+    _write_extra_pages(writer, pages, random_generator)
+    writer.save(pdf_file_name)
+
+def write_flipkart_wsretail(pdf_file_name, lineitems = 2, pages = 1, rules = 0, seed = 2):
+
+    # No ruling, a right aligned quantity column
+    random_generator = random.Random(seed)
+    writer = PdfWriter()
+    _new_page(writer)
+    writer.text(40, 800, "WS Retail Services Pvt. Ltd", FONT_SIZE)
+    writer.text(40, 770, "Invoice No :  BLR_WFLD%014d" % random_generator.randint(1, 10 ** 14 - 1), FONT_SIZE)
+    writer.text(300, 770, "Invoice Date:", FONT_SIZE)
+    writer.text(400, 770, "23-09-2015", FONT_SIZE)
+    _write_rules(writer, rules)
+
+    for header, x in [("Product", 40), ("Title", 120), ("Qty", 300), ("Price ", 340), ("Tax(%)", 400), ("Tax ", 460), ("Total ", 510)]:
+        writer.text(x, 700, header, FONT_SIZE)
+    # Right edge of "Qty"
+    quantity_right_x = 300 + (0.778 + 0.278 + 0.5) * FONT_SIZE
+
+    y = 680
+    grand_total = 0.0
+    for number in range(lineitems):
+        if y < 80:
+            y = _new_page(writer)
+        price = round(random_generator.uniform(100, 5000), 2)
+        tax = round(price * 0.055, 2)
+        total = round(price + tax, 2)
+        grand_total = grand_total + total
+        quantity = "1"
+        writer.text(40, y, "Handsets", FONT_SIZE)
+        writer.text(120, y, "Phone %d" % number, FONT_SIZE)
+        writer.text(quantity_right_x - DIGIT_WIDTH * len(quantity), y, quantity, FONT_SIZE)
+        writer.text(342, y, "%.2f" % price, FONT_SIZE)
+        writer.text(402, y, "5.50%", FONT_SIZE)
+        writer.text(462, y, "%.2f" % tax, FONT_SIZE)
+        writer.text(512, y, "%.2f" % total, FONT_SIZE)
+        y = y - 20
+
+    if y < 100:
+        y = _new_page(writer)
+    writer.text(40, y - 10, "Total", FONT_SIZE)
+    writer.text(40, y - 40, "Grand Total", FONT_SIZE)
+    writer.text(200, y - 40, " %.2f" % grand_total, FONT_SIZE)
+
+    _write_extra_pages(writer, pages, random_generator)
+    writer.save(pdf_file_name)
+
+def write_flipkart_shreyasretail(pdf_file_name, lineitems = 3, pages = 1, rules = 0, seed = 3):
+
+    # No ruling, two line column headers
+    random_generator = random.Random(seed)
+    writer = PdfWriter()
+    _new_page(writer)
+    writer.text(40, 800, "Shreyash Retail Private Limited", FONT_SIZE)
+    writer.text(40, 770, "Invoice Number", FONT_SIZE)
+    writer.text(140, 770, ": FABO5L%010d" % random_generator.randint(1, 10 ** 10 - 1), FONT_SIZE)
+    writer.text(40, 755, "Invoice Date", FONT_SIZE)
+    writer.text(140, 755, ": 02-04-2019", FONT_SIZE)
+    _write_rules(writer, rules)
+
+    list_headers = [(40, ["S.", "No"]), (70, ["Item"]), (250, ["HSN", "(Tax%)"]), (320, ["Qty"]), (360, ["MRP", "(Rs)"]), \
+        (420, ["Savings", "(Rs)"]), (490, ["Total", "Amt(Rs)"])]
+    for x, list_header_lines in list_headers:
+        for line_number, header_line in enumerate(list_header_lines):
+            writer.text(x, 700 - 10 * line_number, header_line, FONT_SIZE)
+
+    y = 670
+    total = 0.0
+    for number in range(lineitems):
+        if y < 80:
+            y = _new_page(writer)
+        mrp = round(random_generator.uniform(20, 500), 2)
+        savings = round(mrp * 0.1, 2)
+        amount = round(mrp - savings, 2)
+        total = total + amount
+        writer.text(40, y, str(number + 1), FONT_SIZE)
+        writer.text(70, y, "Grocery item number %d" % number, FONT_SIZE)
+        writer.text(250, y, "0405902%d" % (number % 10), FONT_SIZE)
+        writer.text(322, y, "1", FONT_SIZE)
+        writer.text(362, y, "%.2f" % mrp, FONT_SIZE)
+        writer.text(422, y, "%.2f" % savings, FONT_SIZE)
+        writer.text(492, y, "%.2f" % amount, FONT_SIZE)
+        y = y - 25
+
+    if y < 100:
+        y = _new_page(writer)
+    writer.text(40, y - 10, "Summary", FONT_SIZE)
+    writer.text(422, y - 10, "%.2f" % 0, FONT_SIZE)
+    writer.text(492, y - 10, "%.2f" % total, FONT_SIZE)
+
+    _write_extra_pages(writer, pages, random_generator)
+    writer.save(pdf_file_name)
+
+INVOICE_WRITERS = {
+    "Amazon-Storeji": write_amazon_storeji,
+    "FlipKart-WSRetail": write_flipkart_wsretail,
+    "FlipKart-ShreyasRetail": write_flipkart_shreyasretail
+}
+
+def write_invoice(template_name, pdf_file_name, lineitems, pages = 1, rules = 0, seed = 0):
+    INVOICE_WRITERS[template_name](pdf_file_name, lineitems, pages, rules, seed)
+
+def write_corpus(corpus_folder, documents, lineitems, pages = 1, rules = 0, seed = 0):
+    """ documents pdfs, cycling through the templates. Same arguments, same bytes. """
+
+    os.makedirs(corpus_folder, exist_ok=True)
+    list_pdf_files = []
+    for number in range(documents):
+        template_name = TEMPLATE_NAMES[number % len(TEMPLATE_NAMES)]
+        pdf_file_name = os.path.join(corpus_folder, "%s-%06d.pdf" % (template_name, number))
+        write_invoice(template_name, pdf_file_name, lineitems, pages, rules, seed + number)
+        list_pdf_files.append(pdf_file_name)
+    return list_pdf_files
+
+def write_template_folder(template_folder, source_template_folder, templates):
+    """ The shipped templates plus decoys (same fields, keywords no invoice has) up to templates in all. """
+
+    os.makedirs(template_folder, exist_ok=True)
+    list_source_templates = []
+    for template_name in TEMPLATE_NAMES:
+        with open(os.path.join(source_template_folder, template_name + ".json"), "r") as read_file:
+            template = json.load(read_file)
+        list_source_templates.append(template)
+        with open(os.path.join(template_folder, template_name + ".json"), "w") as write_file:
+            json.dump(template, write_file, indent = 4)
+
+    for number in range(max(0, templates - len(TEMPLATE_NAMES))):
+        template = dict(list_source_templates[number % len(list_source_templates)])
+        template["name"] = "Decoy-%06d" % number
+        template["keywords"] = ["Decoy Vendor %06d Private Limited" % number, "GSTIN 29DECOY%06dZ5" % number]
+        template.pop("plugin", None)
+        with open(os.path.join(template_folder, "Decoy-%06d.json" % number), "w") as write_file:
+            json.dump(template, write_file, indent = 4)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', type=str, required=True)
+    parser.add_argument('--documents', type=int, required=False, default=30)
+    parser.add_argument('--lineitems', type=int, required=False, default=10)
+    parser.add_argument('--pages', type=int, required=False, default=1)
+    parser.add_argument('--rules', type=int, required=False, default=0)
+    parser.add_argument('--seed', type=int, required=False, default=0)
+    args = parser.parse_args()
+    return args
+
+def main():
+
+    args = parse_arguments()
+    list_pdf_files = write_corpus(args.output, args.documents, args.lineitems, args.pages, args.rules, args.seed)
+    print("Wrote %d pdf files to %s" % (len(list_pdf_files), args.output))
+
+
+if __name__== "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+"""PdfWriter.py: Minimal writer of native pdfs (text and lines) for the benchmarks, without external libraries."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+
+def _escape(text):
+   return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+class PdfWriter:
+
+   def __init__(self):
+      # Content stream operators of every page
+      self._pages = []
+
+   def add_page(self):
+      self._pages.append([])
+
+   def text(self, x, y, text, size = 10):
+      self._pages[-1].append("BT /F1 %d Tf %.2f %.2f Td (%s) Tj ET" % (size, x, y, _escape(text)))
+
+   def line(self, x0, y0, x1, y1):
+      self._pages[-1].append("%.2f %.2f m %.2f %.2f l S" % (x0, y0, x1, y1))
+
+   def rect(self, x, y, width, height):
+      self._pages[-1].append("%.2f %.2f %.2f %.2f re S" % (x, y, width, height))
+
+   def save(self, pdf_file_name):
+
+      # Objects 1 catalog, 2 page tree, 3 font, then a page and its content stream per page
+      list_objects = []
+      page_count = len(self._pages)
+      list_page_ids = [4 + 2 * index for index in range(page_count)]
+
+      list_objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+      kids = " ".join("%d 0 R" % page_id for page_id in list_page_ids)
+      list_objects.append(("<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, page_count)).encode("latin-1"))
+      list_objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+      for page_id, list_operators in zip(list_page_ids, self._pages):
+         list_objects.append(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R >> >> " \
+            "/Contents %d 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT, page_id + 1)).encode("latin-1"))
+         stream = "\n".join(list_operators).encode("latin-1")
+         list_objects.append(b"<< /Length " + str(len(stream)).encode("latin-1") + b" >>\nstream\n" + stream + b"\nendstream")
+
+      data = bytearray(b"%PDF-1.4\n")
+      list_offsets = []
+      for object_id, pdf_object in enumerate(list_objects, 1):
+         list_offsets.append(len(data))
+         data += ("%d 0 obj\n" % object_id).encode("latin-1") + pdf_object + b"\nendobj\n"
+
+      xref_offset = len(data)
+      data += ("xref\n0 %d\n" % (len(list_objects) + 1)).encode("latin-1")
+      data += b"0000000000 65535 f \n"
+      for offset in list_offsets:
+         data += ("%010d 00000 n \n" % offset).encode("latin-1")
+      data += ("trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(list_objects) + 1, xref_offset)).encode("latin-1")
+
+      with open(pdf_file_name, "wb") as write_file:
+         write_file.write(data)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+"""column_windows_check.py: Check that the alignment windows of the columns of a table without ruling lines give the same
+column for a text as trying the columns one after the other, on random column headers and texts."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import os
+import random
+import sys
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+import EquivalenceCheck
+from LayoutBackend import TextBox
+from ObjectLayoutAlgorithms import ColumnInformation
+from TableGrid import TableColumnWindows
+
+# "justify" is not supported, the search ends at such a column
+ALIGNMENTS = ["left", "right", "center", "justify"]
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type=int, required=False, default=3000)
+    parser.add_argument('--seed', type=int, required=False, default=0)
+    args = parser.parse_args()
+    return args
+
+def get_column_index_by_scan(list_of_column_information, dict_column_text_widths, alignment_margin, textbox, start_index):
+    """ The column get_table_lineitems found by trying the columns from start_index before the windows, None for none. The
+    index of a column of unsupported alignment, where it stopped. """
+
+    counter = start_index
+    while counter < len(list_of_column_information):
+        found_column = False
+        column = list_of_column_information[counter]
+        column_textbox = dict_column_text_widths[column.name]
+        if column.alignment == "left":
+            x_start = column_textbox.x0 - alignment_margin
+            x_end = column_textbox.x0 + alignment_margin
+            if textbox.x0 >= x_start and textbox.x0 <= x_end:
+                found_column = True
+        elif column.alignment == "right":
+            x_start = column_textbox.x1 - alignment_margin
+            x_end = column_textbox.x1 + alignment_margin
+            if textbox.x1 >= x_start and textbox.x1 <= x_end:
+                found_column = True
+        elif column.alignment == "center":
+            if textbox.x0 >= column_textbox.x0 and textbox.x0 <= column_textbox.x1 or \
+               textbox.x1 >= column_textbox.x0 and textbox.x1 <= column_textbox.x1:
+                found_column = True
+            elif textbox.x0 < column_textbox.x0 and textbox.x1 > column_textbox.x1:
+                found_column = True
+        else:
+            return counter
+
+        if found_column == True:
+            return counter
+        counter += 1
+    return None
+
+def main():
+
+    args = parse_arguments()
+
+    trials = 0
+    differences = 0
+    for trial in range(args.trials):
+        random_generator = random.Random(args.seed + trial)
+        # Few distinct coordinates, so that headers and texts share their ends, touch and overlap
+        get_coordinate = lambda: random_generator.choice([random_generator.randint(0, 60), round(random_generator.uniform(0, 60), 2)])
+
+        list_of_column_information = []
+        dict_column_text_widths = {}
+        for index in range(random_generator.randint(1, 18)):
+            alignment = random_generator.choice(ALIGNMENTS) if random_generator.random() < 0.1 else random_generator.choice(ALIGNMENTS[:3])
+            list_of_column_information.append(ColumnInformation("column %d" % index, alignment, False, False))
+            x0 = get_coordinate()
+            # Now and then a header of no width or inverted, giving degenerate center windows
+            x1 = x0 + random_generator.choice([random_generator.randint(1, 15), 0, -random_generator.randint(1, 5)])
+            dict_column_text_widths["column %d" % index] = TextBox(x0, 0, x1, 10, "column %d" % index)
+        alignment_margin = random_generator.choice([0, 5, random_generator.uniform(0, 10)])
+        column_windows = TableColumnWindows(list_of_column_information, dict_column_text_widths, alignment_margin)
+
+        trials += 1
+        trial_differences = 0
+        for _ in range(40):
+            x0 = get_coordinate()
+            textbox = TextBox(x0, 0, x0 + random_generator.choice([random_generator.randint(0, 20), -random_generator.randint(1, 5)]), 10, "text")
+            # Up to past the last column, as after a text in the last column
+            start_index = random_generator.randint(0, len(list_of_column_information))
+            if column_windows.get_column_index(textbox, start_index) != get_column_index_by_scan(list_of_column_information, \
+                dict_column_text_widths, alignment_margin, textbox, start_index):
+                trial_differences += 1
+        if trial_differences > 0:
+            differences += 1
+            print("DIFFERENT trial %d" % trial)
+
+    EquivalenceCheck.report(trials, differences)
+
+
+if __name__== "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""field_scope_check.py: Check that field searches stopping at their ordinal and limited to pages and regions find what a
+search of the whole document filtered afterwards finds, on random field sets over generated invoices."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import collections
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+import EquivalenceCheck
+from Logger import Logger
+from LayoutCache import LayoutCache
+from ExtractionContext import ExtractionContext
+from TemplateRegistry import CompiledField
+import FieldExtractor
+
+from field_search_check import FIELD_LOCATIONS, RandomTemplate
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type=int, required=False, default=100)
+    parser.add_argument('--seed', type=int, required=False, default=11)
+    args = parser.parse_args()
+    return args
+
+def in_scope(scope, textbox_location):
+    return scope is None or (scope.contains_page(textbox_location.page_number) and scope.contains(textbox_location))
+
+def search_whole_document(objectlayoutalgo_instance, field):
+    """ (location, regex value or None) of every identifier of the field in its scope, from a search of all the pages. """
+
+    if field.regex is not None:
+        list_keyword_locations, list_regex_values = objectlayoutalgo_instance.search_regex(field.regex)
+    else:
+        list_keyword_locations = objectlayoutalgo_instance.search_keyword(field.identifier, field.normalized)
+        list_regex_values = [None] * len(list_keyword_locations)
+    return [(keyword_location, value) for keyword_location, value in zip(list_keyword_locations, list_regex_values) \
+        if in_scope(field.scope, keyword_location)]
+
+def extract_fields_filtered(context):
+    """ The field values, with each field's identifiers searched for in the whole document and filtered afterwards. """
+
+    objectlayoutalgo_instance = context.algorithms
+    dict_of_field_values = collections.OrderedDict()
+
+    for field in context.template.fields:
+        list_matches = search_whole_document(objectlayoutalgo_instance, field)
+        if field.ordinal is not None:
+            list_matches = list_matches[field.ordinal-1:field.ordinal]
+        for keyword_location, value in list_matches:
+            if field.location == 'regex':
+                text = value
+            elif field.location.endswith('bottom'):
+                text = objectlayoutalgo_instance.get_text_at_bottom(keyword_location)
+            elif field.location.endswith('second-right'):
+                text = objectlayoutalgo_instance.get_text_to_right(2, keyword_location)
+            else:
+                text = objectlayoutalgo_instance.get_text_to_right(1, keyword_location)
+            if text != None and len(text) > 0:
+                dict_of_field_values[field.name] = text
+
+    return dict_of_field_values
+
+def count_search_differences(objectlayoutalgo_instance, field):
+    """ 1 if search_regex or search_keyword with the field's ordinal and scope differ from the filtered search. """
+
+    expected = [(keyword_location.page_number, keyword_location.x0, keyword_location.y0, value) for keyword_location, value \
+        in search_whole_document(objectlayoutalgo_instance, field)][:field.ordinal]
+    if field.regex is not None:
+        list_keyword_locations, list_regex_values = objectlayoutalgo_instance.search_regex(field.regex, field.ordinal, field.scope)
+    else:
+        list_keyword_locations = objectlayoutalgo_instance.search_keyword(field.identifier, field.normalized, field.ordinal, \
+            field.scope)
+        list_regex_values = [None] * len(list_keyword_locations)
+    found = [(keyword_location.page_number, keyword_location.x0, keyword_location.y0, value) for keyword_location, value \
+        in zip(list_keyword_locations, list_regex_values)]
+    return 0 if found == expected else 1
+
+def get_random_fields(random_generator, list_textboxes, page_count):
+
+    list_fields = []
+    for _ in range(random_generator.randint(1, 15)):
+        location = random_generator.choice(FIELD_LOCATIONS)
+        textbox = random_generator.choice(list_textboxes)
+        if location.startswith("regex"):
+            identifier = random_generator.choice([re.escape(textbox.text[:3]) + ".*", r"(\d+)", r"([A-Z]\w+)", "[0-9]{2}", r"(a)\1"])
+        else:
+            identifier = random_generator.choice([textbox.text, textbox.text.upper()])
+        field = {"name": "Field %d" % random_generator.randint(0, 6), "location": location, "identifier": identifier}
+        if random_generator.random() < 0.5:
+            field["ordinal"] = random_generator.randint(1, 5)
+        if location.startswith("regex") == False and random_generator.random() < 0.4:
+            field["match"] = "normalized"
+        # Pages past the end and regions around a textbox, often unbounded on some sides
+        if random_generator.random() < 0.5:
+            first_page = random_generator.randint(1, page_count + 1)
+            field["pages"] = {"first": first_page}
+            if random_generator.random() < 0.6:
+                field["pages"]["last"] = random_generator.randint(first_page, page_count + 1)
+        if random_generator.random() < 0.5:
+            field["region"] = {}
+            for side, value in [("x0", textbox.x0 - random_generator.uniform(0, 200)), ("y0", textbox.y0 - random_generator.uniform(0, 300)), \
+                ("x1", textbox.x1 + random_generator.uniform(0, 200)), ("y1", textbox.y1 + random_generator.uniform(0, 300))]:
+                if random_generator.random() < 0.7:
+                    field["region"][side] = value
+        list_fields.append(CompiledField(field))
+    return list_fields
+
+def main():
+
+    args = parse_arguments()
+    Logger.getLogger().setLevel(logging.WARNING)
+    LayoutCache.getInstance().set_enabled(False)
+
+    random_generator = random.Random(args.seed)
+    trials = 0
+    differences = 0
+    with tempfile.TemporaryDirectory() as temp_folder:
+        for pdf_file_name in EquivalenceCheck.write_corpus(temp_folder):
+            context = ExtractionContext(pdf_file_name, None)
+            try:
+                context.container.parse_pdf(pdf_file_name, None)
+                context.container.load_all_pages()
+                list_textboxes = [textbox for page in context.container.pages for textbox in page.textboxes if textbox.text.strip()]
+                for _ in range(args.trials):
+                    context.template = RandomTemplate(get_random_fields(random_generator, list_textboxes, len(context.container.pages)))
+                    trials += 1
+                    search_differences = sum(count_search_differences(context.algorithms, field) for field in context.template.fields)
+                    expected = extract_fields_filtered(context)
+                    extracted = FieldExtractor.extract_fields(context)
+                    if search_differences > 0 or list(expected.items()) != list(extracted.items()):
+                        differences += 1
+                        print("DIFFERENT %s : %s" % (pdf_file_name, [(field.name, field.location, field.identifier, \
+                            field.ordinal, field.normalized, field.scope and field.scope._key()) for field in context.template.fields]))
+            finally:
+                context.close()
+
+    EquivalenceCheck.report(trials, differences)
+
+
+if __name__== "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+"""field_search_check.py: Check that extracting all the fields in one pass gives the same values as searching field by field,
+on random field sets over generated invoices."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import collections
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+import EquivalenceCheck
+from Logger import Logger
+from LayoutCache import LayoutCache
+from ExtractionContext import ExtractionContext
+from TemplateRegistry import CompiledField, CompiledFieldPlan
+import FieldExtractor
+
+FIELD_LOCATIONS = ["right", "second-right", "bottom", "regex", "regex-right", "regex-second-right", "regex-bottom"]
+
+class RandomTemplate:
+  def __init__(self, fields):
+    self.fields = fields
+    self.field_plan = CompiledFieldPlan(fields)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type=int, required=False, default=100)
+    parser.add_argument('--seed', type=int, required=False, default=7)
+    args = parser.parse_args()
+    return args
+
+def extract_fields_one_by_one(context):
+    """ The field extraction before the fields were searched in one pass : every field searches the document on its own. """
+
+    objectlayoutalgo_instance = context.algorithms
+    dict_of_field_values = collections.OrderedDict()
+
+    for field in context.template.fields:
+        if field.location == 'regex':
+            list_keyword_locations, list_regex_values = objectlayoutalgo_instance.search_regex(field.regex)
+            for counter, text in enumerate(list_regex_values):
+                if text != None and len(text) > 0:
+                    if field.ordinal == None or field.ordinal == (counter+1):
+                        dict_of_field_values[field.name] = text
+            continue
+
+        if field.location.startswith('regex'):
+            list_keyword_locations, _ = objectlayoutalgo_instance.search_regex(field.regex)
+        else:
+            list_keyword_locations = objectlayoutalgo_instance.search_keyword(field.identifier, field.normalized, field.ordinal)
+
+        for counter, keyword_location in enumerate(list_keyword_locations):
+            if field.ordinal == None or field.ordinal == (counter+1):
+                if field.location == 'bottom' or field.location == 'regex-bottom':
+                    text = objectlayoutalgo_instance.get_text_at_bottom(keyword_location)
+                elif field.location == 'right' or field.location == 'regex-right':
+                    text = objectlayoutalgo_instance.get_text_to_right(1, keyword_location)
+                else:
+                    text = objectlayoutalgo_instance.get_text_to_right(2, keyword_location)
+                if text != None and len(text) > 0:
+                    dict_of_field_values[field.name] = text
+
+    return dict_of_field_values
+
+def get_random_fields(random_generator, list_texts):
+
+    list_fields = []
+    for _ in range(random_generator.randint(1, 25)):
+        location = random_generator.choice(FIELD_LOCATIONS)
+        text = random_generator.choice(list_texts)
+        if location.startswith("regex"):
+            # Prefixes of texts, capturing groups, backreferences and named groups, which can't all be joined into one regex
+            prefix = re.escape(text[:random_generator.randint(1, len(text))])
+            identifier = random_generator.choice([prefix, prefix + r"\s*(.*)", r"(\d+)", r"([A-Z]+)", r"(a)\1", r"(?i)total", \
+                r"(?P<x>\d)", "[0-9]{2}"])
+        else:
+            identifier = random_generator.choice([text, text.upper(), " " + text + " "])
+        field = {"name": "Field %d" % random_generator.randint(0, 8), "location": location, "identifier": identifier}
+        if random_generator.random() < 0.4:
+            field["ordinal"] = random_generator.randint(1, 5)
+        if location.startswith("regex") == False and random_generator.random() < 0.4:
+            field["match"] = "normalized"
+        list_fields.append(CompiledField(field))
+    return list_fields
+
+def main():
+
+    args = parse_arguments()
+    Logger.getLogger().setLevel(logging.WARNING)
+    LayoutCache.getInstance().set_enabled(False)
+
+    random_generator = random.Random(args.seed)
+    trials = 0
+    differences = 0
+    with tempfile.TemporaryDirectory() as temp_folder:
+        for pdf_file_name in EquivalenceCheck.write_corpus(temp_folder):
+            context = ExtractionContext(pdf_file_name, None)
+            try:
+                context.container.parse_pdf(pdf_file_name, None)
+                context.container.load_all_pages()
+                list_texts = [textbox.text for page in context.container.pages for textbox in page.textboxes if textbox.text.strip()]
+                for _ in range(args.trials):
+                    context.template = RandomTemplate(get_random_fields(random_generator, list_texts))
+                    expected = extract_fields_one_by_one(context)
+                    extracted = FieldExtractor.extract_fields(context)
+                    trials += 1
+                    if list(expected.items()) != list(extracted.items()):
+                        differences += 1
+                        print("DIFFERENT %s : %s" % (pdf_file_name, [(field.name, field.location, field.identifier, \
+                            field.ordinal, field.normalized) for field in context.template.fields]))
+            finally:
+                context.close()
+
+    EquivalenceCheck.report(trials, differences)
+
+
+if __name__== "__main__":
+    main()
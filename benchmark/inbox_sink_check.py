@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+"""inbox_sink_check.py: Check that watching an inbox with --once returns when the output sink keeps failing, with the PDFs
+moved to the failed folder after the configured write retries, and that a sink failing only once loses no PDF."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+TEMPLATE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "template")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+import EquivalenceCheck
+import InvoiceGenerator
+from Logger import Logger
+import InboxWatcher
+import OutputSink
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--documents', type=int, required=False, default=3)
+    parser.add_argument('--timeout', type=float, required=False, default=120)
+    args = parser.parse_args()
+    return args
+
+class FailingSink(OutputSink.OutputSink):
+    """ Fails the first failures bulk writes, every one when failures is None. """
+
+    def __init__(self, output, failures):
+        super().__init__(output)
+        self.failures = failures
+        self.list_written = []
+
+    def _write_documents(self, list_documents):
+        if self.failures is None or self.failures > 0:
+            if self.failures is not None:
+                self.failures -= 1
+            raise OSError("Output sink failure")
+        self.list_written.extend(name for name, _, _ in list_documents)
+
+def watch_with_sink(inbox_folder, sink, timeout):
+    """ Watches the inbox with --once using the sink. Whether it returned within the timeout. """
+
+    create_sink = OutputSink.create_sink
+    OutputSink.create_sink = lambda sink_type, output: sink
+    try:
+        watcher = threading.Thread(target=InboxWatcher.watch_inbox, args=(TEMPLATE_FOLDER, inbox_folder, None), \
+            kwargs={"exit_when_empty": True}, daemon=True)
+        watcher.start()
+        watcher.join(timeout)
+        return watcher.is_alive() == False
+    finally:
+        OutputSink.create_sink = create_sink
+
+def write_inbox(inbox_folder, documents):
+    """ Generated invoices, old enough to be taken at the first poll. Their names. """
+
+    list_names = []
+    for number in range(documents):
+        template_name = InvoiceGenerator.TEMPLATE_NAMES[number % len(InvoiceGenerator.TEMPLATE_NAMES)]
+        name = "%s-%d" % (template_name, number)
+        pdf_file_name = os.path.join(inbox_folder, name + ".pdf")
+        InvoiceGenerator.write_invoice(template_name, pdf_file_name, 3, 1, 0, number)
+        settled_time = time.time() - 60
+        os.utime(pdf_file_name, (settled_time, settled_time))
+        list_names.append(name)
+    return sorted(list_names)
+
+def list_pdf_names(folder):
+    if os.path.isdir(folder) == False:
+        return []
+    return sorted(os.path.splitext(file_name)[0] for file_name in os.listdir(folder) if file_name.lower().endswith(".pdf"))
+
+def main():
+
+    args = parse_arguments()
+    # The failed writes are logged as errors
+    Logger.getLogger().setLevel(logging.CRITICAL)
+
+    trials = 0
+    differences = 0
+    # (failures, where the PDFs end up)
+    for failures, expected_folder in [(None, "failed"), (1, "done")]:
+        with tempfile.TemporaryDirectory() as inbox_folder:
+            list_names = write_inbox(inbox_folder, args.documents)
+            sink = FailingSink(None, failures)
+            trials += 1
+            if watch_with_sink(inbox_folder, sink, args.timeout) == False:
+                differences += 1
+                print("DIFFERENT sink failing %s times : still watching after %d seconds" % (failures, args.timeout))
+                continue
+            expected_written = [] if expected_folder == "failed" else list_names
+            if list_pdf_names(os.path.join(inbox_folder, expected_folder)) != list_names or list_pdf_names(inbox_folder) != [] or \
+                sorted(sink.list_written) != expected_written:
+                differences += 1
+                print("DIFFERENT sink failing %s times : inbox %s, done %s, failed %s, written %s" % (failures, \
+                    list_pdf_names(inbox_folder), list_pdf_names(os.path.join(inbox_folder, "done")), \
+                    list_pdf_names(os.path.join(inbox_folder, "failed")), sink.list_written))
+
+    EquivalenceCheck.report(trials, differences)
+
+
+if __name__== "__main__":
+    main()
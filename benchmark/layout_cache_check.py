@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+"""layout_cache_check.py: Check that extracting a pdf again is served from the layout cache, also when parsing stopped early."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import uuid
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+from PdfWriter import PdfWriter
+from Logger import Logger
+from LayoutCache import LayoutCache
+from ObjectLayoutContainer import ObjectLayoutContainer
+import LayoutBackend
+
+from parallel_parse_benchmark import snapshot_pages
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, required=False, default=6)
+    parser.add_argument('--workers', type=int, required=False, default=1)
+    args = parser.parse_args()
+    return args
+
+def write_document(pdf_file_name, page_count):
+
+    # Contents of its own, so that nothing is in the cache yet
+    document_id = uuid.uuid4().hex
+    writer = PdfWriter()
+    for page_number in range(page_count):
+        writer.add_page()
+        writer.text(40, 800, "Document %s page %d of %d" % (document_id, page_number + 1, page_count), 12)
+        writer.rect(36, 60, 523, 720)
+        for row in range(20):
+            writer.text(40, 760 - row * 30, "Line %d of page %d" % (row, page_number + 1))
+    writer.save(pdf_file_name)
+
+def get_cache_entry(pdf_file_name):
+    """ (# of pages, # of pdf pages, complete) of the cache entry of the pdf, None if there is none. """
+
+    layout_cache = LayoutCache.getInstance()
+    cache_key = layout_cache.get_key(pdf_file_name, LayoutBackend.create_layout_backend(None).get_settings())
+    cached_layout = layout_cache.load(cache_key)
+    if cached_layout is None:
+        return None
+    list_page_layouts, source_page_count, complete = cached_layout
+    return len(list_page_layouts), source_page_count, complete
+
+def truncate_cache_entry(pdf_file_name, removed_bytes):
+    """ Cut the end off the cache file of the pdf, as a crash while copying it would. """
+
+    layout_cache = LayoutCache.getInstance()
+    cache_key = layout_cache.get_key(pdf_file_name, LayoutBackend.create_layout_backend(None).get_settings())
+    cache_file_name = layout_cache._get_cache_file_name(cache_key)
+    with open(cache_file_name, "r+b") as cache_file:
+        cache_file.truncate(os.path.getsize(cache_file_name) - removed_bytes)
+
+def run(pdf_file_name, pages_needed):
+    """ Extract like a template needing only the first pages_needed pages, None for all. Returns the # of pages served from
+    the cache and the pages at the end. """
+
+    container_instance = ObjectLayoutContainer()
+    try:
+        container_instance.parse_pdf(pdf_file_name, None)
+        # Parsing is lazy, so the pages there right after parse_pdf came from the cache
+        cached_page_count = len(container_instance.pages)
+        if pages_needed is None:
+            container_instance.load_all_pages()
+        else:
+            container_instance.load_page(pages_needed - 1)
+    finally:
+        container_instance.close()
+    return cached_page_count, snapshot_pages(container_instance)
+
+def check(description, passed):
+    print("%-60s %s" % (description, "ok" if passed else "FAILED"))
+    return passed
+
+def main():
+
+    args = parse_arguments()
+    Logger.getLogger().setLevel(logging.WARNING)
+
+    all_passed = True
+    with tempfile.TemporaryDirectory() as temp_folder:
+        pdf_file_name = os.path.join(temp_folder, "document.pdf")
+        write_document(pdf_file_name, args.pages)
+
+        ObjectLayoutContainer.getInstance().set_parse_workers(1)
+        LayoutCache.getInstance().set_enabled(False)
+        _, expected_pages = run(pdf_file_name, None)
+        LayoutCache.getInstance().set_enabled(True)
+
+        cached_page_count, pages = run(pdf_file_name, 1)
+        all_passed &= check("first run parses the pdf", cached_page_count == 0)
+        all_passed &= check("first run stops after the first page", len(pages) == 1)
+        all_passed &= check("first page cached", get_cache_entry(pdf_file_name) == (1, 1, False))
+
+        cached_page_count, pages = run(pdf_file_name, 1)
+        all_passed &= check("second run served from the cache", cached_page_count == 1)
+        all_passed &= check("second run same page", pages == expected_pages[:1])
+
+        # The rest of the pages can be parsed in parallel, the first run must stop early
+        ObjectLayoutContainer.getInstance().set_parse_workers(args.workers, 1)
+        cached_page_count, pages = run(pdf_file_name, 3)
+        all_passed &= check("third run resumes after the cached page", cached_page_count == 1 and pages == expected_pages[:len(pages)])
+        entry = get_cache_entry(pdf_file_name)
+        all_passed &= check("cache entry extended", entry is not None and entry[0] == len(pages) and entry[0] >= 3)
+
+        cached_page_count, pages = run(pdf_file_name, None)
+        all_passed &= check("fourth run parses the rest", pages == expected_pages)
+        all_passed &= check("complete document cached", get_cache_entry(pdf_file_name) == (args.pages, args.pages, True))
+
+        cached_page_count, pages = run(pdf_file_name, None)
+        all_passed &= check("fifth run served from the cache", cached_page_count == args.pages and pages == expected_pages)
+
+        # Only the strings at the end of the file are lost. Parsing in one process again, so that a page there right after
+        # parse_pdf is from the cache
+        truncate_cache_entry(pdf_file_name, 3)
+        ObjectLayoutContainer.getInstance().set_parse_workers(1)
+        Logger.getLogger().setLevel(logging.ERROR)
+        cached_page_count, pages = run(pdf_file_name, None)
+        Logger.getLogger().setLevel(logging.WARNING)
+        all_passed &= check("truncated cache file discarded", cached_page_count == 0 and pages == expected_pages)
+        all_passed &= check("complete document cached again", get_cache_entry(pdf_file_name) == (args.pages, args.pages, True))
+
+    print("PASSED" if all_passed else "FAILED")
+    sys.exit(0 if all_passed else 1)
+
+
+if __name__== "__main__":
+    main()
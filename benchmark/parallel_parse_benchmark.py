@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+"""parallel_parse_benchmark.py: Time sequential vs parallel page parsing of long pdfs, for a range of page counts."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+from PdfWriter import PdfWriter
+from Logger import Logger
+from LayoutCache import LayoutCache
+from ObjectLayoutContainer import ObjectLayoutContainer
+
+ROWS_PER_PAGE = 40
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=str, required=False, default="1,8,16,32,64,128")
+    parser.add_argument('--workers', type=int, required=False, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, required=False, default=3)
+    args = parser.parse_args()
+    return args
+
+def write_statement(pdf_file_name, page_count):
+
+    # A ruled table of transactions on every page, like a marketplace statement
+    writer = PdfWriter()
+    for page_number in range(page_count):
+        writer.add_page()
+        writer.text(40, 800, "Settlement statement page %d of %d" % (page_number + 1, page_count), 12)
+        writer.rect(36, 60, 523, 720)
+        for column_x in [110, 330, 440]:
+            writer.line(column_x, 60, column_x, 780)
+        for row in range(ROWS_PER_PAGE):
+            y = 760 - row * 17
+            number = page_number * ROWS_PER_PAGE + row
+            writer.text(40, y, "%08d" % number)
+            writer.text(115, y, "Order %d shipped to customer %d" % (number, number % 97))
+            writer.text(335, y, "%d" % (number % 7 + 1))
+            writer.text(445, y, "%.2f" % ((number * 37) % 1000 + 0.99))
+            writer.line(36, y - 4, 559, y - 4)
+    writer.save(pdf_file_name)
+
+def snapshot_pages(container_instance):
+
+    list_snapshot = []
+    for page in container_instance.pages:
+        textboxes = [(textbox.x0, textbox.y0, textbox.x1, textbox.y1, textbox.text) for textbox in page.textboxes]
+        horizontal_lines = [(line.y, line.x0, line.x1) for lines_at_y in page.rows_of_horizontal_lines.values() for line in lines_at_y.values()]
+        vertical_lines = [(line.x, line.y0, line.y1, line.src) for lines_at_x in page.rows_of_vertical_lines.values() for line in lines_at_x.values()]
+        list_snapshot.append((textboxes, horizontal_lines, vertical_lines))
+    return list_snapshot
+
+def time_parse(pdf_file_name, parse_workers, repeat):
+
+    container_instance = ObjectLayoutContainer.getInstance()
+    container_instance.set_parse_workers(parse_workers, 1)
+
+    best_time = None
+    for _ in range(repeat):
+        container_instance.reset()
+        start_time = time.perf_counter()
+        container_instance.parse_pdf(pdf_file_name, None)
+        container_instance.load_all_pages()
+        elapsed_time = time.perf_counter() - start_time
+        if best_time is None or elapsed_time < best_time:
+            best_time = elapsed_time
+
+    return best_time, snapshot_pages(container_instance)
+
+def main():
+
+    args = parse_arguments()
+
+    # Measure pdfminer, not the layout cache or logging
+    Logger.getLogger().setLevel(logging.WARNING)
+    LayoutCache.getInstance().set_enabled(False)
+
+    print("Workers = %d, best of %d runs" % (args.workers, args.repeat))
+    print("%6s %14s %14s %8s %10s" % ("pages", "sequential(s)", "parallel(s)", "speedup", "identical"))
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        for page_count in [int(pages) for pages in args.pages.split(",")]:
+            pdf_file_name = os.path.join(temp_folder, "statement-%d.pdf" % page_count)
+            write_statement(pdf_file_name, page_count)
+
+            sequential_time, sequential_pages = time_parse(pdf_file_name, 1, args.repeat)
+            parallel_time, parallel_pages = time_parse(pdf_file_name, args.workers, args.repeat)
+
+            print("%6d %14.3f %14.3f %7.2fx %10s" % (page_count, sequential_time, parallel_time, sequential_time / parallel_time, \
+                str(sequential_pages == parallel_pages)))
+
+
+if __name__== "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+"""pipeline_benchmark.py: Time every stage of the extraction pipeline on synthetic invoices, scaling one dimension at a time."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+TEMPLATE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "template")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+import InvoiceGenerator
+from Logger import Logger
+from ExtractionContext import ExtractionContext
+from PluginManager import PluginManager
+from ObjectLayoutContainer import ObjectLayoutContainer
+import BatchProcessor
+import Checker
+import FieldExtractor
+import LineItemExtractor
+import TemplateChoser
+
+STAGES = ["parse", "template", "fields", "lineitems", "check", "output"]
+SNAPSHOT_FILE_EXTENSION = ".layout.json"
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--documents', type=int, required=False, default=6)
+    parser.add_argument('--lineitems', type=str, required=False, default="10,100,500")
+    parser.add_argument('--pages', type=str, required=False, default="1,10,50")
+    parser.add_argument('--rules', type=str, required=False, default="0,200,2000")
+    parser.add_argument('--templates', type=str, required=False, default="3,100,1000")
+    parser.add_argument('--repeat', type=int, required=False, default=1)
+    parser.add_argument('--corpus', type=str, required=False)
+    parser.add_argument('--replay', action='store_true')
+    args = parser.parse_args()
+    return args
+
+def time_document(pdf_file_name, template_folder):
+
+    # Orchestrator.extract, a stage at a time. All pages are parsed up front, so that parsing is not counted in later stages.
+    dict_stage_times = {}
+    context = ExtractionContext(pdf_file_name, template_folder)
+    try:
+        start_time = time.perf_counter()
+        context.container.parse_pdf(pdf_file_name, None)
+        context.container.load_all_pages()
+        dict_stage_times["parse"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        context.template = TemplateChoser.get_template(context)
+        if context.template.plugin is not None:
+            context.plugin = PluginManager.getInstance().load_plugin(context.template.plugin)
+        dict_stage_times["template"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        dict_of_field_values = FieldExtractor.extract_fields(context)
+        dict_stage_times["fields"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        dict_of_line_items = LineItemExtractor.extract_line_items(context)
+        dict_stage_times["lineitems"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        check_status = Checker.check_total(context, dict_of_field_values, dict_of_line_items)
+        dict_stage_times["check"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        extracted_data = {"fields": dict_of_field_values, "lineitems": dict_of_line_items, "checkstatus": check_status}
+        json.dumps(extracted_data, ensure_ascii=False, indent = 4)
+        dict_stage_times["output"] = time.perf_counter() - start_time
+    finally:
+        context.close()
+
+    return dict_stage_times, check_status.get("match_status", {}).get("status") == True
+
+def record_snapshots(list_pdf_files):
+
+    # Layouts recorded once with pdfminer, for the replay backend
+    ObjectLayoutContainer.getInstance().set_layout_backend("pdfminer")
+    list_snapshot_files = []
+    for pdf_file_name in list_pdf_files:
+        snapshot_file_name = os.path.splitext(pdf_file_name)[0] + SNAPSHOT_FILE_EXTENSION
+        if os.path.exists(snapshot_file_name) == False:
+            container_instance = ObjectLayoutContainer()
+            try:
+                container_instance.parse_pdf(pdf_file_name, None)
+                container_instance.save_layout_snapshot(snapshot_file_name)
+            finally:
+                container_instance.close()
+        list_snapshot_files.append(snapshot_file_name)
+    ObjectLayoutContainer.getInstance().set_layout_backend("replay")
+    return list_snapshot_files
+
+def run_scenario(work_folder, documents, lineitems, pages, rules, templates, repeat, replay):
+
+    corpus_folder = os.path.join(work_folder, "corpus-d%d-l%d-p%d-r%d" % (documents, lineitems, pages, rules))
+    template_folder = os.path.join(work_folder, "templates-%d" % templates)
+    if os.path.isdir(corpus_folder) == False:
+        InvoiceGenerator.write_corpus(corpus_folder, documents, lineitems, pages, rules)
+    if os.path.isdir(template_folder) == False:
+        InvoiceGenerator.write_template_folder(template_folder, TEMPLATE_FOLDER, templates)
+    list_pdf_files = sorted(os.path.join(corpus_folder, file_name) for file_name in os.listdir(corpus_folder) \
+        if file_name.endswith(".pdf"))
+    # Parse is then the time to load the recorded layout, the other stages are those of the algorithms alone
+    if replay == True:
+        list_pdf_files = record_snapshots(list_pdf_files)
+
+    # Templates, keyword index and plugins are loaded before the clock starts, as in a warm worker
+    BatchProcessor.initialize_worker(template_folder, False)
+
+    dict_stage_totals = dict((stage, 0.0) for stage in STAGES)
+    matched = 0
+    for _ in range(repeat):
+        matched = 0
+        for pdf_file_name in list_pdf_files:
+            dict_stage_times, match_status = time_document(pdf_file_name, template_folder)
+            for stage, stage_time in dict_stage_times.items():
+                dict_stage_totals[stage] = dict_stage_totals[stage] + stage_time
+            if match_status == True:
+                matched = matched + 1
+
+    document_count = len(list_pdf_files) * repeat
+    dict_stage_means = dict((stage, total / document_count) for stage, total in dict_stage_totals.items())
+    return dict_stage_means, matched, len(list_pdf_files)
+
+def main():
+
+    args = parse_arguments()
+
+    # Measure the pipeline, not the layout cache or logging
+    Logger.getLogger().setLevel(logging.WARNING)
+
+    dict_baseline = {"lineitems": 10, "pages": 1, "rules": 0, "templates": 3}
+    list_scenarios = [(dimension, dict(dict_baseline, **{dimension: int(value)})) \
+        for dimension in ["lineitems", "pages", "rules", "templates"] for value in getattr(args, dimension).split(",")]
+
+    print("%d documents per scenario (the templates in turn), mean of %d runs, milliseconds per document" % (args.documents, args.repeat))
+    if args.replay == True:
+        print("Layouts replayed from snapshots recorded with pdfminer")
+    print("%-10s %6s " % ("scaling", "value") + " ".join("%9s" % stage for stage in STAGES) + " %9s %8s %8s" % ("total", "docs/s", "checked"))
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        work_folder = args.corpus if args.corpus is not None else temp_folder
+        for dimension, dict_scenario in list_scenarios:
+            dict_stage_means, matched, documents = run_scenario(work_folder, args.documents, dict_scenario["lineitems"], \
+                dict_scenario["pages"], dict_scenario["rules"], dict_scenario["templates"], args.repeat, args.replay)
+            total_time = sum(dict_stage_means.values())
+            print("%-10s %6d " % (dimension, dict_scenario[dimension]) + \
+                " ".join("%9.2f" % (dict_stage_means[stage] * 1000) for stage in STAGES) + \
+                " %9.2f %8.1f %8s" % (total_time * 1000, 1 / total_time, "%d/%d" % (matched, documents)))
+
+
+if __name__== "__main__":
+    main()
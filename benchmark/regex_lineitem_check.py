@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+"""regex_lineitem_check.py: Check that regex line items come out the same as from an earlier revision of
+ObjectLayoutAlgorithms.py, for random line patterns, columns and row ranges of generated invoices.
+
+E.g:-, against the revision before the line patterns were compiled into a program
+python benchmark/regex_lineitem_check.py --reference c6b4a3d"""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+import EquivalenceCheck
+from Logger import Logger
+from LayoutCache import LayoutCache
+from ObjectLayoutContainer import ObjectLayoutContainer
+import ObjectLayoutAlgorithms
+
+# Patterns sharing group names, optional groups (None when not matched) and patterns without groups
+LINE_REGEXES = [r"(?P<a>\d+)\s+(?P<b>[A-Za-z]+)", r"(?P<a>[A-Z][a-z]+)", r"(?P<c>\d+)?\.(?P<b>\d+)", r"(?P<b>\d+\.\d+)", \
+    r"^(?P<d>[A-Z]{2,})", r"\d", r"(?P<a>[a-z]+)(?P<c>x)?"]
+COLUMNS = ["a", "b", "c", "d", "e"]
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reference', type=str, required=True)
+    parser.add_argument('--trials', type=int, required=False, default=60)
+    args = parser.parse_args()
+    return args
+
+def run_regex_lineitems(objectlayoutalgo_module, container_instance, list_line_regexes, list_of_columns, start_page, \
+    start_location, end_page, end_location):
+    """ The line items, or the type of the error raised, and the hot path counts. """
+
+    objectlayoutalgo_instance = objectlayoutalgo_module.ObjectLayoutAlgorithms(container_instance)
+    try:
+        result = EquivalenceCheck.get_regex_lineitems(objectlayoutalgo_module, objectlayoutalgo_instance, list_line_regexes, \
+            list_of_columns, start_page, start_location, end_page, end_location)
+    except Exception as ex:
+        # e.g. TypeError appending to a multi-line value whose optional group did not match
+        result = type(ex).__name__
+    return result, dict(objectlayoutalgo_instance._metrics.counters)
+
+def main():
+
+    args = parse_arguments()
+    Logger.getLogger().setLevel(logging.WARNING)
+    LayoutCache.getInstance().set_enabled(False)
+
+    trials = 0
+    differences = 0
+    errors = 0
+    with tempfile.TemporaryDirectory() as temp_folder:
+        reference_module = EquivalenceCheck.load_reference_module("ObjectLayoutAlgorithms", args.reference, temp_folder)
+        for pdf_file_name in EquivalenceCheck.write_corpus(temp_folder):
+            container_instance = ObjectLayoutContainer()
+            try:
+                container_instance.parse_pdf(pdf_file_name, None)
+                list_row_locations = EquivalenceCheck.get_row_locations(container_instance)
+                random_generator = random.Random(os.path.basename(pdf_file_name))
+                for _ in range(args.trials):
+                    # A valid range starts above where it ends
+                    start_index = random_generator.randrange(len(list_row_locations) - 1)
+                    end_index = random_generator.randrange(start_index + 1, len(list_row_locations))
+                    (start_page, start_location), (end_page, end_location) = list_row_locations[start_index], list_row_locations[end_index]
+                    list_line_regexes = [random_generator.choice(LINE_REGEXES) for _ in range(random_generator.randint(1, 4))]
+                    list_of_columns = random_generator.sample(COLUMNS, random_generator.randint(1, len(COLUMNS)))
+                    expected = run_regex_lineitems(reference_module, container_instance, list_line_regexes, list_of_columns, \
+                        start_page, start_location, end_page, end_location)
+                    found = run_regex_lineitems(ObjectLayoutAlgorithms, container_instance, list_line_regexes, list_of_columns, \
+                        start_page, start_location, end_page, end_location)
+                    trials += 1
+                    if found != expected:
+                        differences += 1
+                        print("DIFFERENT %s : %s %s" % (pdf_file_name, list_line_regexes, list_of_columns))
+                    elif isinstance(found[0], str):
+                        errors += 1
+            finally:
+                container_instance.close()
+
+    print("Trials raising the same error in both revisions = %d" % errors)
+    EquivalenceCheck.report(trials, differences)
+
+
+if __name__== "__main__":
+    main()
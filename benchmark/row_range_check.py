@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+"""row_range_check.py: Check that the line item algorithms give the same line items, locations and hot path counts as those
+of an earlier revision of ObjectLayoutAlgorithms.py, on random header/footer row ranges of generated invoices.
+
+E.g:-, against the revision before the rows of a page range were iterated through the container
+python benchmark/row_range_check.py --reference c561e08"""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import glob
+import logging
+import os
+import random
+import sys
+import tempfile
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+TEMPLATE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "template")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+import EquivalenceCheck
+from Logger import Logger
+from LayoutCache import LayoutCache
+from ObjectLayoutContainer import ObjectLayoutContainer
+from TemplateRegistry import TemplateRegistry
+import ObjectLayoutAlgorithms
+
+LINE_REGEXES = [r"(?P<a>\d+)\s+(?P<b>[A-Za-z]+)", r"(?P<a>[A-Z][a-z]+)", r"Total", r"(?P<b>\d+\.\d+)"]
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reference', type=str, required=True)
+    parser.add_argument('--trials', type=int, required=False, default=50)
+    args = parser.parse_args()
+    return args
+
+def run_lineitem_algorithms(objectlayoutalgo_module, container_instance, template, trial, start_page, start_location, end_page, \
+    end_location):
+    """ Everything the line item algorithms return for the range, and the hot path counts. """
+
+    objectlayoutalgo_instance = objectlayoutalgo_module.ObjectLayoutAlgorithms(container_instance)
+    list_results = []
+    list_results.append(EquivalenceCheck.get_regex_lineitems(objectlayoutalgo_module, objectlayoutalgo_instance, \
+        [LINE_REGEXES[trial % 4], LINE_REGEXES[(trial+1) % 4]], ["a", "b"], start_page, start_location, end_page, end_location))
+    list_results.append(objectlayoutalgo_instance.get_table_lineitem_end_location(LINE_REGEXES[(trial+2) % 4], start_page, start_location))
+    list_results.append(objectlayoutalgo_instance.get_table_lineitem_end_location(LINE_REGEXES[(trial+2) % 4], -1, -1))
+    list_results.append(objectlayoutalgo_instance.get_regex_lineitem_header_location(LINE_REGEXES[trial % 4]))
+
+    table_lineitems = template.table_lineitems
+    header_page, header_location, dict_column_text_widths = \
+        objectlayoutalgo_instance.get_table_lineitem_header_location(table_lineitems.list_lineitem_columns)
+    list_results.append((header_page, header_location, sorted((name, column_text.x0, column_text.x1, column_text.y0, column_text.y1) \
+        for name, column_text in dict_column_text_widths.items())))
+    if header_page != -1:
+        list_results.append(objectlayoutalgo_instance.get_table_lineitems(table_lineitems.list_of_column_information, \
+            dict_column_text_widths, start_page, start_location, end_page, end_location, table_lineitems.has_vertical_lines, \
+            table_lineitems.has_horizontal_lines))
+
+    list_results.append(objectlayoutalgo_instance.check_if_all_text_present({"Total", "Invoice", "Not in any invoice"}))
+    return list_results, dict(objectlayoutalgo_instance._metrics.counters)
+
+def main():
+
+    args = parse_arguments()
+    # Random ranges cut through tables, which the algorithms warn about
+    Logger.getLogger().setLevel(logging.CRITICAL)
+    LayoutCache.getInstance().set_enabled(False)
+
+    registry = TemplateRegistry.getInstance()
+    list_templates = [registry.get_template(template_file_name) for template_file_name in sorted(glob.glob(os.path.join(TEMPLATE_FOLDER, "*.json")))]
+
+    trials = 0
+    differences = 0
+    with tempfile.TemporaryDirectory() as temp_folder:
+        reference_module = EquivalenceCheck.load_reference_module("ObjectLayoutAlgorithms", args.reference, temp_folder)
+        for pdf_file_name in EquivalenceCheck.write_corpus(temp_folder):
+            container_instance = ObjectLayoutContainer()
+            try:
+                container_instance.parse_pdf(pdf_file_name, None)
+                list_row_locations = EquivalenceCheck.get_row_locations(container_instance)
+                random_generator = random.Random(os.path.basename(pdf_file_name))
+                for trial in range(args.trials):
+                    # A valid range starts above where it ends
+                    start_index = random_generator.randrange(len(list_row_locations) - 1)
+                    end_index = random_generator.randrange(start_index + 1, len(list_row_locations))
+                    (start_page, start_location), (end_page, end_location) = list_row_locations[start_index], list_row_locations[end_index]
+                    template = list_templates[trial % len(list_templates)]
+                    expected = run_lineitem_algorithms(reference_module, container_instance, template, trial, start_page, start_location, \
+                        end_page, end_location)
+                    found = run_lineitem_algorithms(ObjectLayoutAlgorithms, container_instance, template, trial, start_page, \
+                        start_location, end_page, end_location)
+                    trials += 1
+                    if found != expected:
+                        differences += 1
+                        print("DIFFERENT %s : rows from (%d, %s) to (%d, %s)" % (pdf_file_name, start_page, start_location, end_page, \
+                            end_location))
+            finally:
+                container_instance.close()
+
+    EquivalenceCheck.report(trials, differences)
+
+
+if __name__== "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+"""spatial_index_check.py: Check that the spatial index finds the same text at the bottom of a location, and the same
+candidates to its right in the same order and without the same duplicates, as scanning every row of the page, on random
+pages of textboxes."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import os
+import random
+import sys
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+import EquivalenceCheck
+from LayoutBackend import build_page_objects
+from ObjectLayoutAlgorithms import TextBoxLocation
+from ObjectLayoutContainer import ObjectLayoutContainer
+from SpatialIndex import PageSpatialIndex
+
+# Cells smaller and larger than the textboxes, and one cell for the whole page
+CELL_SIZES = [0.5, 3, 20, 1000]
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type=int, required=False, default=2000)
+    parser.add_argument('--seed', type=int, required=False, default=0)
+    args = parser.parse_args()
+    return args
+
+def get_textbox_at_bottom_by_scan(rows_of_y1_textboxes, textbox_location):
+    """ get_text_at_bottom before the spatial index, returning the textbox rather than its text. """
+
+    for key_y1 in list(reversed(rows_of_y1_textboxes)):
+        if key_y1 < textbox_location.y1:
+            textboxes_at_y1 = rows_of_y1_textboxes[key_y1]
+            for key_x1 in list(textboxes_at_y1):
+                textbox_at_y1_x1 = textboxes_at_y1[key_x1]
+                if textbox_at_y1_x1.x0 < textbox_location.x0:
+                    if textbox_at_y1_x1.x1 > textbox_location.x0:
+                        return textbox_at_y1_x1
+                elif textbox_at_y1_x1.x0 == textbox_location.x0:
+                    return textbox_at_y1_x1
+                elif textbox_at_y1_x1.x0 > textbox_location.x0:
+                    if textbox_at_y1_x1.x0 <= textbox_location.x1:
+                        return textbox_at_y1_x1
+    return None
+
+def copy_textbox(list_of_possible_textboxes, textbox):
+    """ _copy_textbox before the spatial index: the first textbox at the same coordinates is kept. """
+
+    for temp_textbox in list_of_possible_textboxes:
+        if temp_textbox.x1 == textbox.x1 and temp_textbox.x0 == textbox.x0 and \
+           temp_textbox.y1 == textbox.y1 and temp_textbox.y0 == textbox.y0:
+            return
+    list_of_possible_textboxes.append(textbox)
+
+def get_textboxes_to_right_by_scan(rows_of_y0_textboxes, rows_of_y1_textboxes, position, textbox_location):
+    """ The candidates get_text_to_right chose from before the spatial index, in the order it found them. """
+
+    list_of_possible_textboxes = []
+
+    # Rows whose y1 and then rows whose y0 are within the location's y range
+    for keys_y, rows_of_textboxes in [(list(reversed(rows_of_y1_textboxes)), rows_of_y1_textboxes), \
+        (list(rows_of_y0_textboxes), rows_of_y0_textboxes)]:
+        for key_y in keys_y:
+            if key_y >= textbox_location.y0 and key_y <= textbox_location.y1:
+                textboxes_at_y = rows_of_textboxes[key_y]
+                list_textboxes_at_y = list(textboxes_at_y)
+                for (index, key_x) in enumerate(list_textboxes_at_y):
+                    if textboxes_at_y[key_x].x0 >= textbox_location.x1:
+                        if position == 1:
+                            copy_textbox(list_of_possible_textboxes, textboxes_at_y[key_x])
+                        elif position == 2 and index < (len(list_textboxes_at_y)-1):
+                            copy_textbox(list_of_possible_textboxes, textboxes_at_y[list_textboxes_at_y[index+1]])
+
+    # Textboxes taller than the location on both sides
+    for key_y in list(reversed(rows_of_y1_textboxes)):
+        textboxes_at_y = rows_of_y1_textboxes[key_y]
+        list_textboxes_at_y = list(textboxes_at_y)
+        for (index, key_x) in enumerate(list_textboxes_at_y):
+            textbox_at_y_x = textboxes_at_y[key_x]
+            if textbox_at_y_x.x0 >= textbox_location.x1 and textbox_at_y_x.y1 > textbox_location.y1 and \
+               textbox_at_y_x.y0 < textbox_location.y0:
+                if position == 1:
+                    copy_textbox(list_of_possible_textboxes, textbox_at_y_x)
+                elif position == 2 and index < (len(list_textboxes_at_y)-1):
+                    copy_textbox(list_of_possible_textboxes, textboxes_at_y[list_textboxes_at_y[index+1]])
+
+    return list_of_possible_textboxes
+
+def describe(list_textboxes):
+    return [(textbox.x0, textbox.y0, textbox.x1, textbox.y1, textbox.text) for textbox in list_textboxes if textbox is not None]
+
+def main():
+
+    args = parse_arguments()
+    container_instance = ObjectLayoutContainer()
+
+    trials = 0
+    differences = 0
+    for trial in range(args.trials):
+        random_generator = random.Random(args.seed + trial)
+        # Few distinct coordinates, so that textboxes share rows, x0 and x1, touch, overlap and sit at the same place
+        get_coordinate = lambda: random_generator.choice([random_generator.randint(0, 60), round(random_generator.uniform(0, 60), 2)])
+
+        list_textboxes = []
+        for number in range(random_generator.randint(0, 40)):
+            x0 = get_coordinate()
+            y0 = get_coordinate()
+            # Now and then inverted or empty along an axis
+            x1 = x0 + random_generator.choice([random_generator.randint(0, 20), -random_generator.randint(0, 5)])
+            y1 = y0 + random_generator.choice([random_generator.randint(0, 10), random_generator.randint(20, 60), -random_generator.randint(0, 5)])
+            list_textboxes.append((x0, y0, x1, y1, "text %d" % number))
+        textboxes, rows_of_horizontal_lines, rows_of_vertical_lines = build_page_objects(list_textboxes, [], [])
+        page = container_instance._build_page(textboxes, rows_of_horizontal_lines, rows_of_vertical_lines)
+        spatial_index = PageSpatialIndex(page.rows_of_y0_textboxes, page.rows_of_y1_textboxes, random_generator.choice(CELL_SIZES))
+
+        trials += 1
+        trial_differences = 0
+        for _ in range(40):
+            # Mostly where a textbox is, as the keyword of a field is
+            if len(textboxes) > 0 and random_generator.random() < 0.6:
+                textbox = random_generator.choice(textboxes)
+                textbox_location = TextBoxLocation(0, textbox.x0, textbox.y0, textbox.x1, textbox.y1)
+            else:
+                x0 = get_coordinate()
+                y0 = get_coordinate()
+                textbox_location = TextBoxLocation(0, x0, y0, x0 + random_generator.randint(-5, 20), y0 + random_generator.randint(-5, 20))
+
+            if describe([spatial_index.get_textbox_at_bottom(textbox_location)]) != \
+                describe([get_textbox_at_bottom_by_scan(page.rows_of_y1_textboxes, textbox_location)]):
+                trial_differences += 1
+            for position in [1, 2]:
+                if describe(spatial_index.get_textboxes_to_right(position, textbox_location)) != describe( \
+                    get_textboxes_to_right_by_scan(page.rows_of_y0_textboxes, page.rows_of_y1_textboxes, position, textbox_location)):
+                    trial_differences += 1
+        if trial_differences > 0:
+            differences += 1
+            print("DIFFERENT trial %d" % trial)
+
+    EquivalenceCheck.report(trials, differences)
+
+
+if __name__== "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+"""table_grid_check.py: Check that the grid of ruling lines places texts between the same vertical lines, and finds the same
+row separators, as comparing them with every line of the page, on random pages of lines."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import argparse
+import os
+import random
+import sys
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FOLDER = os.path.join(BENCHMARK_FOLDER, "..", "src")
+
+# The application reads its configuration and schema relative to the src folder
+sys.path.insert(0, SOURCE_FOLDER)
+os.chdir(SOURCE_FOLDER)
+
+import EquivalenceCheck
+from LayoutBackend import TextBox, build_page_objects
+from TableGrid import PageTableGrid
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type=int, required=False, default=3000)
+    parser.add_argument('--seed', type=int, required=False, default=0)
+    args = parser.parse_args()
+    return args
+
+def get_column_boundaries_by_scan(rows_of_vertical_lines, textbox):
+    """ The nearest vertical lines left and right of the textbox as get_table_lineitems found them before the grid, -1 for
+    none. """
+
+    nearest_x0 = -1
+    nearest_x1 = -1
+    for key_x, vertical_lines_at_x in rows_of_vertical_lines.items():
+        for vertical_line in vertical_lines_at_x.values():
+            if vertical_line.y0 <= textbox.y0 and (vertical_line.y1 >= textbox.y1 or \
+               (vertical_line.y1 >= textbox.y0 and vertical_line.y1 <= textbox.y1)):
+                if key_x <= textbox.x0 and (nearest_x0 == -1 or key_x > nearest_x0):
+                    nearest_x0 = key_x
+                if nearest_x1 == -1:
+                    if key_x > textbox.x1:
+                        nearest_x1 = key_x
+                elif key_x <= textbox.x1 and key_x > nearest_x1:
+                    nearest_x1 = key_x
+    return nearest_x0, nearest_x1
+
+def main():
+
+    args = parse_arguments()
+
+    trials = 0
+    differences = 0
+    for trial in range(args.trials):
+        random_generator = random.Random(args.seed + trial)
+        # Few distinct coordinates, so that lines share x and y, touch and overlap
+        get_coordinate = lambda: random_generator.choice([random_generator.randint(0, 60), round(random_generator.uniform(0, 60), 2)])
+
+        list_vertical_lines = []
+        for _ in range(random_generator.randint(0, 25)):
+            y0 = get_coordinate()
+            list_vertical_lines.append((get_coordinate(), y0, y0 + random_generator.choice([0, random_generator.randint(0, 30)]), "RECT"))
+        list_horizontal_lines = [(get_coordinate(), 0, 10) for _ in range(random_generator.randint(0, 8))]
+        _, rows_of_horizontal_lines, rows_of_vertical_lines = build_page_objects([], list_horizontal_lines, list_vertical_lines)
+        table_grid = PageTableGrid(rows_of_horizontal_lines, rows_of_vertical_lines)
+
+        trials += 1
+        trial_differences = 0
+        for _ in range(40):
+            x0 = get_coordinate()
+            y0 = get_coordinate()
+            textbox = TextBox(x0, y0, x0 + random_generator.randint(0, 20), y0 + random_generator.randint(0, 10), "text")
+            if table_grid.get_column_boundaries(textbox) != get_column_boundaries_by_scan(rows_of_vertical_lines, textbox):
+                trial_differences += 1
+            y_bottom = get_coordinate()
+            y_top = y_bottom + random_generator.randint(0, 20)
+            has_row_separator = any(y >= y_bottom and y <= y_top for y in rows_of_horizontal_lines)
+            if table_grid.has_row_separator(y_bottom, y_top) != has_row_separator:
+                trial_differences += 1
+        if trial_differences > 0:
+            differences += 1
+            print("DIFFERENT trial %d" % trial)
+
+    EquivalenceCheck.report(trials, differences)
+
+
+if __name__== "__main__":
+    main()
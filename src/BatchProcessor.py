@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+
+"""BatchProcessor.py: Extract many pdfs using a pool of worker processes."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import glob
+import multiprocessing
+import multiprocessing.pool
+import os
+import time
+
+from Logger import Logger
+from ConfigManager import ConfigManager
+from Orchestrator import Orchestrator
+from LayoutCache import LayoutCache
+from PluginManager import PluginManager
+from TemplateRegistry import TemplateRegistry
+import OutputSink
+import ExtractionMetrics
+import Profiler
+
+BATCH_PROFILE_NAME = "batch-aggregate"
+
+def collect_pdf_files(batch_information):
+
+    list_pdf_files = []
+
+    # A folder, recursively pick all the pdf files
+    if os.path.isdir(batch_information):
+        for root, directories, filenames in os.walk(batch_information):
+            directories.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(".pdf"):
+                    list_pdf_files.append(os.path.join(root, filename))
+    # A manifest, one pdf per line. Relative names are relative to the manifest.
+    elif os.path.isfile(batch_information) and batch_information.lower().endswith(".pdf") == False:
+        manifest_folder = os.path.dirname(batch_information)
+        with open(batch_information, "r") as read_file:
+            for line in read_file:
+                pdf_file_name = line.strip()
+                if len(pdf_file_name) == 0 or pdf_file_name.startswith("#"):
+                    continue
+                list_pdf_files.append(os.path.join(manifest_folder, pdf_file_name))
+    # A glob pattern (a single pdf is a pattern matching itself)
+    else:
+        list_pdf_files = sorted(glob.glob(batch_information, recursive=True))
+
+    return list_pdf_files
+
+def get_output_names(list_pdf_files):
+
+    logger = Logger.getLogger()
+
+    list_output_names = []
+    dict_used_names = {}
+
+    for pdf_file_name in list_pdf_files:
+        base_name = os.path.splitext(os.path.basename(pdf_file_name))[0]
+        count = dict_used_names.get(base_name, 0)
+        dict_used_names[base_name] = count + 1
+        if count > 0:
+            logger.warning("WARNING! Duplicate file name %s, writing output as %s-%d", base_name, base_name, count)
+            base_name = base_name + "-" + str(count)
+        list_output_names.append(base_name)
+
+    return list_output_names
+
+def get_worker_count(workers):
+
+    if workers is None:
+        configMgr = ConfigManager.getInstance()
+        workers = int(configMgr.get("batch", "workers", 0))
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    return workers
+
+def initialize_worker(template_information, use_layout_cache = True):
+
+    # Everything that does not depend on the document is set up once per worker and kept warm
+    Logger.getLogger()
+    LayoutCache.getInstance().set_enabled(use_layout_cache)
+    Orchestrator.getInstance()
+    PluginManager.getInstance().preload_plugins()
+    registry = TemplateRegistry.getInstance()
+    # For a folder only the keyword index, the template picked for a document is compiled when first needed
+    if os.path.isdir(template_information):
+        registry.get_keyword_index(template_information)
+    else:
+        registry.get_template(template_information)
+
+def extract_one(job):
+
+    # The extracted data goes back to the caller, which hands it to the output sink
+    template_information, pdf_file_with_path, output_name, profile_folder = job
+
+    start_time = time.time()
+    error_description = None
+    extracted_data = None
+    metrics = ExtractionMetrics.ExtractionMetrics()
+    try:
+        if profile_folder is not None:
+            pstats_file_name = os.path.join(profile_folder, output_name + Profiler.PROFILE_FILE_EXTENSION)
+            extracted_data = Profiler.profile_call(pstats_file_name, Orchestrator.getInstance().go, None, template_information, \
+                pdf_file_with_path, None, metrics)
+        else:
+            extracted_data = Orchestrator.getInstance().go(None, template_information, pdf_file_with_path, None, metrics)
+        if extracted_data is None:
+            error_description = "Nothing extracted"
+    except Exception as ex:
+        Logger.getLogger().exception("ERROR!! Failed to extract " + pdf_file_with_path)
+        error_description = type(ex).__name__ + ": " + str(ex)
+
+    return pdf_file_with_path, output_name, error_description, time.time() - start_time, extracted_data, metrics.to_dict()
+
+def run_batch(template_information, batch_information, output, workers = None, use_layout_cache = True, sink_type = None, \
+    metrics_file_name = None, profile_folder = None, collapsed_stacks = False):
+
+    logger = Logger.getLogger()
+    configMgr = ConfigManager.getInstance()
+
+    list_pdf_files = collect_pdf_files(batch_information)
+    if len(list_pdf_files) == 0:
+        raise Exception("Error! No pdf files found for " + batch_information)
+
+    list_output_names = get_output_names(list_pdf_files)
+    list_jobs = [(template_information, pdf_file, output_name, profile_folder) for pdf_file, output_name in zip(list_pdf_files, list_output_names)]
+    if profile_folder is not None:
+        os.makedirs(profile_folder, exist_ok=True)
+
+    workers = min(get_worker_count(workers), len(list_jobs))
+    chunksize = int(configMgr.get("batch", "chunksize", 1))
+    maxtasksperchild = int(configMgr.get("batch", "maxtasksperchild", 0))
+    if maxtasksperchild <= 0:
+        maxtasksperchild = None
+    executor = configMgr.get("batch", "executor", "process")
+    # cProfile profiles one thread at a time
+    if profile_folder is not None and executor == "thread":
+        logger.warning("WARNING! Profiling a batch using process workers instead of threads")
+        executor = "process"
+
+    logger.info("Batch of %d pdf files using %d %s workers", len(list_jobs), workers, executor)
+
+    start_time = time.time()
+    list_results = []
+    sink = OutputSink.create_sink(sink_type, output)
+    batch_metrics = ExtractionMetrics.BatchMetrics()
+    # Documents are serialized by the sink, in this process
+    sink_metrics = ExtractionMetrics.ExtractionMetrics()
+
+    def collect(results):
+        for pdf_file, output_name, error_description, document_time, extracted_data, document_metrics in results:
+            if error_description is None:
+                with sink_metrics.stage("serialization"):
+                    sink.write(output_name, pdf_file, extracted_data)
+            list_results.append((pdf_file, error_description, document_time))
+            batch_metrics.add(document_metrics, error_description is None)
+
+    try:
+        if workers == 1:
+            initialize_worker(template_information, use_layout_cache)
+            collect(extract_one(job) for job in list_jobs)
+        elif executor == "thread":
+            # Every document has its own ExtractionContext, so threads of one process can extract side by side
+            with multiprocessing.pool.ThreadPool(processes=workers, initializer=initialize_worker, initargs=(template_information, use_layout_cache)) as pool:
+                collect(pool.imap_unordered(extract_one, list_jobs, chunksize))
+        else:
+            with multiprocessing.Pool(processes=workers, initializer=initialize_worker, initargs=(template_information, use_layout_cache), maxtasksperchild=maxtasksperchild) as pool:
+                collect(pool.imap_unordered(extract_one, list_jobs, chunksize))
+    finally:
+        with sink_metrics.stage("serialization"):
+            sink.close()
+
+    summary = summarize_batch(list_results, time.time() - start_time)
+
+    if metrics_file_name is not None:
+        batch_metrics.merge(sink_metrics.to_dict())
+        batch_metrics.elapsed_seconds = summary["elapsed_seconds"]
+        batch_metrics.write(metrics_file_name)
+        logger.info("Batch metrics written to %s", metrics_file_name)
+
+    if profile_folder is not None:
+        report_batch_profile(list_output_names, profile_folder, collapsed_stacks)
+
+    return summary
+
+def report_batch_profile(list_output_names, profile_folder, collapsed_stacks):
+
+    # The profiles of all the documents merged into one
+    logger = Logger.getLogger()
+    stats = Profiler.merge_profiles([os.path.join(profile_folder, output_name + Profiler.PROFILE_FILE_EXTENSION) \
+        for output_name in list_output_names])
+    if stats is None:
+        logger.error("ERROR!! No profiles found in " + profile_folder)
+        return
+
+    aggregate_file_name = os.path.join(profile_folder, BATCH_PROFILE_NAME + Profiler.PROFILE_FILE_EXTENSION)
+    stats.dump_stats(aggregate_file_name)
+    logger.info("Aggregate profile written to %s", aggregate_file_name)
+    Profiler.report_profile(stats, BATCH_PROFILE_NAME, profile_folder, collapsed_stacks)
+
+def summarize_batch(list_results, elapsed_time):
+
+    logger = Logger.getLogger()
+
+    list_failures = [(pdf_file, error_description) for pdf_file, error_description, _ in list_results if error_description is not None]
+    total_document_time = sum(document_time for _, _, document_time in list_results)
+
+    summary = {}
+    summary["documents"] = len(list_results)
+    summary["succeeded"] = len(list_results) - len(list_failures)
+    summary["failed"] = len(list_failures)
+    summary["elapsed_seconds"] = elapsed_time
+    summary["documents_per_second"] = len(list_results) / elapsed_time if elapsed_time > 0 else 0.0
+    summary["average_document_seconds"] = total_document_time / len(list_results) if len(list_results) > 0 else 0.0
+    summary["failures"] = list_failures
+
+    for pdf_file, error_description in list_failures:
+        logger.error("FAILED %s : %s", pdf_file, error_description)
+
+    logger.info("Batch summary : Documents = %d, Succeeded = %d, Failed = %d", summary["documents"], summary["succeeded"], summary["failed"])
+    logger.info("Batch throughput : Elapsed = %.2fs, %.2f documents/s, %.3fs per document", summary["elapsed_seconds"], \
+        summary["documents_per_second"], summary["average_document_seconds"])
+
+    return summary
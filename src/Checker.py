@@ -6,33 +6,25 @@ __author__      = "Balaji Sundaresan"
 __copyright__   = "Copyright 2019-20, mAnava"
 __version__     = "0.0.2"
 
-import json
-import re
-
 from Logger import Logger
 from ConfigManager import ConfigManager
-from PluginManager import PluginManager
 
-def check_total(plugin_manager, template_file_name, dict_of_field_values, dict_of_line_items):
+def check_total(context, dict_of_field_values, dict_of_line_items):
 
     logger = Logger.getLogger()
-    logger.debug(' ==> check_total(%s,%d,%d)', template_file_name, len(dict_of_field_values), len(dict_of_line_items) )
+    template = context.template
+    plugin = context.plugin
+    logger.debug(' ==> check_total(%s,%d,%d)', template.file_name, len(dict_of_field_values), len(dict_of_line_items) )
 
     check_status = {}
     match_status = {}
 
-    # Load the template file for accessing check information
-    with open(template_file_name, "r") as read_file:
-        json_template = json.load(read_file)            
-
     # Only if these is check information, extract field and lineitem column names
-    if json_template.get("check") is not None :
-        field = json_template["check"]["field"]
-        lineitem = json_template["check"]["lineitem"]
-        field_name = field["name"]
-        lineitem_name = lineitem["name"]
-        field_regex_pattern = field.get("regex")
-        lineitem_regex_pattern = lineitem.get("regex")
+    if template.check is not None :
+        field_name = template.check.field_name
+        lineitem_name = template.check.lineitem_name
+        field_regex_pattern = template.check.field_regex
+        lineitem_regex_pattern = template.check.lineitem_regex
 
         try:
             # Get the field value, if regex extract the numeric value else take value as is.
@@ -43,7 +35,8 @@ def check_total(plugin_manager, template_file_name, dict_of_field_values, dict_o
                 logger.debug('check_total(%s) ==>', str(match_status))
                 return check_status
             if field_regex_pattern is not None:
-                regex_search = re.search(field_regex_pattern, field_value) 
+                context.metrics.count("regex_evaluations")
+                regex_search = field_regex_pattern.search(field_value) 
                 if regex_search is not None:
                     column_value = regex_search.group("Total")
                     float_field_value = float(column_value.replace(',', ''))
@@ -52,8 +45,8 @@ def check_total(plugin_manager, template_file_name, dict_of_field_values, dict_o
                     check_status["match_status"] = match_status
                     logger.debug('check_total(%s) ==>', str(match_status))
                     return check_status
-            elif plugin_manager is not None:
-                float_field_value = float(plugin_manager.get("check", "field", field_value))
+            elif plugin is not None:
+                float_field_value = float(plugin.get("check", "field", field_value))
             else:
                 float_field_value = float(field_value.replace(',', ''))
 
@@ -63,7 +56,8 @@ def check_total(plugin_manager, template_file_name, dict_of_field_values, dict_o
                 lineitem_value = lineitem.get(lineitem_name)
                 if lineitem_value is not None:
                     if lineitem_regex_pattern is not None:
-                        regex_search = re.search(lineitem_regex_pattern, lineitem_value) 
+                        context.metrics.count("regex_evaluations")
+                        regex_search = lineitem_regex_pattern.search(lineitem_value) 
                         if regex_search is not None:
                             column_value = regex_search.group("Total")
                             float_lineitem_value = float(column_value.replace(',', ''))
@@ -72,8 +66,8 @@ def check_total(plugin_manager, template_file_name, dict_of_field_values, dict_o
                             check_status["match_status"] = match_status
                             logger.debug('check_total(%s) ==>', str(match_status))
                             return check_status
-                    elif plugin_manager is not None:
-                        float_lineitem_value = float(plugin_manager.get("check", "lineitem", str(lineitem_value)))
+                    elif plugin is not None:
+                        float_lineitem_value = float(plugin.get("check", "lineitem", str(lineitem_value)))
                     else:
                         float_lineitem_value = float(lineitem_value.replace(',', ''))  
                                          
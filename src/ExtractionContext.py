@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+"""ExtractionContext.py: Everything about one document as it goes through the extraction pipeline."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+from ObjectLayoutContainer import ObjectLayoutContainer
+from ObjectLayoutAlgorithms import ObjectLayoutAlgorithms
+from ExtractionMetrics import ExtractionMetrics
+
+class ExtractionContext:
+  """ The parsed layout, the template, the plugin and the metrics of one document. Contexts share nothing, so any number of
+  documents can be extracted in one process, also from several threads at once. """
+  def __init__(self, pdf_file_with_path, template_information, metrics = None):
+    self.pdf_file_with_path = pdf_file_with_path
+    self.template_information = template_information
+    # Stage times and hot path counts, ExtractionMetrics
+    self.metrics = metrics if metrics is not None else ExtractionMetrics()
+    self.container = ObjectLayoutContainer()
+    self.algorithms = ObjectLayoutAlgorithms(self.container, self.metrics)
+    # Set once the template is picked, CompiledTemplate
+    self.template = None
+    # Templates ranked by the keywords found, TemplateCandidate, and whether more than one has all its keywords. Set
+    # when the template is picked from a folder.
+    self.template_candidates = None
+    self.template_ambiguous = False
+    # Set once the template's plugin is loaded, Plugin or None
+    self.plugin = None
+
+  def close(self):
+    self.container.close()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+"""ExtractionMetrics.py: Wall and CPU time per pipeline stage and counts of hot path events, per document and per batch."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import collections
+import contextlib
+import io
+import json
+import time
+
+# Stages of Orchestrator.go, in order
+STAGES = ["parse_pdf", "get_template", "extract_fields", "extract_line_items", "check_total", "post_processor", "serialization"]
+# Hot path events counted while extracting
+COUNTERS = ["pages_parsed", "textboxes_scanned", "regex_evaluations", "vertical_line_comparisons", "deepcopies"]
+
+class ExtractionMetrics:
+  """ Metrics of one document. Owned by its ExtractionContext, so there is nothing to lock. """
+  def __init__(self):
+    # Stage name : [wall seconds, cpu seconds]
+    self.stages = collections.OrderedDict()
+    self.counters = collections.Counter()
+
+  @contextlib.contextmanager
+  def stage(self, name):
+    # Thread CPU time, workers may be threads of one process
+    start_wall_time = time.perf_counter()
+    start_cpu_time = time.thread_time()
+    try:
+      yield
+    finally:
+      stage_times = self.stages.setdefault(name, [0.0, 0.0])
+      stage_times[0] += time.perf_counter() - start_wall_time
+      stage_times[1] += time.thread_time() - start_cpu_time
+
+  def count(self, name, value = 1):
+    self.counters[name] += value
+
+  def to_dict(self):
+    metrics = {}
+    metrics["stages"] = collections.OrderedDict((name, {"wall_seconds": wall_time, "cpu_seconds": cpu_time}) \
+      for name, (wall_time, cpu_time) in self.stages.items())
+    metrics["counters"] = collections.OrderedDict((name, self.counters[name]) for name in COUNTERS)
+    return metrics
+
+class BatchMetrics:
+  """ Sum of the metrics (ExtractionMetrics.to_dict) of the documents of a batch. """
+  def __init__(self):
+    self.documents = 0
+    self.failed = 0
+    self.elapsed_seconds = 0.0
+    self.stages = collections.OrderedDict((name, [0.0, 0.0]) for name in STAGES)
+    self.counters = collections.OrderedDict((name, 0) for name in COUNTERS)
+
+  def add(self, document_metrics, succeeded):
+    self.documents += 1
+    if succeeded == False:
+      self.failed += 1
+    if document_metrics is not None:
+      self.merge(document_metrics)
+
+  def merge(self, metrics):
+    """ Adds the stage times and counters, without counting a document. E.g. the time spent writing to the sink. """
+    for name, stage_times in metrics["stages"].items():
+      totals = self.stages.setdefault(name, [0.0, 0.0])
+      totals[0] += stage_times["wall_seconds"]
+      totals[1] += stage_times["cpu_seconds"]
+    for name, value in metrics["counters"].items():
+      self.counters[name] = self.counters.get(name, 0) + value
+
+  def write(self, metrics_file_name):
+    """ json for a .json file, Prometheus text exposition format otherwise. """
+    if metrics_file_name.lower().endswith(".json"):
+      content = json.dumps(self.to_dict(), indent = 4)
+    else:
+      content = self.to_prometheus()
+    with io.open(metrics_file_name, 'w', encoding='utf-8') as f:
+      f.write(content)
+
+  def to_dict(self):
+    metrics = {}
+    metrics["documents"] = self.documents
+    metrics["failed"] = self.failed
+    metrics["elapsed_seconds"] = self.elapsed_seconds
+    metrics["stages"] = collections.OrderedDict((name, {"wall_seconds": wall_time, "cpu_seconds": cpu_time}) \
+      for name, (wall_time, cpu_time) in self.stages.items())
+    metrics["counters"] = self.counters
+    return metrics
+
+  def to_prometheus(self):
+    list_lines = []
+    list_lines.append("# HELP invoice_extractor_documents_total Documents extracted, by result.")
+    list_lines.append("# TYPE invoice_extractor_documents_total counter")
+    list_lines.append('invoice_extractor_documents_total{result="succeeded"} %d' % (self.documents - self.failed))
+    list_lines.append('invoice_extractor_documents_total{result="failed"} %d' % self.failed)
+    list_lines.append("# HELP invoice_extractor_batch_elapsed_seconds Wall time of the batch.")
+    list_lines.append("# TYPE invoice_extractor_batch_elapsed_seconds gauge")
+    list_lines.append("invoice_extractor_batch_elapsed_seconds %.6f" % self.elapsed_seconds)
+    for metric_name, index, description in [("wall", 0, "Wall"), ("cpu", 1, "CPU")]:
+      list_lines.append("# HELP invoice_extractor_stage_%s_seconds_total %s time spent in each pipeline stage." % (metric_name, description))
+      list_lines.append("# TYPE invoice_extractor_stage_%s_seconds_total counter" % metric_name)
+      for name, stage_times in self.stages.items():
+        list_lines.append('invoice_extractor_stage_%s_seconds_total{stage="%s"} %.6f' % (metric_name, name, stage_times[index]))
+    list_lines.append("# HELP invoice_extractor_events_total Hot path events while extracting.")
+    list_lines.append("# TYPE invoice_extractor_events_total counter")
+    for name, value in self.counters.items():
+      list_lines.append('invoice_extractor_events_total{event="%s"} %d' % (name, value))
+    return "\n".join(list_lines) + "\n"
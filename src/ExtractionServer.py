@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+"""ExtractionServer.py: Resident extraction service over a local HTTP port or a Unix socket, backed by warm workers."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import json
+import multiprocessing
+import os
+import socketserver
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from Logger import Logger
+from ConfigManager import ConfigManager
+from Orchestrator import Orchestrator
+import BatchProcessor
+
+def extract_document(job):
+
+    # Runs in a warm worker. A pdf sent as bytes is written to a temporary file for pdfminer.
+    template_information, pdf_file_with_path, pdf_bytes = job
+
+    temp_file_name = None
+    try:
+        if pdf_bytes is not None:
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+                temp_file.write(pdf_bytes)
+                temp_file_name = temp_file.name
+            pdf_file_with_path = temp_file_name
+        extracted_data = Orchestrator.getInstance().go(None, template_information, pdf_file_with_path, None)
+        if extracted_data is None:
+            return None, "Nothing extracted"
+        return extracted_data, None
+    except Exception as ex:
+        Logger.getLogger().exception("ERROR!! Failed to extract " + str(pdf_file_with_path))
+        return None, type(ex).__name__ + ": " + str(ex)
+    finally:
+        if temp_file_name is not None:
+            os.remove(temp_file_name)
+
+class ExtractionRequestHandler(BaseHTTPRequestHandler):
+
+    # Set on the server class before it starts
+    template_information = None
+    pool = None
+    workers = 0
+    max_request_size = 0
+
+    def do_GET(self):
+
+        if self.path != "/health":
+            self._send_json(404, {"error": "Unknown path " + self.path})
+            return
+
+        self._send_json(200, {"status": "ok", "workers": self.workers})
+
+    def do_POST(self):
+
+        if self.path != "/extract":
+            self._send_json(404, {"error": "Unknown path " + self.path})
+            return
+
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self._send_json(400, {"error": "Invalid Content-Length"})
+            return
+        if content_length <= 0:
+            self._send_json(400, {"error": "Empty request"})
+            return
+        if content_length > self.max_request_size:
+            self._send_json(413, {"error": "Request larger than " + str(self.max_request_size) + " bytes"})
+            return
+        body = self.rfile.read(content_length)
+
+        # Either the pdf itself, or json naming a pdf readable by the server : {"path": "..."}
+        pdf_file_with_path = None
+        pdf_bytes = None
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                pdf_file_with_path = json.loads(body.decode("utf-8"))["path"]
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": "Expected {\"path\": <pdf file>}"})
+                return
+            if os.path.isfile(pdf_file_with_path) == False:
+                self._send_json(404, {"error": "No such file " + pdf_file_with_path})
+                return
+        else:
+            pdf_bytes = body
+
+        start_time = time.time()
+        extracted_data, error_description = self.pool.apply(extract_document, ((self.template_information, pdf_file_with_path, pdf_bytes),))
+        Logger.getLogger().info("Served extraction in %.3fs", time.time() - start_time)
+
+        if error_description is not None:
+            status = 422 if error_description == "Nothing extracted" else 500
+            self._send_json(status, {"error": error_description})
+            return
+
+        self._send_json(200, extracted_data)
+
+    def _send_json(self, status, data):
+
+        response = json.dumps(data, ensure_ascii=False, indent = 4).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def address_string(self):
+        # Clients of a Unix socket have no address
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return "unix"
+
+    def log_message(self, format, *args):
+        Logger.getLogger().debug("%s %s", self.address_string(), format % args)
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve(template_information, port = None, socket_file_name = None, workers = None, use_layout_cache = True):
+
+    logger = Logger.getLogger()
+    configMgr = ConfigManager.getInstance()
+
+    if workers is None:
+        workers = int(configMgr.get("server", "workers", 0))
+    workers = BatchProcessor.get_worker_count(workers)
+
+    # Warm up the parent too, so that a broken template or schema fails here rather than on the first request
+    BatchProcessor.initialize_worker(template_information, use_layout_cache)
+
+    ExtractionRequestHandler.template_information = template_information
+    ExtractionRequestHandler.workers = workers
+    ExtractionRequestHandler.max_request_size = int(float(configMgr.get("server", "max_request_mb", 50)) * 1024 * 1024)
+
+    with multiprocessing.Pool(processes=workers, initializer=BatchProcessor.initialize_worker, initargs=(template_information, use_layout_cache)) as pool:
+        ExtractionRequestHandler.pool = pool
+
+        if socket_file_name is not None:
+            if os.path.exists(socket_file_name):
+                os.remove(socket_file_name)
+            server = ThreadingUnixHTTPServer(socket_file_name, ExtractionRequestHandler)
+            logger.info("Serving extraction on unix socket %s using %d workers", socket_file_name, workers)
+        else:
+            host = configMgr.get("server", "host", "127.0.0.1")
+            if port is None:
+                port = int(configMgr.get("server", "port", 8765))
+            server = ThreadingHTTPServer((host, port), ExtractionRequestHandler)
+            logger.info("Serving extraction on http://%s:%d using %d workers", host, server.server_address[1], workers)
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Stopping extraction server")
+        finally:
+            server.server_close()
+            if socket_file_name is not None and os.path.exists(socket_file_name):
+                os.remove(socket_file_name)
@@ -6,66 +6,71 @@ __author__      = "Balaji Sundaresan"
 __copyright__   = "Copyright 2019-20, mAnava"
 __version__     = "0.0.2"
 
-import json
-
 from Logger import Logger
 import collections
-from ObjectLayoutAlgorithms import ObjectLayoutAlgorithms
 
-def extract_fields(template_file_name):
+# The textbox next to the identifier holding a field's value, by field location
+FIELD_NEIGHBOURS = {
+    "right": "right",
+    "second-right": "second-right",
+    "bottom": "bottom",
+    "regex-right": "right",
+    "regex-second-right": "second-right",
+    "regex-bottom": "bottom"
+}
+
+def extract_fields(context):
 
     logger = Logger.getLogger()
-    objectlayoutalgo_instance = ObjectLayoutAlgorithms.getInstance()
+    objectlayoutalgo_instance = context.algorithms
     dict_of_field_values = collections.OrderedDict()
+    field_plan = context.template.field_plan
 
-    with open(template_file_name, "r") as read_file:
-        json_template = json.load(read_file)            
-
-        configured_field_count = 0
-        for field in json_template['fields']:
-            logger.debug("Searching for %s", field['name'])
-
-            if field['location'] == 'regex':
-                list_keyword_locations, list_regex_values = objectlayoutalgo_instance.search_regex(field['identifier'])    
-                if len(list_regex_values) > 0:
-                    counter = 0
-                    while counter < len(list_regex_values):
-                        text = list_regex_values[counter]
-                        if text != None and len(text) > 0:
-                            try:
-                                ordinal = field['ordinal']
-                                if int(ordinal) == (counter+1):
-                                    dict_of_field_values[field['name']] = text
-                            except KeyError:
-                                dict_of_field_values[field['name']] = text
-                        counter += 1 
-            else:
-                list_keyword_locations = []
-                list_regex_values = []
-                if field['location'] == 'regex' or field['location'].startswith('regex'):
-                    list_keyword_locations, list_regex_values = objectlayoutalgo_instance.search_regex(field['identifier'])    
-                else:
-                    list_keyword_locations = objectlayoutalgo_instance.search_keyword(field['identifier'])
-
-                if len(list_keyword_locations) > 0:
-                    counter = 0
-                    while counter < len(list_keyword_locations):
-                        keyword_location = list_keyword_locations[counter]
-                        ordinal = field.get('ordinal')
-                        if ordinal == None or int(ordinal) == (counter+1):
-                            if field['location'] == 'bottom' or field['location'] == 'regex-bottom':
-                                text = objectlayoutalgo_instance.get_text_at_bottom(keyword_location)
-                            elif field['location'] == 'right' or field['location'] == 'regex-right':
-                                text = objectlayoutalgo_instance.get_text_to_right(1, keyword_location)
-                            elif field['location'] == 'second-right' or field['location'] == 'regex-second-right':
-                                text = objectlayoutalgo_instance.get_text_to_right(2, keyword_location)
-                            if text != None and len(text) > 0:
-                                dict_of_field_values[field['name']] = text
-                        counter += 1
-
-            configured_field_count += 1
+    # The labels and regexes of all the fields, searched for in one go
+    dict_label_locations, list_regex_matches = objectlayoutalgo_instance.search_fields(field_plan)
 
-    logger.info("Total fields : Configured = %d, Extracted = %d", configured_field_count, len(dict_of_field_values))
-    return dict_of_field_values
+    # Per field, its regex values or where its neighbour queries are among those of all the fields
+    list_field_matches = []
+    list_neighbour_queries = []
+    for field, (search_type, search_key) in zip(context.template.fields, field_plan.field_searches):
+        logger.debug("Searching for %s", field.name)
+
+        if search_type == "regex":
+            list_keyword_locations, list_regex_values = list_regex_matches[search_key]
+        else:
+            list_keyword_locations = dict_label_locations[search_key]
+
+        if field.location == 'regex':
+            list_field_matches.append(list_regex_values)
+            continue
+
+        # Only the location of the given ordinal, all of them otherwise
+        if field.ordinal != None:
+            list_keyword_locations = list_keyword_locations[field.ordinal-1:field.ordinal]
+        neighbour = FIELD_NEIGHBOURS[field.location]
+        start = len(list_neighbour_queries)
+        list_neighbour_queries.extend((neighbour, keyword_location) for keyword_location in list_keyword_locations)
+        list_field_matches.append((start, len(list_neighbour_queries)))
 
+    list_neighbour_texts = objectlayoutalgo_instance.get_neighbour_texts(list_neighbour_queries)
 
+    # In the order of the fields, the last value found for a field wins
+    configured_field_count = 0
+    for field, field_matches in zip(context.template.fields, list_field_matches):
+
+        if field.location == 'regex':
+            list_texts = field_matches
+            if field.ordinal != None:
+                list_texts = list_texts[field.ordinal-1:field.ordinal]
+        else:
+            start, end = field_matches
+            list_texts = list_neighbour_texts[start:end]
+
+        for text in list_texts:
+            if text != None and len(text) > 0:
+                dict_of_field_values[field.name] = text
+
+        configured_field_count += 1
+
+    logger.info("Total fields : Configured = %d, Extracted = %d", configured_field_count, len(dict_of_field_values))
+    return dict_of_field_values
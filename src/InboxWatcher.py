@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+
+"""InboxWatcher.py: Extract pdfs dropped into an inbox folder, with bounded concurrency (asyncio)."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import signal
+import time
+
+from Logger import Logger
+from ConfigManager import ConfigManager
+import BatchProcessor
+import OutputSink
+
+def get_unique_file_name(folder, file_name):
+
+    # Never overwrite, a pdf of the same name may come in again
+    base_name, extension = os.path.splitext(file_name)
+    unique_file_name = os.path.join(folder, file_name)
+    count = 1
+    while os.path.exists(unique_file_name):
+        unique_file_name = os.path.join(folder, base_name + "-" + str(count) + extension)
+        count = count + 1
+    return unique_file_name
+
+def list_ready_pdf_files(inbox_folder, settle_seconds, set_in_flight, set_given_up):
+
+    # Oldest first. A file still being copied in (modified in the last settle_seconds) is left for the next poll. One that
+    # could not be moved out of the inbox after extraction is not taken again.
+    list_ready = []
+    now = time.time()
+    try:
+        list_entries = list(os.scandir(inbox_folder))
+    except OSError:
+        Logger.getLogger().error("ERROR!! Failed to read inbox " + inbox_folder)
+        return list_ready
+
+    for entry in list_entries:
+        if entry.is_file() == False or entry.name.lower().endswith(".pdf") == False or entry.path in set_in_flight or \
+            entry.path in set_given_up:
+            continue
+        try:
+            stat_result = entry.stat()
+        except OSError:
+            continue
+        if now - stat_result.st_mtime >= settle_seconds:
+            list_ready.append((stat_result.st_mtime, entry.path))
+
+    list_ready.sort()
+    return [pdf_file for _, pdf_file in list_ready]
+
+async def poll_inbox(inbox_folder, queue, set_in_flight, set_given_up, stop_event, poll_seconds, settle_seconds, exit_when_empty):
+
+    while stop_event.is_set() == False:
+        list_pdf_files = list_ready_pdf_files(inbox_folder, settle_seconds, set_in_flight, set_given_up)
+        for pdf_file in list_pdf_files:
+            set_in_flight.add(pdf_file)
+            # Blocks while the queue is full, so a burst of files is taken in only as fast as it is extracted
+            await queue.put(pdf_file)
+            if stop_event.is_set() == True:
+                break
+
+        if exit_when_empty == True and len(list_pdf_files) == 0 and len(set_in_flight) == 0:
+            break
+
+        try:
+            await asyncio.wait_for(stop_event.wait(), poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+def get_output_name(sink, base_name, list_pending):
+
+    # Never overwrite the result of an earlier pdf of the same name, written or still buffered in the sink
+    set_pending_names = set(output_name for _, output_name in list_pending)
+    output_name = base_name
+    count = 1
+    while output_name in set_pending_names or (isinstance(sink, OutputSink.JsonDirectorySink) and \
+        os.path.exists(os.path.join(sink.output, output_name + ".json"))):
+        output_name = base_name + "-" + str(count)
+        count = count + 1
+    return output_name
+
+def move_out_of_inbox(pdf_file, folder, set_in_flight, set_given_up):
+
+    # A pdf that can't be moved stays in the inbox, it is not taken again or it would be extracted on every poll
+    try:
+        os.replace(pdf_file, get_unique_file_name(folder, os.path.basename(pdf_file)))
+    except OSError:
+        Logger.getLogger().exception("ERROR!! Failed to move " + pdf_file + " out of the inbox, giving up on it")
+        set_given_up.add(pdf_file)
+    set_in_flight.discard(pdf_file)
+
+def release_pending(sink, list_pending, set_in_flight, set_given_up, dict_write_failures, failed_folder, write_retries):
+
+    # Called on a failed write. The pdfs are taken again at the next poll and their data written again, write_retries times.
+    # Then they go to the failed folder, so that a sink that keeps failing does not keep the inbox from draining.
+    Logger.getLogger().exception("ERROR!! Failed to write to output sink, leaving " + str(len(list_pending)) + " pdfs in the inbox")
+    sink.discard()
+    for pdf_file, _ in list_pending:
+        write_failures = dict_write_failures.get(pdf_file, 0) + 1
+        if write_failures > write_retries:
+            Logger.getLogger().error("FAILED %s : output sink failed %d times", pdf_file, write_failures)
+            dict_write_failures.pop(pdf_file, None)
+            move_out_of_inbox(pdf_file, failed_folder, set_in_flight, set_given_up)
+        else:
+            dict_write_failures[pdf_file] = write_failures
+            set_in_flight.discard(pdf_file)
+    del list_pending[:]
+
+def flush_sink(sink, list_pending, set_in_flight, set_given_up, dict_write_failures, done_folder, failed_folder, write_retries):
+
+    # A pdf leaves the inbox only once its extracted data is out of the sink's buffer
+    try:
+        sink.flush()
+    except Exception:
+        release_pending(sink, list_pending, set_in_flight, set_given_up, dict_write_failures, failed_folder, write_retries)
+        return
+
+    for pdf_file, _ in list_pending:
+        dict_write_failures.pop(pdf_file, None)
+        move_out_of_inbox(pdf_file, done_folder, set_in_flight, set_given_up)
+    del list_pending[:]
+
+class WorkerPool:
+    """ The executor the pdfs are extracted in. Replaced by a new one when it breaks, e.g. when a worker process is killed. """
+
+    def __init__(self, executor_type, workers, template_information, use_layout_cache):
+        self._executor_type = executor_type
+        self._workers = workers
+        self._template_information = template_information
+        self._use_layout_cache = use_layout_cache
+        self.executor = self._create_executor()
+
+    def _create_executor(self):
+        if self._executor_type == "thread":
+            return concurrent.futures.ThreadPoolExecutor(max_workers=self._workers, initializer=BatchProcessor.initialize_worker, \
+                initargs=(self._template_information, self._use_layout_cache))
+        return concurrent.futures.ProcessPoolExecutor(max_workers=self._workers, initializer=BatchProcessor.initialize_worker, \
+            initargs=(self._template_information, self._use_layout_cache))
+
+    def replace(self, executor):
+        # Every extraction submitted to a broken executor fails, the first of them to get here replaces it
+        if executor is self.executor:
+            Logger.getLogger().error("ERROR!! Worker pool is broken, starting a new one")
+            executor.shutdown(wait=False)
+            self.executor = self._create_executor()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+async def extract_from_queue(loop, worker_pool, template_information, queue, set_in_flight, set_given_up, dict_write_failures, sink, \
+    list_pending, done_folder, failed_folder, write_retries):
+
+    logger = Logger.getLogger()
+
+    while True:
+        pdf_file = await queue.get()
+        try:
+            file_name = os.path.basename(pdf_file)
+            executor = worker_pool.executor
+            try:
+                _, _, error_description, document_time, extracted_data, _ = await loop.run_in_executor(executor, \
+                    BatchProcessor.extract_one, (template_information, pdf_file, None, None))
+            except concurrent.futures.BrokenExecutor:
+                worker_pool.replace(executor)
+                raise
+
+            if error_description is None:
+                # E.g. a plugin's output that is not json serializable. Fails this pdf alone, rather than its whole batch
+                # when the sink flushes.
+                json.dumps(extracted_data, ensure_ascii=False)
+                # Extractors share the sink, nothing else runs on the event loop between picking the name and writing
+                output_name = get_output_name(sink, os.path.splitext(file_name)[0], list_pending)
+                list_pending.append((pdf_file, output_name))
+                try:
+                    sink.write(output_name, pdf_file, extracted_data)
+                except Exception:
+                    # The sink failed flushing its full batch by itself
+                    release_pending(sink, list_pending, set_in_flight, set_given_up, dict_write_failures, failed_folder, write_retries)
+                    continue
+                logger.info("Extracted %s in %.3fs as %s", pdf_file, document_time, output_name)
+            else:
+                logger.error("FAILED %s : %s", pdf_file, error_description)
+                move_out_of_inbox(pdf_file, failed_folder, set_in_flight, set_given_up)
+
+            # The sink flushed a full batch by itself, or the inbox is drained and what is buffered should not wait
+            if sink.pending_count == 0 or queue.empty():
+                flush_sink(sink, list_pending, set_in_flight, set_given_up, dict_write_failures, done_folder, failed_folder, \
+                    write_retries)
+        except Exception:
+            # Whatever goes wrong with one pdf, the extractor goes on with the next
+            logger.exception("ERROR!! Failed to extract " + pdf_file)
+            move_out_of_inbox(pdf_file, failed_folder, set_in_flight, set_given_up)
+        finally:
+            queue.task_done()
+
+async def watch(template_information, inbox_folder, output, workers, use_layout_cache, exit_when_empty, sink_type):
+
+    configMgr = ConfigManager.getInstance()
+    poll_seconds = float(configMgr.get("inbox", "poll_seconds", 2))
+    settle_seconds = float(configMgr.get("inbox", "settle_seconds", 1))
+    queue_size = int(configMgr.get("inbox", "queue_size", 0))
+    executor_type = configMgr.get("inbox", "executor", "process")
+    done_folder = os.path.join(inbox_folder, configMgr.get("inbox", "done_folder", "done"))
+    failed_folder = os.path.join(inbox_folder, configMgr.get("inbox", "failed_folder", "failed"))
+    write_retries = int(configMgr.get("inbox", "write_retries", 3))
+
+    if workers is None:
+        workers = int(configMgr.get("inbox", "workers", 0))
+    workers = BatchProcessor.get_worker_count(workers)
+    # By default a couple of files are queued per worker, enough to keep them busy
+    if queue_size <= 0:
+        queue_size = workers * 2
+
+    for folder in [done_folder, failed_folder]:
+        os.makedirs(folder, exist_ok=True)
+    sink = OutputSink.create_sink(sink_type, output)
+
+    loop = asyncio.get_event_loop()
+    stop_event = asyncio.Event()
+    for signal_number in [signal.SIGINT, signal.SIGTERM]:
+        try:
+            loop.add_signal_handler(signal_number, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    worker_pool = WorkerPool(executor_type, workers, template_information, use_layout_cache)
+
+    Logger.getLogger().info("Watching inbox %s using %d %s workers", inbox_folder, workers, executor_type)
+
+    queue = asyncio.Queue(maxsize=queue_size)
+    set_in_flight = set()
+    # Extracted but could not be moved out of the inbox
+    set_given_up = set()
+    # pdf -> # of times its result could not be written to the sink
+    dict_write_failures = {}
+    # Extracted, written to the sink but maybe not flushed yet : (pdf, output name)
+    list_pending = []
+    list_extractors = [loop.create_task(extract_from_queue(loop, worker_pool, template_information, queue, set_in_flight, \
+        set_given_up, dict_write_failures, sink, list_pending, done_folder, failed_folder, write_retries)) for _ in range(workers)]
+
+    try:
+        await poll_inbox(inbox_folder, queue, set_in_flight, set_given_up, stop_event, poll_seconds, settle_seconds, exit_when_empty)
+        # Finish what was taken in
+        await queue.join()
+    finally:
+        for extractor in list_extractors:
+            extractor.cancel()
+        await asyncio.gather(*list_extractors, return_exceptions=True)
+        worker_pool.shutdown()
+        flush_sink(sink, list_pending, set_in_flight, set_given_up, dict_write_failures, done_folder, failed_folder, write_retries)
+        sink.close()
+        Logger.getLogger().info("Stopped watching inbox %s", inbox_folder)
+
+def watch_inbox(template_information, inbox_folder, output, workers = None, use_layout_cache = True, exit_when_empty = False, sink_type = None):
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(watch(template_information, inbox_folder, output, workers, use_layout_cache, exit_when_empty, sink_type))
+    finally:
+        loop.close()
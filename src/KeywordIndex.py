@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+
+"""KeywordIndex.py: Multi keyword search (Aho-Corasick) over the keywords of all the templates."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import os
+import pickle
+import threading
+
+from Logger import Logger
+
+class AhoCorasick:
+
+   def __init__(self, list_keywords):
+
+      # State 0 is the root. Each state has its transitions, failure state and the keywords ending at it.
+      self._goto = [{}]
+      self._fail = [0]
+      self._out = [()]
+      self.keyword_count = len(list_keywords)
+
+      for keyword_id, keyword in enumerate(list_keywords):
+         state = 0
+         for character in keyword:
+            next_state = self._goto[state].get(character)
+            if next_state is None:
+               next_state = len(self._goto)
+               self._goto[state][character] = next_state
+               self._goto.append({})
+               self._fail.append(0)
+               self._out.append(())
+            state = next_state
+         self._out[state] = self._out[state] + (keyword_id,)
+
+      # Breadth first, so that the failure state of a state's parent is always ready
+      list_states = list(self._goto[0].values())
+      while len(list_states) > 0:
+         list_next_states = []
+         for state in list_states:
+            for character, next_state in self._goto[state].items():
+               fail_state = self._fail[state]
+               while fail_state != 0 and character not in self._goto[fail_state]:
+                  fail_state = self._fail[fail_state]
+               if character in self._goto[fail_state]:
+                  fail_state = self._goto[fail_state][character]
+               self._fail[next_state] = fail_state
+               self._out[next_state] = self._out[next_state] + self._out[fail_state]
+               list_next_states.append(next_state)
+         list_states = list_next_states
+
+   def search(self, text, set_found_keyword_ids):
+
+      goto = self._goto
+      fail = self._fail
+      out = self._out
+
+      # Empty keywords are part of every text
+      if len(out[0]) > 0:
+         set_found_keyword_ids.update(out[0])
+
+      state = 0
+      for character in text:
+         while state != 0 and character not in goto[state]:
+            state = fail[state]
+         state = goto[state].get(character, 0)
+         if len(out[state]) > 0:
+            set_found_keyword_ids.update(out[state])
+
+      return set_found_keyword_ids
+
+class TemplateCandidate:
+  """ A template and how many of its keywords are in the document. """
+  __slots__ = ("template_file_name", "found_keyword_count", "keyword_count")
+  def __init__(self, template_file_name, found_keyword_count, keyword_count):
+    self.template_file_name = template_file_name
+    self.found_keyword_count = found_keyword_count
+    self.keyword_count = keyword_count
+
+  @property
+  def complete(self):
+    return self.found_keyword_count == self.keyword_count
+
+class KeywordIndex:
+
+   # Of the pickled attributes, an index saved in another format is rebuilt
+   FORMAT_VERSION = 2
+
+   def __init__(self, signature = (), list_template_keywords = ()):
+
+      self.format_version = KeywordIndex.FORMAT_VERSION
+      # signature identifies the version of the template files the index was built from
+      self.signature = ()
+      # keyword -> keyword id, and per keyword id the file names of the templates having it (its posting list)
+      self._keyword_ids = {}
+      self._postings = []
+      # template file name -> frozenset of its keyword ids
+      self._template_keyword_ids = {}
+      self.automaton = AhoCorasick([])
+
+      self.update(signature, [], list_template_keywords)
+
+   @property
+   def template_count(self):
+      return len(self._template_keyword_ids)
+
+   def update(self, signature, list_removed_template_file_names, list_added_template_keywords):
+      """ Remove templates, then add (or replace) templates given as (file name, keywords). The automaton is rebuilt only
+      when the keywords of all the templates together change. """
+
+      keywords_changed = False
+
+      for template_file_name in list_removed_template_file_names:
+         if self._remove_template(template_file_name) == True:
+            keywords_changed = True
+
+      for template_file_name, list_keywords in list_added_template_keywords:
+         if self._remove_template(template_file_name) == True:
+            keywords_changed = True
+         set_keyword_ids = set()
+         for keyword in list_keywords:
+            keyword_id = self._keyword_ids.get(keyword)
+            if keyword_id is None:
+               keyword_id = len(self._postings)
+               self._keyword_ids[keyword] = keyword_id
+               self._postings.append(set())
+               keywords_changed = True
+            self._postings[keyword_id].add(template_file_name)
+            set_keyword_ids.add(keyword_id)
+         self._template_keyword_ids[template_file_name] = frozenset(set_keyword_ids)
+
+      if keywords_changed == True:
+         self._build_automaton()
+
+      self.signature = signature
+
+   def _remove_template(self, template_file_name):
+      """ True if a keyword is left without templates. """
+
+      set_keyword_ids = self._template_keyword_ids.pop(template_file_name, None)
+      if set_keyword_ids is None:
+         return False
+
+      keyword_left_over = False
+      for keyword_id in set_keyword_ids:
+         postings = self._postings[keyword_id]
+         postings.discard(template_file_name)
+         if len(postings) == 0:
+            keyword_left_over = True
+      return keyword_left_over
+
+   def _build_automaton(self):
+
+      # Keywords no template has any more are dropped, the others are numbered afresh in their earlier order
+      list_keywords = sorted(self._keyword_ids, key=self._keyword_ids.get)
+      list_keywords = [keyword for keyword in list_keywords if len(self._postings[self._keyword_ids[keyword]]) > 0]
+      dict_new_keyword_ids = dict((self._keyword_ids[keyword], keyword_id) for keyword_id, keyword in enumerate(list_keywords))
+
+      self._postings = [self._postings[self._keyword_ids[keyword]] for keyword in list_keywords]
+      self._template_keyword_ids = dict((template_file_name, frozenset(dict_new_keyword_ids[keyword_id] \
+         for keyword_id in set_keyword_ids)) for template_file_name, set_keyword_ids in self._template_keyword_ids.items())
+      self._keyword_ids = dict((keyword, keyword_id) for keyword_id, keyword in enumerate(list_keywords))
+      self.automaton = AhoCorasick(list_keywords)
+
+   def rank_templates(self, set_found_keyword_ids):
+      """ TemplateCandidate of every template with at least one keyword found, best first. Only the posting lists of the
+      keywords found are read, so the time taken depends on the document and not on the number of templates. """
+
+      dict_found_keyword_counts = {}
+      for keyword_id in set_found_keyword_ids:
+         for template_file_name in self._postings[keyword_id]:
+            dict_found_keyword_counts[template_file_name] = dict_found_keyword_counts.get(template_file_name, 0) + 1
+
+      list_candidates = [TemplateCandidate(template_file_name, found_keyword_count, len(self._template_keyword_ids[template_file_name])) \
+         for template_file_name, found_keyword_count in dict_found_keyword_counts.items()]
+
+      # Templates with all their keywords found first. Among those, the most specific template (more keywords) first, then
+      # by file name. The others by the number of keywords missing.
+      list_candidates.sort(key=lambda candidate: (candidate.keyword_count - candidate.found_keyword_count, \
+         -candidate.found_keyword_count, candidate.template_file_name))
+      return list_candidates
+
+   def get_matching_templates(self, set_found_keyword_ids):
+
+      return [candidate.template_file_name for candidate in self.rank_templates(set_found_keyword_ids) if candidate.complete]
+
+   def save(self, index_file_name):
+
+      try:
+         os.makedirs(os.path.dirname(index_file_name), exist_ok=True)
+         temp_file_name = index_file_name + "." + str(os.getpid()) + "-" + str(threading.get_ident()) + ".tmp"
+         with open(temp_file_name, "wb") as write_file:
+            pickle.dump(self, write_file, protocol=pickle.HIGHEST_PROTOCOL)
+         os.replace(temp_file_name, index_file_name)
+      except OSError:
+         Logger.getLogger().warning("WARNING! Failed to save keyword index to " + index_file_name)
+
+   @staticmethod
+   def load(index_file_name):
+
+      try:
+         with open(index_file_name, "rb") as read_file:
+            keyword_index = pickle.load(read_file)
+      except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+         return None
+
+      if isinstance(keyword_index, KeywordIndex) == False or \
+         getattr(keyword_index, "format_version", None) != KeywordIndex.FORMAT_VERSION:
+         return None
+
+      return keyword_index
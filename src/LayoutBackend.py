@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+
+"""LayoutBackend.py: Backends producing the objects (textboxes, horizontal and vertical lines) of the pages of a document."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import io
+import json
+
+from ConfigManager import ConfigManager
+
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfpage import PDFTextExtractionNotAllowed
+from pdfminer.pdfinterp import PDFResourceManager
+from pdfminer.pdfinterp import PDFPageInterpreter
+from pdfminer.layout import LAParams
+from pdfminer.converter import PDFPageAggregator
+import pdfminer
+
+from sortedcontainers import SortedDict
+
+LAYOUT_SNAPSHOT_FORMAT_VERSION = 1
+
+class TextBox:
+  __slots__ = ("x0", "y0", "x1", "y1", "text")
+  def __init__(self, x0, y0, x1, y1, text):
+    self.x0 = x0
+    self.y0 = y0
+    self.x1 = x1
+    self.y1 = y1
+    self.text = text
+
+class HorizontalLine:
+  __slots__ = ("y", "x0", "x1")
+  def __init__(self, y, x0, x1):
+    self.y = y
+    self.x0 = x0
+    self.x1 = x1
+
+class VerticalLine:
+  __slots__ = ("x", "y0", "y1", "src")
+  def __init__(self, x, y0, y1, src):
+    self.x = x
+    self.y0 = y0
+    self.y1 = y1
+    self.src = src
+
+def build_page_objects(list_textboxes, list_horizontal_lines, list_vertical_lines):
+   """ Page objects from plain tuples, (x0, y0, x1, y1, text), (y, x0, x1) and (x, y0, y1, src), e.g. of the layout cache. """
+
+   textboxes = [TextBox(x0,y0,x1,y1,text) for x0, y0, x1, y1, text in list_textboxes]
+
+   rows_of_horizontal_lines = SortedDict()
+   for y, x0, x1 in list_horizontal_lines:
+      horizontal_lines_at_y = rows_of_horizontal_lines.get(y)
+      if horizontal_lines_at_y == None:
+         horizontal_lines_at_y = SortedDict()
+         rows_of_horizontal_lines[y] = horizontal_lines_at_y
+      horizontal_lines_at_y[x0] = HorizontalLine(y,x0,x1)
+
+   rows_of_vertical_lines = SortedDict()
+   for x, y0, y1, src in list_vertical_lines:
+      vertical_lines_at_x = rows_of_vertical_lines.get(x)
+      if vertical_lines_at_x == None:
+         vertical_lines_at_x = SortedDict()
+         rows_of_vertical_lines[x] = vertical_lines_at_x
+      vertical_lines_at_x[y0] = VerticalLine(x,y0,y1,src)
+
+   return (textboxes, rows_of_horizontal_lines, rows_of_vertical_lines)
+
+class LayoutBackend:
+   """ Opens a document and hands out the objects of its pages, a page at a time. The objects of a page are a tuple
+   (textboxes, rows_of_horizontal_lines, rows_of_vertical_lines): a list of TextBox, a SortedDict y -> SortedDict x0 ->
+   HorizontalLine and a SortedDict x -> SortedDict y0 -> VerticalLine. An instance handles one document at a time. """
+
+   def get_settings(self):
+      """ Everything besides the document that the page objects depend on, part of the layout cache key. None when the page
+      objects are not to be cached. """
+      return None
+
+   def open(self, file_name_with_path):
+      """ Errors reading the document are raised here, rather than when its first page is needed. """
+      raise NotImplementedError()
+
+   def count_pages(self):
+      """ Pages of the open document, None when it can't be parsed in page ranges (see parse_page_range). """
+      return None
+
+   def next_page_objects(self):
+      """ List of the objects of the next page, None once all pages are done. The list can have more than one entry,
+      e.g. pdfminer figures. """
+      raise NotImplementedError()
+
+   def skip_pages(self, page_count):
+      """ Move past the next page_count pages, e.g. those already in the layout cache. """
+      for _ in range(page_count):
+         self.next_page_objects()
+
+   def parse_page_range(self, file_name_with_path, start_page, end_page):
+      """ Runs in a worker process. List of the objects of the pages from start_page till (not including) end_page. """
+      raise NotImplementedError()
+
+   def close(self):
+      pass
+
+class PdfminerLayoutBackend(LayoutBackend):
+   """ pdfminer's layout analysis. Lines and rectangles become horizontal and vertical lines, loose characters are merged
+   into runs. """
+
+   def __init__(self):
+      configMgr = ConfigManager.getInstance()
+      self._character_closeness = int(configMgr.get("object_layout_container","character_closeness",2))
+      # Set parameters for layout analysis.
+      self._laparams = LAParams()
+      self._pdf_file = None
+      self._document = None
+      self._page_iterator = None
+      self._interpreter = None
+      self._device = None
+
+   def get_settings(self):
+      settings = {}
+      settings["pdfminer"] = getattr(pdfminer, "__version__", "")
+      settings["laparams"] = vars(self._laparams)
+      settings["character_closeness"] = self._character_closeness
+      return settings
+
+   def open(self, file_name_with_path):
+
+      # Open a PDF file. Kept open till all the pages are parsed or the backend is closed.
+      fp = open(file_name_with_path, 'rb')
+      try:
+         document = self._open_document(fp)
+      except:
+         fp.close()
+         raise
+
+      self._pdf_file = fp
+      self._document = document
+      self._page_iterator = PDFPage.create_pages(document)
+      self._interpreter, self._device = self._create_interpreter()
+
+   def count_pages(self):
+      return sum(1 for _ in PDFPage.create_pages(self._document))
+
+   def next_page_objects(self):
+
+      page = next(self._page_iterator, None)
+      if page is None:
+         return None
+
+      # read the page into a layout object and extract text from it
+      self._interpreter.process_page(page)
+      list_page_objects = []
+      self._parse_obj(self._device.get_result()._objs, list_page_objects)
+      return list_page_objects
+
+   def skip_pages(self, page_count):
+
+      # Skipped pages are not interpreted
+      for _ in range(page_count):
+         next(self._page_iterator, None)
+
+   def parse_page_range(self, file_name_with_path, start_page, end_page):
+
+      list_page_objects = []
+
+      with open(file_name_with_path, 'rb') as fp:
+         document = self._open_document(fp)
+         interpreter, device = self._create_interpreter()
+         for page_number, page in enumerate(PDFPage.create_pages(document)):
+            if page_number >= end_page:
+               break
+            if page_number >= start_page:
+               interpreter.process_page(page)
+               self._parse_obj(device.get_result()._objs, list_page_objects)
+
+      return list_page_objects
+
+   def close(self):
+
+      self._page_iterator = None
+      self._document = None
+      self._interpreter = None
+      self._device = None
+      if self._pdf_file != None:
+         self._pdf_file.close()
+         self._pdf_file = None
+
+   def _open_document(self, fp):
+
+      # Create a PDF parser object associated with the file object.
+      parser = PDFParser(fp)
+
+      # Create a PDF document object that stores the document structure.
+      # Password for initialization as 2nd parameter
+      document = PDFDocument(parser)
+
+      # Check if the document allows text extraction. If not, abort.
+      if not document.is_extractable:
+         raise PDFTextExtractionNotAllowed
+
+      return document
+
+   def _create_interpreter(self):
+
+      # Create a PDF resource manager object that stores shared resources.
+      rsrcmgr = PDFResourceManager()
+
+      # BEGIN LAYOUT ANALYSIS
+      # Create a PDF page aggregator object.
+      device = PDFPageAggregator(rsrcmgr, laparams=self._laparams)
+
+      # Create a PDF interpreter object.
+      interpreter = PDFPageInterpreter(rsrcmgr, device)
+
+      return interpreter, device
+
+   def _parse_obj(self, lt_objs, list_page_objects):
+
+      textboxes = []
+      rows_of_horizontal_lines = SortedDict()
+      rows_of_vertical_lines = SortedDict()
+
+      # Loose characters are collected with their position among the textboxes and merged at the end
+      list_characters = []
+
+      # loop over the object list
+      for obj in lt_objs:
+
+         # if it's a textbox, process text and location
+         if isinstance(obj, pdfminer.layout.LTChar):
+            x0, y0, x1, y1 = obj.bbox
+            list_characters.append((len(textboxes), x0, y0, x1, y1, obj.get_text()))
+
+         elif isinstance(obj, pdfminer.layout.LTTextBoxHorizontal):
+            for o in obj._objs:
+               if isinstance(o, pdfminer.layout.LTTextLineHorizontal):
+                  # Get the (x0,y0) & (x1,y1) co-ordinates of the TextBox
+                  x0 = o.bbox[0]
+                  y0 = o.bbox[1]
+                  x1 = o.bbox[2]
+                  y1 = o.bbox[3]
+
+                  text = o.get_text().rstrip('\n')
+                  textboxes.append(TextBox(x0,y0,x1,y1,text))
+
+         # if it's a line, copy its location
+         elif isinstance(obj, pdfminer.layout.LTLine):
+
+               # Get the (x0,y0) & (x1,y1) co-ordinates of the Line
+               x0 = obj.bbox[0]
+               y0 = obj.bbox[1]
+               x1 = obj.bbox[2]
+               y1 = obj.bbox[3]
+
+               # If its a horizontal line
+               if y0 == y1 :
+                  horizontal_lines_at_y = rows_of_horizontal_lines.get(y0)
+                  if horizontal_lines_at_y == None:
+                     horizontal_lines_at_y = SortedDict()
+                  horizontal_lines_at_y[x0] = HorizontalLine(y0,x0,x1)
+                  rows_of_horizontal_lines[y0] = horizontal_lines_at_y
+               # If its a Vertical line
+               elif x0 == x1:
+                  vertical_lines_at_x = rows_of_vertical_lines.get(x0)
+                  if vertical_lines_at_x == None:
+                     vertical_lines_at_x = SortedDict()
+                  vertical_line_at_x_y0 = vertical_lines_at_x.get(y0)
+                  if vertical_line_at_x_y0 == None:
+                     vertical_lines_at_x[y0] = VerticalLine(x0,y0,y1, "LINE")
+                  else:
+                     if vertical_line_at_x_y0.y1 < y1:
+                        vertical_line_at_x_y0.y1 = y1
+                        vertical_lines_at_x[y0] = vertical_line_at_x_y0
+                  rows_of_vertical_lines[x0] = vertical_lines_at_x
+
+         # if it's a rectangle, copy its boundaries
+         elif isinstance(obj, pdfminer.layout.LTRect) :
+
+               # Get the (x0,y0) & (x1,y1) co-ordinates of the Line
+               x0 = obj.bbox[0]
+               y0 = obj.bbox[1]
+               x1 = obj.bbox[2]
+               y1 = obj.bbox[3]
+
+               # Convert Rectangle boundaries to horizontal and vertical lines
+               list_hor_lines = [y0,y1]
+               for y in list_hor_lines:
+                  horizontal_lines_at_y = rows_of_horizontal_lines.get(y)
+                  if horizontal_lines_at_y == None:
+                     horizontal_lines_at_y = SortedDict()
+                  horizontal_lines_at_y[x0] = HorizontalLine(y,x0,x1)
+                  rows_of_horizontal_lines[y] = horizontal_lines_at_y
+               list_ver_lines = [x0,x1]
+               for x in list_ver_lines:
+                  vertical_lines_at_x = rows_of_vertical_lines.get(x)
+                  if vertical_lines_at_x == None:
+                     vertical_lines_at_x = SortedDict()
+                  vertical_line_at_x_y0 = vertical_lines_at_x.get(y0)
+                  if vertical_line_at_x_y0 == None:
+                     vertical_lines_at_x[y0] = VerticalLine(x,y0,y1, "RECT")
+                  else:
+                     if vertical_line_at_x_y0.y1 < y1:
+                        vertical_line_at_x_y0.y1 = y1
+                        vertical_lines_at_x[y0] = vertical_line_at_x_y0
+                  rows_of_vertical_lines[x] = vertical_lines_at_x
+
+         # if it's a container, recurse
+         elif isinstance(obj, pdfminer.layout.LTFigure):
+               self._parse_obj(obj._objs, list_page_objects)
+
+      textboxes = self._merge_characters(list_characters, textboxes, self._character_closeness)
+
+      list_page_objects.append((textboxes, rows_of_horizontal_lines, rows_of_vertical_lines))
+
+   def _merge_characters(self, list_characters, textboxes, character_closeness):
+      """ Merge the characters into runs (same y0 & y1, at most character_closeness apart) in a single pass. Each run
+      takes the place among the textboxes where the character following it was found, the last run goes at the end. """
+
+      list_runs = []
+
+      # The first run starts off an empty textbox at the origin
+      run_x0 = run_y0 = run_x1 = run_y1 = 0
+      run_texts = [""]
+      for slot, x0, y0, x1, y1, text in list_characters:
+         if run_y0 == y0 and run_y1 == y1 and (x0 - run_x1) <= character_closeness:
+            run_texts.append(text)
+            run_x1 = x1
+         else:
+            list_runs.append((slot, TextBox(run_x0,run_y0,run_x1,run_y1,"".join(run_texts))))
+            run_x0, run_y0, run_x1, run_y1 = x0, y0, x1, y1
+            run_texts = [text]
+      list_runs.append((len(textboxes), TextBox(run_x0,run_y0,run_x1,run_y1,"".join(run_texts))))
+
+      merged_textboxes = []
+      start = 0
+      for slot, textbox in list_runs:
+         merged_textboxes.extend(textboxes[start:slot])
+         merged_textboxes.append(textbox)
+         start = slot
+      merged_textboxes.extend(textboxes[start:])
+
+      return merged_textboxes
+
+class ReplayLayoutBackend(LayoutBackend):
+   """ Replays a layout snapshot (see write_layout_snapshot) instead of parsing a pdf. Same snapshot, same page objects,
+   so that the algorithms can be benchmarked and regression tested without a pdf parser in the way. """
+
+   def __init__(self):
+      self._list_pages = None
+      self._page_number = 0
+
+   def open(self, file_name_with_path):
+
+      try:
+         with io.open(file_name_with_path, 'r', encoding='utf-8') as read_file:
+            snapshot = json.load(read_file)
+      except ValueError:
+         raise Exception("Error! " + file_name_with_path + " is not a layout snapshot.")
+
+      if isinstance(snapshot, dict) == False or snapshot.get("format_version") != LAYOUT_SNAPSHOT_FORMAT_VERSION:
+         raise Exception("Error! Unknown layout snapshot format in " + file_name_with_path)
+
+      self._list_pages = snapshot["pages"]
+      self._page_number = 0
+
+   def next_page_objects(self):
+
+      if self._page_number >= len(self._list_pages):
+         return None
+
+      page = self._list_pages[self._page_number]
+      self._page_number = self._page_number + 1
+      return [build_page_objects(page["textboxes"], page["horizontal_lines"], page["vertical_lines"])]
+
+   def close(self):
+      self._list_pages = None
+
+def write_layout_snapshot(list_pages, snapshot_file_name):
+   """ The objects of the pages (e.g. ObjectLayoutContainer.pages) as json, for the replay backend. Floats are written
+   as their shortest repr, which reads back to the very same value. """
+
+   list_snapshot_pages = []
+   for page in list_pages:
+      snapshot_page = {}
+      snapshot_page["textboxes"] = [[textbox.x0, textbox.y0, textbox.x1, textbox.y1, textbox.text] for textbox in page.textboxes]
+      snapshot_page["horizontal_lines"] = [[horizontal_line.y, horizontal_line.x0, horizontal_line.x1] \
+         for horizontal_lines_at_y in page.rows_of_horizontal_lines.values() for horizontal_line in horizontal_lines_at_y.values()]
+      snapshot_page["vertical_lines"] = [[vertical_line.x, vertical_line.y0, vertical_line.y1, vertical_line.src] \
+         for vertical_lines_at_x in page.rows_of_vertical_lines.values() for vertical_line in vertical_lines_at_x.values()]
+      list_snapshot_pages.append(snapshot_page)
+
+   snapshot = {"format_version": LAYOUT_SNAPSHOT_FORMAT_VERSION, "pages": list_snapshot_pages}
+   with io.open(snapshot_file_name, 'w', encoding='utf-8') as write_file:
+      write_file.write(json.dumps(snapshot, ensure_ascii=False))
+
+# Backends by name, a faster parser can be added with register_layout_backend
+LAYOUT_BACKENDS = {
+   "pdfminer": PdfminerLayoutBackend,
+   "replay": ReplayLayoutBackend
+}
+
+def register_layout_backend(name, backend_class):
+   LAYOUT_BACKENDS[name] = backend_class
+
+def create_layout_backend(name = None):
+   """ A new backend, the configured one when no name is given. """
+
+   if name == None:
+      name = ConfigManager.getInstance().get("object_layout_container", "layout_backend", "pdfminer")
+
+   backend_class = LAYOUT_BACKENDS.get(name)
+   if backend_class == None:
+      raise Exception("Error! Unknown layout backend " + str(name) + ", expected one of " + ", ".join(LAYOUT_BACKENDS))
+
+   return backend_class()
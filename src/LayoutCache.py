@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+
+"""LayoutCache.py: On disk cache of the parsed layout (textboxes, horizontal and vertical lines) of pdfs."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+from Logger import Logger
+from ConfigManager import ConfigManager
+
+# File layout (little endian) :
+#   header  : magic, format version, # of pages, # of pdf pages they were parsed from, whether that is the whole pdf
+#   pages   : per page, # of textboxes, # of horizontal lines, # of vertical lines, offset of its records, offset of its strings
+#   records : per page, the textboxes, horizontal lines and vertical lines followed by the utf-8 strings they refer to
+LAYOUT_CACHE_MAGIC = b"IECLAYOT"
+LAYOUT_CACHE_FORMAT_VERSION = 2
+LAYOUT_CACHE_FILE_EXTENSION = ".layout"
+
+HEADER = struct.Struct("<8sIIII")
+PAGE = struct.Struct("<IIIQQ")
+TEXTBOX = struct.Struct("<4dII")
+HORIZONTAL_LINE = struct.Struct("<3d")
+VERTICAL_LINE = struct.Struct("<3dII")
+
+class LayoutCache:
+
+   __instance = None
+   __enabled = True
+
+   @staticmethod
+   def getInstance():
+      """ Static access method. """
+      if LayoutCache.__instance == None:
+         LayoutCache()
+      return LayoutCache.__instance
+
+   def __init__(self):
+      """ Virtually private constructor. """
+      if LayoutCache.__instance != None:
+         raise Exception("Error! Internal error LayoutCache is a singleton.")
+      else:
+         LayoutCache.__instance = self
+         configMgr = ConfigManager.getInstance()
+         self.__enabled = int(configMgr.get("layout_cache", "enabled", 1)) != 0
+         self._cache_folder = configMgr.get("layout_cache", "folder", "../cache/layout")
+         self._max_size = int(float(configMgr.get("layout_cache", "max_size_mb", 256)) * 1024 * 1024)
+
+   @property
+   def enabled(self):
+      return self.__enabled
+
+   def set_enabled(self, enabled):
+      self.__enabled = enabled
+
+   def get_key(self, pdf_file_name_with_path, backend_settings):
+      """ Content hash of the pdf plus every setting the parsed layout depends on (LayoutBackend.get_settings). None when
+      the cache is not used. """
+
+      if self.__enabled == False or backend_settings is None:
+         return None
+
+      settings = dict(backend_settings)
+      settings["format_version"] = LAYOUT_CACHE_FORMAT_VERSION
+
+      key = hashlib.sha256()
+      key.update(json.dumps(settings, sort_keys=True, default=repr).encode("utf-8"))
+      with open(pdf_file_name_with_path, "rb") as read_file:
+         for chunk in iter(lambda: read_file.read(1024 * 1024), b""):
+            key.update(chunk)
+
+      return key.hexdigest()
+
+   def _get_cache_file_name(self, key):
+      return os.path.join(self._cache_folder, key + LAYOUT_CACHE_FILE_EXTENSION)
+
+   def load(self, key):
+      """ (list of (textboxes, horizontal lines, vertical lines) per page, # of pdf pages they were parsed from, whether that
+      is the whole pdf), None on a miss. A document whose parsing stopped early has only its first pages cached. """
+
+      if key is None:
+         return None
+
+      cache_file_name = self._get_cache_file_name(key)
+      try:
+         with open(cache_file_name, "rb") as read_file:
+            with mmap.mmap(read_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+               cached_layout = self._decode(mapped_file)
+      except (OSError, ValueError):
+         return None
+      except (struct.error, UnicodeDecodeError):
+         Logger.getLogger().warning("WARNING! Discarding corrupt layout cache file " + cache_file_name)
+         self._remove(cache_file_name)
+         return None
+
+      # Most recently used is the most recently modified
+      try:
+         os.utime(cache_file_name)
+      except OSError:
+         pass
+
+      Logger.getLogger().info("Layout loaded from cache " + cache_file_name)
+      return cached_layout
+
+   def store(self, key, list_pages, source_page_count, complete):
+      """ Save the pages parsed from the first source_page_count pages of the pdf, complete when that is all of them. """
+
+      if key is None:
+         return
+
+      cache_file_name = self._get_cache_file_name(key)
+      try:
+         os.makedirs(self._cache_folder, exist_ok=True)
+         temp_file_name = cache_file_name + "." + str(os.getpid()) + "-" + str(threading.get_ident()) + ".tmp"
+         with open(temp_file_name, "wb") as write_file:
+            write_file.write(self._encode(list_pages, source_page_count, complete))
+         os.replace(temp_file_name, cache_file_name)
+      except OSError:
+         Logger.getLogger().warning("WARNING! Failed to save layout to cache " + cache_file_name)
+         return
+
+      self._evict()
+
+   def clear(self):
+
+      for cache_file_name, _, _ in self._list_cache_files():
+         self._remove(cache_file_name)
+      Logger.getLogger().info("Cleared layout cache " + self._cache_folder)
+
+   def _evict(self):
+      """ Remove the least recently used files till the cache fits in its maximum size. """
+
+      list_cache_files = self._list_cache_files()
+      total_size = sum(size for _, _, size in list_cache_files)
+      if total_size <= self._max_size:
+         return
+
+      list_cache_files.sort(key=lambda cache_file: cache_file[1])
+      for cache_file_name, _, size in list_cache_files:
+         if total_size <= self._max_size:
+            break
+         self._remove(cache_file_name)
+         total_size = total_size - size
+
+   def _list_cache_files(self):
+
+      list_cache_files = []
+      try:
+         list_entries = list(os.scandir(self._cache_folder))
+      except OSError:
+         return list_cache_files
+
+      for entry in list_entries:
+         if entry.name.endswith(LAYOUT_CACHE_FILE_EXTENSION):
+            try:
+               stat_result = entry.stat()
+            except OSError:
+               continue
+            list_cache_files.append((entry.path, stat_result.st_mtime_ns, stat_result.st_size))
+
+      return list_cache_files
+
+   def _remove(self, cache_file_name):
+
+      # Another process may have removed it already
+      try:
+         os.remove(cache_file_name)
+      except OSError:
+         pass
+
+   def _encode(self, list_pages, source_page_count, complete):
+
+      list_page_entries = []
+      list_page_data = []
+      offset = HEADER.size + PAGE.size * len(list_pages)
+
+      for page in list_pages:
+         records = bytearray()
+         strings = bytearray()
+
+         for textbox in page.textboxes:
+            text = textbox.text.encode("utf-8", "surrogatepass")
+            records += TEXTBOX.pack(textbox.x0, textbox.y0, textbox.x1, textbox.y1, len(strings), len(text))
+            strings += text
+
+         horizontal_line_count = 0
+         for horizontal_lines_at_y in page.rows_of_horizontal_lines.values():
+            for horizontal_line in horizontal_lines_at_y.values():
+               records += HORIZONTAL_LINE.pack(horizontal_line.y, horizontal_line.x0, horizontal_line.x1)
+               horizontal_line_count = horizontal_line_count + 1
+
+         vertical_line_count = 0
+         for vertical_lines_at_x in page.rows_of_vertical_lines.values():
+            for vertical_line in vertical_lines_at_x.values():
+               src = vertical_line.src.encode("utf-8")
+               records += VERTICAL_LINE.pack(vertical_line.x, vertical_line.y0, vertical_line.y1, len(strings), len(src))
+               strings += src
+               vertical_line_count = vertical_line_count + 1
+
+         list_page_entries.append(PAGE.pack(len(page.textboxes), horizontal_line_count, vertical_line_count, offset, \
+            offset + len(records)))
+         list_page_data.append(records)
+         list_page_data.append(strings)
+         offset = offset + len(records) + len(strings)
+
+      return b"".join([HEADER.pack(LAYOUT_CACHE_MAGIC, LAYOUT_CACHE_FORMAT_VERSION, len(list_pages), source_page_count, \
+         int(complete))] + list_page_entries + list_page_data)
+
+   def _decode(self, mapped_file):
+
+      magic, format_version, page_count, source_page_count, complete = HEADER.unpack_from(mapped_file, 0)
+      if magic != LAYOUT_CACHE_MAGIC or format_version != LAYOUT_CACHE_FORMAT_VERSION:
+         raise struct.error("unknown layout cache format")
+
+      view = memoryview(mapped_file)
+      # Slices past the end are cut short rather than failing, so a truncated file must be caught here
+      file_size = len(mapped_file)
+      list_page_layouts = []
+      try:
+         for page_number in range(page_count):
+            textbox_count, horizontal_line_count, vertical_line_count, records_offset, strings_offset = \
+               PAGE.unpack_from(mapped_file, HEADER.size + PAGE.size * page_number)
+
+            start = records_offset
+            end = start + TEXTBOX.size * textbox_count
+            list_textboxes = []
+            for x0, y0, x1, y1, text_offset, text_length in TEXTBOX.iter_unpack(view[start:end]):
+               text_start = strings_offset + text_offset
+               if text_start + text_length > file_size:
+                  raise struct.error("truncated layout cache file")
+               list_textboxes.append((x0, y0, x1, y1, str(view[text_start:text_start + text_length], "utf-8", "surrogatepass")))
+
+            start = end
+            end = start + HORIZONTAL_LINE.size * horizontal_line_count
+            list_horizontal_lines = list(HORIZONTAL_LINE.iter_unpack(view[start:end]))
+
+            start = end
+            end = start + VERTICAL_LINE.size * vertical_line_count
+            list_vertical_lines = []
+            for x, y0, y1, src_offset, src_length in VERTICAL_LINE.iter_unpack(view[start:end]):
+               src_start = strings_offset + src_offset
+               if src_start + src_length > file_size:
+                  raise struct.error("truncated layout cache file")
+               list_vertical_lines.append((x, y0, y1, str(view[src_start:src_start + src_length], "utf-8")))
+
+            if end > strings_offset:
+               raise struct.error("overlapping layout cache records")
+            if strings_offset > file_size:
+               raise struct.error("truncated layout cache file")
+
+            list_page_layouts.append((list_textboxes, list_horizontal_lines, list_vertical_lines))
+      finally:
+         view.release()
+
+      return list_page_layouts, source_page_count, complete != 0
@@ -6,24 +6,16 @@ __author__      = "Balaji Sundaresan"
 __copyright__   = "Copyright 2019-20, mAnava"
 __version__     = "0.0.2"
 
-import json
-
 from Logger import Logger
-from copy import deepcopy
-from ObjectLayoutAlgorithms import ObjectLayoutAlgorithms
-from ObjectLayoutAlgorithms import ColumnInformation
-
-def extract_line_items(template_file_name):
 
-    with open(template_file_name, "r") as read_file:
-        json_template = json.load(read_file)      
+def extract_line_items(context):
 
     dict_of_line_item_values = {}
 
-    if json_template.get("table_lineitems") != None:
-        dict_of_line_item_values = determine_table_lineitems(json_template)
-    elif json_template.get("regex_lineitems") != None:
-        dict_of_line_item_values = determine_regex_lineitems(json_template)
+    if context.template.table_lineitems != None:
+        dict_of_line_item_values = determine_table_lineitems(context)
+    elif context.template.regex_lineitems != None:
+        dict_of_line_item_values = determine_regex_lineitems(context)
 
     return dict_of_line_item_values
 
@@ -33,7 +25,7 @@ def extract_line_items(template_file_name):
 #  
 ####################################################################
 
-def determine_table_lineitem_header_location(template):
+def determine_table_lineitem_header_location(context):
 
     logger = Logger.getLogger()
 
@@ -41,13 +33,10 @@ def determine_table_lineitem_header_location(template):
     lineitems_start_page_location = -1
     dict_column_text_widths = {}
 
-    if template.get("table_lineitems") != None:
-        list_lineitem_columns = []
-        for column in template["table_lineitems"]["columns"]:
-            column_name = column["name"].split('\n')
-            list_lineitem_columns.append(column_name)
+    if context.template.table_lineitems != None:
+        list_lineitem_columns = context.template.table_lineitems.list_lineitem_columns
 
-        objectlayoutalgo_instance = ObjectLayoutAlgorithms.getInstance()
+        objectlayoutalgo_instance = context.algorithms
         lineitems_start_page_location, lineitems_start_location, dict_column_text_widths = objectlayoutalgo_instance.get_table_lineitem_header_location(list_lineitem_columns)     
 
         for header_name, textbox_details in list(dict_column_text_widths.items()):
@@ -57,34 +46,34 @@ def determine_table_lineitem_header_location(template):
     logger.debug("LINE ITEM START Page = " + str(lineitems_start_page_location) + ", Line = " + str(lineitems_start_location))
     return lineitems_start_page_location, lineitems_start_location, dict_column_text_widths
 
-def determine_table_lineitem_end_location(template, lineitems_start_page_location, lineitems_start_location):
+def determine_table_lineitem_end_location(context, lineitems_start_page_location, lineitems_start_location):
 
     logger = Logger.getLogger()
 
     lineitems_end_location = -1
     lineitems_end_page_location = -1
 
-    if template.get("table_lineitems") != None and template.get("table_lineitems").get("line_end") != None:
-        lineitems_end_text = template["table_lineitems"]["line_end"]
-        objectlayoutalgo_instance = ObjectLayoutAlgorithms.getInstance()
+    if context.template.table_lineitems != None and context.template.table_lineitems.line_end != None:
+        lineitems_end_text = context.template.table_lineitems.line_end
+        objectlayoutalgo_instance = context.algorithms
         lineitems_end_page_location, lineitems_end_location = \
             objectlayoutalgo_instance.get_table_lineitem_end_location(lineitems_end_text, lineitems_start_page_location, lineitems_start_location)     
 
     logger.debug("LINE ITEM END Page = " + str(lineitems_end_page_location) + ", Line = " + str(lineitems_end_location))
     return lineitems_end_page_location, lineitems_end_location
     
-def determine_table_lineitems(json_template):
+def determine_table_lineitems(context):
 
     logger = Logger.getLogger()
 
     dict_of_line_item_values = {}
 
-    lineitems_start_page_location, lineitems_start_location, dict_column_text_widths = determine_table_lineitem_header_location(json_template)   
+    lineitems_start_page_location, lineitems_start_location, dict_column_text_widths = determine_table_lineitem_header_location(context)   
     if lineitems_start_page_location == -1 or lineitems_start_location == -1:
         logger.error("ERROR!! Could not find the start location. Cannot proceed.") 
         return dict_of_line_item_values
 
-    lineitems_end_page_location, lineitems_end_location =  determine_table_lineitem_end_location(json_template, lineitems_start_page_location, lineitems_start_location)
+    lineitems_end_page_location, lineitems_end_location =  determine_table_lineitem_end_location(context, lineitems_start_page_location, lineitems_start_location)
     if lineitems_end_page_location == -1 or lineitems_end_location == -1:
         logger.error("ERROR!! Could not find the end location. Cannot proceed.") 
         return dict_of_line_item_values
@@ -95,20 +84,11 @@ def determine_table_lineitems(json_template):
         
     logger.debug("Start = (%7.2f,%7.2f), End = (%7.2f,%7.2f)" ,lineitems_start_page_location, lineitems_start_location, lineitems_end_page_location, lineitems_end_location)
 
-    list_of_column_information = []
-    for column in json_template["table_lineitems"]["columns"]:
-        column_name = column["name"]
-        alignment = column["alignment"]
-        row_start = column["row_start"]
-        can_extend_text_to_neighbour = False
-        if column.get("can_extend_text_to_neighbour") != None:
-            can_extend_text_to_neighbour = column["can_extend_text_to_neighbour"] 
-
-        list_of_column_information.append(ColumnInformation(column_name, alignment, row_start, can_extend_text_to_neighbour))
-    has_vertical_lines = json_template["table_lineitems"]["vertical_lines"]
-    has_horizontal_lines = json_template["table_lineitems"]["horizontal_lines"]
+    list_of_column_information = context.template.table_lineitems.list_of_column_information
+    has_vertical_lines = context.template.table_lineitems.has_vertical_lines
+    has_horizontal_lines = context.template.table_lineitems.has_horizontal_lines
 
-    objectlayoutalgo_instance = ObjectLayoutAlgorithms.getInstance()
+    objectlayoutalgo_instance = context.algorithms
     dict_of_line_item_values = objectlayoutalgo_instance.get_table_lineitems(list_of_column_information, dict_column_text_widths, \
         lineitems_start_page_location, lineitems_start_location, lineitems_end_page_location, lineitems_end_location, has_vertical_lines, \
             has_horizontal_lines)
@@ -122,52 +102,52 @@ def determine_table_lineitems(json_template):
 #  
 ####################################################################
 
-def determine_regex_lineitem_header_location(template):
+def determine_regex_lineitem_header_location(context):
 
     logger = Logger.getLogger()
 
     lineitems_start_location = -1
     lineitems_start_page_location = -1
 
-    if template.get("regex_lineitems") != None and template.get("regex_lineitems").get("line_start") != None:
-        lineitem_header_regex = template["regex_lineitems"]["line_start"]
+    if context.template.regex_lineitems != None and context.template.regex_lineitems.line_start != None:
+        lineitem_header_regex = context.template.regex_lineitems.line_start
 
-        objectlayoutalgo_instance = ObjectLayoutAlgorithms.getInstance()
+        objectlayoutalgo_instance = context.algorithms
         lineitems_start_page_location, lineitems_start_location = objectlayoutalgo_instance.get_regex_lineitem_header_location(lineitem_header_regex)     
 
     logger.debug("LINE ITEM START Page = " + str(lineitems_start_page_location) + ", Line = " + str(lineitems_start_location))
     return lineitems_start_page_location, lineitems_start_location
 
-def determine_regex_lineitem_end_location(template, lineitems_start_page_location, lineitems_start_location):
+def determine_regex_lineitem_end_location(context, lineitems_start_page_location, lineitems_start_location):
 
     logger = Logger.getLogger()
 
     lineitems_end_location = -1
     lineitems_end_page_location = -1
 
-    if template.get("regex_lineitems") != None and template.get("regex_lineitems").get("line_end") != None:
-        lineitem_header_regex = template["regex_lineitems"]["line_end"]
+    if context.template.regex_lineitems != None and context.template.regex_lineitems.line_end != None:
+        lineitem_header_regex = context.template.regex_lineitems.line_end
 
-        objectlayoutalgo_instance = ObjectLayoutAlgorithms.getInstance()
+        objectlayoutalgo_instance = context.algorithms
         lineitems_end_page_location, lineitems_end_location = objectlayoutalgo_instance.get_table_lineitem_end_location \
         (lineitem_header_regex, lineitems_start_page_location, lineitems_start_location)     
 
     logger.debug("LINE ITEM END Page = " + str(lineitems_end_page_location) + ", Line = " + str(lineitems_end_location))
     return lineitems_end_page_location, lineitems_end_location
 
-def determine_regex_lineitems(json_template):
+def determine_regex_lineitems(context):
 
     logger = Logger.getLogger()
 
     dict_of_line_item_values = {}
 
-    lineitems_start_page_location, lineitems_start_location = determine_regex_lineitem_header_location(json_template)
+    lineitems_start_page_location, lineitems_start_location = determine_regex_lineitem_header_location(context)
     
     if lineitems_start_page_location == -1 or lineitems_start_location == -1:
         logger.error("ERROR!! Could not find the start location. Cannot proceed.") 
         return dict_of_line_item_values
    
-    lineitems_end_page_location, lineitems_end_location = determine_regex_lineitem_end_location(json_template, lineitems_start_page_location, \
+    lineitems_end_page_location, lineitems_end_location = determine_regex_lineitem_end_location(context, lineitems_start_page_location, \
         lineitems_start_location)
     
     if lineitems_end_page_location == -1 or lineitems_end_location == -1:
@@ -180,11 +160,10 @@ def determine_regex_lineitems(json_template):
         
     logger.debug("Start = (%7.2f,%7.2f), End = (%7.2f,%7.2f)" ,lineitems_start_page_location, lineitems_start_location, lineitems_end_page_location, lineitems_end_location)
 
-    regex_lines = deepcopy(json_template["regex_lineitems"]["lines"])
-    list_of_columns = deepcopy(json_template["regex_lineitems"]["columns"])
+    regex_lineitem_program = context.template.regex_lineitems.program
 
-    objectlayoutalgo_instance = ObjectLayoutAlgorithms.getInstance()
-    dict_of_line_item_values = objectlayoutalgo_instance.get_regex_lineitems(regex_lines, list_of_columns, \
+    objectlayoutalgo_instance = context.algorithms
+    dict_of_line_item_values = objectlayoutalgo_instance.get_regex_lineitems(regex_lineitem_program, \
         lineitems_start_page_location, lineitems_start_location, lineitems_end_page_location, lineitems_end_location)
 
     logger.info("Total Line Items Extracted = %d", len(dict_of_line_item_values))
@@ -8,24 +8,99 @@ __version__     = "0.0.2"
 
 from Logger import Logger
 from Orchestrator import Orchestrator
+from LayoutCache import LayoutCache
+from ObjectLayoutContainer import ObjectLayoutContainer
+import LayoutBackend
+import BatchProcessor
+import ExtractionServer
+import InboxWatcher
+import OutputSink
+import Profiler
 import argparse
+import os
 
 def parse_arguments():
     parser = argparse.ArgumentParser()
     parser.add_argument('--dump', type=str, required=False)
     parser.add_argument('--template', type=str, required=True)
-    parser.add_argument('--file', type=str, required=True)
-    parser.add_argument('--output', type=str, required=True)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--file', type=str)
+    group.add_argument('--batch', type=str)
+    group.add_argument('--serve', action='store_true')
+    group.add_argument('--watch', type=str)
+    parser.add_argument('--output', type=str, required=False)
+    parser.add_argument('--sink', type=str, required=False, choices=OutputSink.SINK_TYPES)
+    parser.add_argument('--metrics-file', type=str, required=False)
+    parser.add_argument('--profile', type=str, required=False)
+    parser.add_argument('--profile-stacks', action='store_true')
+    parser.add_argument('--port', type=int, required=False)
+    parser.add_argument('--socket', type=str, required=False)
+    parser.add_argument('--once', action='store_true')
+    parser.add_argument('--workers', type=int, required=False)
+    parser.add_argument('--parse-workers', type=int, required=False)
+    parser.add_argument('--no-layout-cache', action='store_true')
+    parser.add_argument('--clear-layout-cache', action='store_true')
+    parser.add_argument('--layout-backend', type=str, required=False, choices=list(LayoutBackend.LAYOUT_BACKENDS))
+    parser.add_argument('--record-layout', type=str, required=False)
     args = parser.parse_args()
+    if args.serve == False and args.output is None:
+        parser.error("the following arguments are required: --output")
+    if args.record_layout is not None and args.file is None:
+        parser.error("argument --record-layout: only allowed with argument --file")
     return args
 
 def setup_logging():
     logger = Logger.getLogger()
     logger.info('***** invoice-extractor-checker STARTED :-) *****')
 
-def setup_orchestrator(text_dump, template_information, pdf_file_with_path, output_file_with_path):
+def setup_layout_cache(no_layout_cache, clear_layout_cache):
+    layout_cache = LayoutCache.getInstance()
+    if clear_layout_cache:
+        layout_cache.clear()
+    if no_layout_cache:
+        layout_cache.set_enabled(False)
+
+def setup_parse_workers(parse_workers):
+    if parse_workers is not None:
+        ObjectLayoutContainer.getInstance().set_parse_workers(parse_workers)
+
+def setup_layout_backend(layout_backend_name):
+    if layout_backend_name is not None:
+        ObjectLayoutContainer.getInstance().set_layout_backend(layout_backend_name)
+
+def setup_layout_recorder(pdf_file_with_path, snapshot_file_name):
+    if snapshot_file_name is None:
+        return
+    container_instance = ObjectLayoutContainer()
+    try:
+        container_instance.parse_pdf(pdf_file_with_path, None)
+        container_instance.save_layout_snapshot(snapshot_file_name)
+    finally:
+        container_instance.close()
+    Logger.getLogger().info("Layout of " + pdf_file_with_path + " recorded to " + snapshot_file_name)
+
+def setup_orchestrator(text_dump, template_information, pdf_file_with_path, output_file_with_path, profile_folder, collapsed_stacks):
     instance = Orchestrator.getInstance()
-    instance.go(text_dump, template_information, pdf_file_with_path, output_file_with_path)
+    if profile_folder is None:
+        instance.go(text_dump, template_information, pdf_file_with_path, output_file_with_path)
+        return
+    os.makedirs(profile_folder, exist_ok=True)
+    profile_name = os.path.splitext(os.path.basename(pdf_file_with_path))[0]
+    pstats_file_name = os.path.join(profile_folder, profile_name + Profiler.PROFILE_FILE_EXTENSION)
+    try:
+        Profiler.profile_call(pstats_file_name, instance.go, text_dump, template_information, pdf_file_with_path, output_file_with_path)
+    finally:
+        Profiler.report_profile(Profiler.merge_profiles([pstats_file_name]), profile_name, profile_folder, collapsed_stacks)
+
+def setup_batch(template_information, batch_information, output, workers, sink_type, metrics_file_name, profile_folder, collapsed_stacks):
+    BatchProcessor.run_batch(template_information, batch_information, output, workers, LayoutCache.getInstance().enabled, sink_type, \
+        metrics_file_name, profile_folder, collapsed_stacks)
+
+def setup_server(template_information, port, socket_file_name, workers):
+    ExtractionServer.serve(template_information, port, socket_file_name, workers, LayoutCache.getInstance().enabled)
+
+def setup_inbox_watcher(template_information, inbox_folder, output, workers, once, sink_type):
+    InboxWatcher.watch_inbox(template_information, inbox_folder, output, workers, LayoutCache.getInstance().enabled, once, sink_type)
 
 def shutdown_application():
     logger = Logger.getLogger()
@@ -39,8 +114,25 @@ def main():
     # Setup logging
     setup_logging()
 
-    # Instantiate and invoke orchestrator
-    setup_orchestrator(args.dump, args.template, args.file, args.output)
+    # Bypass or clear the cache of parsed pdf layouts
+    setup_layout_cache(args.no_layout_cache, args.clear_layout_cache)
+
+    # Processes to parse the pages of long pdfs with
+    setup_parse_workers(args.parse_workers)
+
+    # pdfminer, or the replay of a recorded layout
+    setup_layout_backend(args.layout_backend)
+
+    # Instantiate and invoke orchestrator, for one file, a batch of files, an inbox folder or as a service
+    if args.serve == True:
+        setup_server(args.template, args.port, args.socket, args.workers)
+    elif args.watch is not None:
+        setup_inbox_watcher(args.template, args.watch, args.output, args.workers, args.once, args.sink)
+    elif args.batch is not None:
+        setup_batch(args.template, args.batch, args.output, args.workers, args.sink, args.metrics_file, args.profile, args.profile_stacks)
+    else:
+        setup_layout_recorder(args.file, args.record_layout)
+        setup_orchestrator(args.dump, args.template, args.file, args.output, args.profile, args.profile_stacks)
 
     # Shutdown
     shutdown_application()
@@ -11,13 +11,17 @@ import logging
 
 from Logger import Logger
 from ObjectLayoutContainer import ObjectLayoutContainer
+from ObjectLayoutContainer import normalize_text
 from copy import deepcopy
 from sortedcontainers import SortedDict, SortedList
 import collections
 
 from ConfigManager import ConfigManager
+from ExtractionMetrics import ExtractionMetrics
+from TableGrid import TableColumnWindows
 
 class TextBoxLocation:
+  __slots__ = ("page_number", "x0", "y0", "x1", "y1")
   def __init__(self, page_number, x0, y0, x1, y1):
     self.page_number = page_number
     self.x0 = x0
@@ -25,6 +29,41 @@ class TextBoxLocation:
     self.x1 = x1
     self.y1 = y1
 
+class SearchScope:
+  """ Pages (0 based, last_page included, None for till the end) and region of a page (a side None is not bounded) that a
+  search is limited to. A textbox is in scope when it lies within the region. """
+  __slots__ = ("first_page", "last_page", "x0", "y0", "x1", "y1")
+  def __init__(self, first_page = 0, last_page = None, x0 = None, y0 = None, x1 = None, y1 = None):
+    self.first_page = first_page
+    self.last_page = last_page
+    self.x0 = x0
+    self.y0 = y0
+    self.x1 = x1
+    self.y1 = y1
+
+  def _key(self):
+    return (self.first_page, self.last_page, self.x0, self.y0, self.x1, self.y1)
+
+  def __eq__(self, other):
+    return isinstance(other, SearchScope) and self._key() == other._key()
+
+  def __hash__(self):
+    return hash(self._key())
+
+  def contains_page(self, page_number):
+    return page_number >= self.first_page and (self.last_page == None or page_number <= self.last_page)
+
+  def is_past(self, page_number):
+    return self.last_page != None and page_number > self.last_page
+
+  def contains(self, textbox):
+    return (self.x0 == None or textbox.x0 >= self.x0) and (self.y0 == None or textbox.y0 >= self.y0) and \
+      (self.x1 == None or textbox.x1 <= self.x1) and (self.y1 == None or textbox.y1 <= self.y1)
+
+  def get_y0_range(self):
+    """ Range of y0 of the textboxes that can be in scope, for SortedDict.irange. """
+    return self.y0, self.y1
+
 class ColumnInformation:
   def __init__(self, name, alignment, row_start, can_extend_text_to_neighbour):
     self.name = name
@@ -32,6 +71,18 @@ class ColumnInformation:
     self.row_start = row_start
     self.can_extend_text_to_neighbour = can_extend_text_to_neighbour
 
+class RegexLineItemProgram:
+  """ The line patterns of regex line items, compiled once per template. A text matching the first pattern starts a line
+  item, the texts matching the following patterns, in their order, continue it. """
+  def __init__(self, list_line_regexes, list_of_columns):
+    self.line_regexes = [re.compile(line_regex) for line_regex in list_line_regexes]
+    self.columns = list(list_of_columns)
+    # Per line pattern, (column name, group number) of the columns it has a group for, in the order of the columns
+    self.line_groups = []
+    for line_regex in self.line_regexes:
+      self.line_groups.append([(column_name, line_regex.groupindex[column_name]) for column_name in self.columns \
+        if column_name in line_regex.groupindex])
+
 class ColumnTextWidth:
   def __init__(self, text, x0, x1, alignment):
     self.text = text
@@ -45,31 +96,31 @@ class ObjectLayoutAlgorithms:
 
    @staticmethod 
    def getInstance():
-      """ Static access method. """
+      """ Static access method. Algorithms over the process wide container, for callers without an ExtractionContext. """
       if ObjectLayoutAlgorithms.__instance == None:
-         ObjectLayoutAlgorithms()
+         ObjectLayoutAlgorithms.__instance = ObjectLayoutAlgorithms(ObjectLayoutContainer.getInstance())
       return ObjectLayoutAlgorithms.__instance
 
-   def __init__(self):
-      """ Virtually private constructor. """
-      if ObjectLayoutAlgorithms.__instance != None:
-         raise Exception("Error! Internal error ObjectLayoutAlgorithms is a singleton.")
-      else:
-         ObjectLayoutAlgorithms.__instance = self
+   def __init__(self, container_instance, metrics = None):
+      """ Algorithms over the pdf parsed into the given container. Hot path events are counted into metrics. """
+      self._container = container_instance
+      self._metrics = metrics if metrics is not None else ExtractionMetrics()
 
    def check_if_all_text_present (self, set_keywords):
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
+      counters = self._metrics.counters
 
       if container_instance.pdf_parsed == False :
          return False
 
       for rows_of_y0_textboxes in container_instance.pagewise_rows_of_y0_textboxes:
-         for key_y0 in list(reversed(rows_of_y0_textboxes)):
+         for key_y0 in reversed(rows_of_y0_textboxes):
                textboxes_at_y1 = rows_of_y0_textboxes[key_y0]
                temp_set_keywords = set() 
-               for key_x1 in list(textboxes_at_y1):
-                  text_to_compare = textboxes_at_y1[key_x1].text
+               counters["textboxes_scanned"] += len(textboxes_at_y1)
+               for textbox in textboxes_at_y1.values():
+                  text_to_compare = textbox.text
                   for keyword in set_keywords:
                      if keyword in text_to_compare:
                            temp_set_keywords.add(keyword)                    
@@ -80,53 +131,90 @@ class ObjectLayoutAlgorithms:
 
       return False
 
-   def search_keyword (self, keyword):
+   def find_keywords (self, keyword_automaton):
+
+      set_found_keyword_ids = set()
+
+      container_instance = self._container
+
+      if container_instance.pdf_parsed == False :
+         return set_found_keyword_ids
+
+      # One pass over the text, for the keywords of all the templates at once
+      counters = self._metrics.counters
+      for rows_of_y0_textboxes in container_instance.pagewise_rows_of_y0_textboxes:
+         for textboxes_at_y0 in rows_of_y0_textboxes.values():
+            counters["textboxes_scanned"] += len(textboxes_at_y0)
+            for textbox_at_y0_x0 in textboxes_at_y0.values():
+               keyword_automaton.search(textbox_at_y0_x0.text, set_found_keyword_ids)
+            if len(set_found_keyword_ids) == keyword_automaton.keyword_count:
+               return set_found_keyword_ids
+
+      return set_found_keyword_ids
+
+   def search_keyword (self, keyword, normalized = False, max_locations = None, scope = None):
 
       list_keyword_locations = []
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
 
       if container_instance.pdf_parsed == False :
          return []
 
-      page_counter = 0
+      # Looked up in the text index built while parsing, instead of comparing with every textbox
+      if normalized == True:
+         keyword = normalize_text(keyword)
+         pagewise_text_index = container_instance.pagewise_normalized_text_index
+      else:
+         pagewise_text_index = container_instance.pagewise_text_index
 
-      while page_counter < len(container_instance.pagewise_rows_of_y0_textboxes) :
-         rows_of_y0_textboxes = container_instance.pagewise_rows_of_y0_textboxes[page_counter]
-         for key_y0 in list(reversed(rows_of_y0_textboxes)):
-            textboxes_at_y0 = rows_of_y0_textboxes[key_y0]
-            for key_x0 in list(textboxes_at_y0):
-               textbox_at_y0_x0 = textboxes_at_y0[key_x0]
-               text_to_compare  = textbox_at_y0_x0.text
-               if keyword == text_to_compare :
-                  location = TextBoxLocation(page_counter, key_x0, key_y0, textbox_at_y0_x0.x1, textbox_at_y0_x0.y1)
-                  list_keyword_locations.append(location)
-                     
-         page_counter += 1
+      # Stop at max_locations (e.g. the ordinal of a field) or the last page of the scope, without parsing the pages after
+      for page_counter, text_index in enumerate(pagewise_text_index):
+         if scope != None:
+            if scope.is_past(page_counter):
+               break
+            if scope.contains_page(page_counter) == False:
+               continue
+         for textbox in text_index.get(keyword, []):
+            if scope != None and scope.contains(textbox) == False:
+               continue
+            location = TextBoxLocation(page_counter, textbox.x0, textbox.y0, textbox.x1, textbox.y1)
+            list_keyword_locations.append(location)
+            if max_locations != None and len(list_keyword_locations) >= max_locations:
+               return list_keyword_locations
 
       return list_keyword_locations
 
-   def search_regex (self, regex_pattern):
+   def search_regex (self, regex_pattern, max_locations = None, scope = None):
 
       list_keyword_locations = []
       list_regex_values = []
+      regex = re.compile(regex_pattern)
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
 
       if container_instance.pdf_parsed == False :
          return []
 
       page_counter = 0
+      counters = self._metrics.counters
 
-      while page_counter < len(container_instance.pagewise_rows_of_y0_textboxes) :
+      # Stop at max_locations or the last page of the scope, without parsing the pages after
+      while container_instance.load_page(page_counter) and (scope == None or scope.is_past(page_counter) == False):
+         if scope != None and scope.contains_page(page_counter) == False:
+            page_counter += 1
+            continue
          rows_of_y0_textboxes = container_instance.pagewise_rows_of_y0_textboxes[page_counter]
-         for key_y0 in list(reversed(rows_of_y0_textboxes)):
+         # Only the rows of the region of the scope
+         min_y0, max_y0 = scope.get_y0_range() if scope != None else (None, None)
+         for key_y0 in rows_of_y0_textboxes.irange(min_y0, max_y0, reverse=True):
             textboxes_at_y0 = rows_of_y0_textboxes[key_y0]
-            for key_x0 in list(textboxes_at_y0):
-               textbox_at_y0_x0 = textboxes_at_y0[key_x0]
-               text_to_compare  = textbox_at_y0_x0.text
-
-               regex_search = re.search(regex_pattern, text_to_compare) 
+            counters["textboxes_scanned"] += len(textboxes_at_y0)
+            for key_x0, textbox_at_y0_x0 in textboxes_at_y0.items():
+               if scope != None and scope.contains(textbox_at_y0_x0) == False:
+                  continue
+               counters["regex_evaluations"] += 1
+               regex_search = regex.search(textbox_at_y0_x0.text)
                if regex_search is not None:
                   location = TextBoxLocation(page_counter, key_x0, key_y0, textbox_at_y0_x0.x1, textbox_at_y0_x0.y1)
                   list_keyword_locations.append(location)
@@ -135,14 +223,136 @@ class ObjectLayoutAlgorithms:
                      list_regex_values.append(regex_group)
                   except IndexError:
                      list_regex_values.append("")
-                     
+                  if max_locations != None and len(list_keyword_locations) >= max_locations:
+                     return list_keyword_locations, list_regex_values
+
          page_counter += 1
 
       return list_keyword_locations, list_regex_values
 
+   def search_fields (self, field_plan):
+      """ Everything the fields of a template search for (CompiledFieldPlan), in one pass over the pages. Returns the
+      locations of each label search (key -> [TextBoxLocation], as search_keyword) and the locations and values of each
+      regex search (as search_regex). A search stops once it has the locations it needs or is past its last page, and the
+      pages after the last search are not parsed. """
+
+      dict_label_locations = dict((key, []) for key in field_plan.label_searches)
+      list_regex_matches = [([], []) for _ in field_plan.regex_searches]
+
+      container_instance = self._container
+
+      if container_instance.pdf_parsed == False :
+         return dict_label_locations, list_regex_matches
+
+      prefilter = field_plan.prefilter
+      counters = self._metrics.counters
+
+      # Searches still short of the locations they need, (label, normalized, scope, locations needed, locations) and
+      # (regex, scope, locations needed, locations, values)
+      list_pending_labels = [(label, normalized, scope, max_locations, dict_label_locations[(label, normalized, scope)]) \
+         for (label, normalized, scope), max_locations in field_plan.label_searches.items()]
+      list_pending_regexes = [(regex, scope, max_locations, list_keyword_locations, list_regex_values) \
+         for (regex, scope, max_locations), (list_keyword_locations, list_regex_values) in zip(field_plan.regex_searches, list_regex_matches)]
+
+      page_counter = 0
+      while (len(list_pending_labels) > 0 or len(list_pending_regexes) > 0) and container_instance.load_page(page_counter):
+
+         # Labels are looked up in the text indexes
+         if len(list_pending_labels) > 0:
+            text_index = container_instance.pagewise_text_index[page_counter]
+            normalized_text_index = container_instance.pagewise_normalized_text_index[page_counter]
+            for label, normalized, scope, max_locations, list_keyword_locations in list_pending_labels:
+               if scope != None and scope.contains_page(page_counter) == False:
+                  continue
+               for textbox in (normalized_text_index if normalized == True else text_index).get(label, []):
+                  if scope != None and scope.contains(textbox) == False:
+                     continue
+                  list_keyword_locations.append(TextBoxLocation(page_counter, textbox.x0, textbox.y0, textbox.x1, textbox.y1))
+                  if max_locations != None and len(list_keyword_locations) >= max_locations:
+                     break
+
+         # Regexes are searched for in the textboxes of the rows their regions span, top to bottom and left to right. Only
+         # the textboxes the prefilter finds one of them in are searched for each regex.
+         list_page_regexes = [pending_regex for pending_regex in list_pending_regexes \
+            if pending_regex[1] == None or pending_regex[1].contains_page(page_counter)]
+         if len(list_page_regexes) > 0:
+            list_y0_ranges = [scope.get_y0_range() if scope != None else (None, None) for _, scope, _, _, _ in list_page_regexes]
+            min_y0 = None if any(y0_range[0] == None for y0_range in list_y0_ranges) else min(y0_range[0] for y0_range in list_y0_ranges)
+            max_y0 = None if any(y0_range[1] == None for y0_range in list_y0_ranges) else max(y0_range[1] for y0_range in list_y0_ranges)
+
+            done_count = 0
+            rows_of_y0_textboxes = container_instance.pagewise_rows_of_y0_textboxes[page_counter]
+            for key_y0 in rows_of_y0_textboxes.irange(min_y0, max_y0, reverse=True):
+               textboxes_at_y0 = rows_of_y0_textboxes[key_y0]
+               counters["textboxes_scanned"] += len(textboxes_at_y0)
+               for key_x0, textbox_at_y0_x0 in textboxes_at_y0.items():
+                  text_to_compare = textbox_at_y0_x0.text
+                  if prefilter is not None:
+                     counters["regex_evaluations"] += 1
+                     if prefilter.search(text_to_compare) is None:
+                        continue
+                  for regex, scope, max_locations, list_keyword_locations, list_regex_values in list_page_regexes:
+                     if max_locations != None and len(list_keyword_locations) >= max_locations:
+                        continue
+                     if scope != None and scope.contains(textbox_at_y0_x0) == False:
+                        continue
+                     counters["regex_evaluations"] += 1
+                     regex_search = regex.search(text_to_compare)
+                     if regex_search is not None:
+                        location = TextBoxLocation(page_counter, key_x0, key_y0, textbox_at_y0_x0.x1, textbox_at_y0_x0.y1)
+                        list_keyword_locations.append(location)
+                        try:
+                           list_regex_values.append(regex_search.group(1))
+                        except IndexError:
+                           list_regex_values.append("")
+                        if max_locations != None and len(list_keyword_locations) >= max_locations:
+                           done_count += 1
+                  # Stop reading the page once every regex on it has its ordinal
+                  if done_count == len(list_page_regexes):
+                     break
+               if done_count == len(list_page_regexes):
+                  break
+
+         page_counter += 1
+
+         # Done with the searches having the locations they need, or past their last page
+         list_pending_labels = [pending_label for pending_label in list_pending_labels \
+            if (pending_label[3] == None or len(pending_label[4]) < pending_label[3]) and \
+               (pending_label[2] == None or pending_label[2].is_past(page_counter) == False)]
+         list_pending_regexes = [pending_regex for pending_regex in list_pending_regexes \
+            if (pending_regex[2] == None or len(pending_regex[3]) < pending_regex[2]) and \
+               (pending_regex[1] == None or pending_regex[1].is_past(page_counter) == False)]
+
+      return dict_label_locations, list_regex_matches
+
+   def get_neighbour_texts (self, list_neighbour_queries):
+      """ Text of the textbox at the bottom, to the right or second to the right of each (neighbour, TextBoxLocation), for
+      the fields of a template at once. The same query is answered once. """
+
+      dict_neighbour_texts = {}
+      list_neighbour_texts = []
+
+      for neighbour, textbox_location in list_neighbour_queries:
+         key = (neighbour, textbox_location.page_number, textbox_location.x0, textbox_location.y0, textbox_location.x1, \
+            textbox_location.y1)
+         text = dict_neighbour_texts.get(key)
+         if text is None:
+            if neighbour == 'bottom':
+               text = self.get_text_at_bottom(textbox_location)
+            elif neighbour == 'right':
+               text = self.get_text_to_right(1, textbox_location)
+            elif neighbour == 'second-right':
+               text = self.get_text_to_right(2, textbox_location)
+            else:
+               raise Exception('Error! Internal error. Unknown neighbour ' + str(neighbour))
+            dict_neighbour_texts[key] = text
+         list_neighbour_texts.append(text)
+
+      return list_neighbour_texts
+
    def get_text_at_xy (self, textbox_location):
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
 
       if container_instance.pdf_parsed == False :
          raise Exception('Error! Internal error. PDF not yet parsed')
@@ -157,7 +367,7 @@ class ObjectLayoutAlgorithms:
 
    def get_text_at_bottom (self, textbox_location):
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
 
       if container_instance.pdf_parsed == False :
          raise Exception('Error! Internal error. PDF not yet parsed')
@@ -165,21 +375,10 @@ class ObjectLayoutAlgorithms:
       if isinstance(textbox_location , TextBoxLocation) == False:
          raise Exception('Error! Internal error. Passed parameter not of TextBoxLocation type')
 
-      rows_of_y1_textboxes = container_instance.pagewise_rows_of_y1_textboxes[textbox_location.page_number]
-      for key_y1 in list(reversed(rows_of_y1_textboxes)):
-         if key_y1 < textbox_location.y1:
-         #if key_y1 <= textbox_location.y0:
-            textboxes_at_y1 = rows_of_y1_textboxes[key_y1]
-            for key_x1 in list(textboxes_at_y1):
-               textbox_at_y1_x1 = textboxes_at_y1[key_x1]
-               if textbox_at_y1_x1.x0 < textbox_location.x0:
-                  if textbox_at_y1_x1.x1 > textbox_location.x0:
-                     return textbox_at_y1_x1.text
-               elif textbox_at_y1_x1.x0 == textbox_location.x0:
-                  return textbox_at_y1_x1.text
-               elif textbox_at_y1_x1.x0 > textbox_location.x0:
-                  if textbox_at_y1_x1.x0 <= textbox_location.x1:
-                     return textbox_at_y1_x1.text
+      spatial_index = container_instance.pagewise_spatial_index[textbox_location.page_number]
+      textbox = spatial_index.get_textbox_at_bottom(textbox_location)
+      if textbox is not None:
+         return textbox.text
 
       return ""   
 
@@ -191,55 +390,14 @@ class ObjectLayoutAlgorithms:
       if isinstance(textbox_location , TextBoxLocation) == False:
          raise Exception('Error! Internal error. Passed parameter not of TextBoxLocation type')
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
 
       if container_instance.pdf_parsed == False :
          raise Exception('Error! Internal error. PDF not yet parsed')
 
-      list_of_possible_textboxes = []
-
-      rows_of_y0_textboxes = container_instance.pagewise_rows_of_y0_textboxes[textbox_location.page_number]
-      rows_of_y1_textboxes = container_instance.pagewise_rows_of_y1_textboxes[textbox_location.page_number]
+      spatial_index = container_instance.pagewise_spatial_index[textbox_location.page_number]
+      list_of_possible_textboxes = spatial_index.get_textboxes_to_right(position, textbox_location)
 
-      temp_key_list = [list(reversed(rows_of_y1_textboxes)), list(rows_of_y0_textboxes)]
-      temp_row_list = [rows_of_y1_textboxes, rows_of_y0_textboxes]
-      counter = 0
-      while counter < len(temp_key_list):
-         for key_y in temp_key_list[counter]:
-            if key_y >= textbox_location.y0 and key_y <= textbox_location.y1:
-               textboxes_at_y = temp_row_list[counter][key_y]
-               list_textboxes_at_y = list(textboxes_at_y)
-               len_list_textboxes_at_y = len(list_textboxes_at_y)
-               for (index,key_x) in enumerate(list_textboxes_at_y):
-                  textbox_at_y_x = textboxes_at_y[key_x]
-                  if textbox_at_y_x.x0 >= textbox_location.x1:
-                     if position == 1:
-                        self._copy_textbox(list_of_possible_textboxes, textbox_at_y_x)
-                     elif position == 2:
-                        if index < (len_list_textboxes_at_y-1):
-                           next_key_x = list_textboxes_at_y[index+1]
-                           textbox_at_next_y_x = textboxes_at_y[next_key_x]
-                           self._copy_textbox(list_of_possible_textboxes, textbox_at_next_y_x)
-         counter += 1
-
-      rows_of_y1_textboxes = container_instance.pagewise_rows_of_y1_textboxes[textbox_location.page_number]
-
-      for key_y in list(reversed(rows_of_y1_textboxes)):
-         textboxes_at_y = rows_of_y1_textboxes[key_y]
-         list_textboxes_at_y = list(textboxes_at_y)
-         len_list_textboxes_at_y = len(list_textboxes_at_y)
-         for (index,key_x) in enumerate(list_textboxes_at_y):
-            textbox_at_y_x = textboxes_at_y[key_x]
-            if textbox_at_y_x.x0 >= textbox_location.x1:
-               if textbox_at_y_x.y1 > textbox_location.y1:
-                  if textbox_at_y_x.y0 < textbox_location.y0:
-                     if position == 1:
-                        self._copy_textbox(list_of_possible_textboxes, textbox_at_y_x)
-                     elif position == 2:
-                        if index < (len_list_textboxes_at_y-1):
-                           next_key_x = list_textboxes_at_y[index+1]
-                           textbox_at_next_y_x = textboxes_at_y[next_key_x]
-                           self._copy_textbox(list_of_possible_textboxes, textbox_at_next_y_x)
       len_list_of_possible_textboxes = len(list_of_possible_textboxes)
       if len_list_of_possible_textboxes == 0:
          return ""      
@@ -315,23 +473,14 @@ class ObjectLayoutAlgorithms:
                logger.debug("OVERLAP CLOSENESS " + list_of_possible_textboxes[min_closeness_index].text)
                return list_of_possible_textboxes[min_closeness_index].text                  
 
-   def _copy_textbox (self, list_of_possible_textboxes, textbox):
-      # First check if textbox already exists
-      for temp_textbox in list_of_possible_textboxes:
-         if temp_textbox.x1 == textbox.x1 and temp_textbox.x0 == textbox.x0 and \
-            temp_textbox.y1 == textbox.y1 and temp_textbox.y0 == textbox.y0:
-            return
-
-      # if no add it
-      list_of_possible_textboxes.append(deepcopy(textbox))
-
    def get_table_lineitem_header_location (self, list_lineitem_columns):
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
 
       if container_instance.pdf_parsed == False :
          return -1, -1, {}
 
+      counters = self._metrics.counters
       list_lineitem_columns_indexes = [0] * len(list_lineitem_columns)
       list_lineitem_header_textboxes = [None] * len(list_lineitem_columns)
 
@@ -340,70 +489,69 @@ class ObjectLayoutAlgorithms:
          list_lineitem_header_textboxes[counter] = TextBoxLocation(0,-1,-1,-1,-1)
          counter += 1
 
-      for index, rows_of_y1_textboxes in enumerate(container_instance.pagewise_rows_of_y1_textboxes):
-         for key_y1 in list(reversed(rows_of_y1_textboxes)):    
-
-            list_columns_to_search = []
-            dict_indexes = {}
-            counter = 0
-            while counter < len(list_lineitem_columns_indexes):
-               temp_index = list_lineitem_columns_indexes[counter]
-               if temp_index < len(list_lineitem_columns[counter]):
-                  list_columns_to_search.append(list_lineitem_columns[counter][temp_index])
-                  dict_indexes[len(list_columns_to_search)-1] = counter
-               counter += 1
-
-            search_start_index = 0
-            textboxes_at_y1 = rows_of_y1_textboxes[key_y1]
-            for key_x1 in list(textboxes_at_y1):
-               textbox_at_y1_x1 = textboxes_at_y1[key_x1]
-               text_to_search = textbox_at_y1_x1.text
-               return_indexes, return_lengths = self._search_header_text(text_to_search, list_columns_to_search, search_start_index)
-               if return_indexes == None:
-                  list_lineitem_columns_indexes = [0] * len(list_lineitem_columns)
-                  break
-               else:
-                  if len(return_indexes) != len(return_lengths):
-                     return -1, -1, None
-                  counter = 0
-                  len_text_to_search = len(text_to_search)
-                  char_width = (textbox_at_y1_x1.x1 - textbox_at_y1_x1.x0)/len_text_to_search
-                  start_x0 = textbox_at_y1_x1.x0
-                  while counter < len(return_indexes):
-                     return_index = return_indexes[counter]
-                     return_length = return_lengths[counter]
-                     textbox = list_lineitem_header_textboxes[dict_indexes[return_index]]
-                     textbox.y1 = key_y1
-                     end_x1 = start_x0 + (return_length * char_width)
-                     if textbox.x0 == -1 or start_x0 < textbox.x0:
-                        textbox.x0 = start_x0
-                     if textbox.x1 == -1 or end_x1 > textbox.x1:
-                        textbox.x1 = end_x1
-                     if textbox.y0 == -1 or textbox_at_y1_x1.y0 < textbox.y0:
-                        textbox.y0 = textbox_at_y1_x1.y0
-                     if textbox.y1 == -1 or textbox_at_y1_x1.y1 > textbox.y1:
-                        textbox.y1 = textbox_at_y1_x1.y1                        
-                     list_lineitem_header_textboxes[dict_indexes[return_index]] = textbox
-                     start_x0 = end_x1 + char_width
-                     list_lineitem_columns_indexes[dict_indexes[return_index]] += 1
-                     search_start_index = return_index + 1
-                     counter += 1
-
-            found_all = True
-            counter = 0
-            while counter < len(list_lineitem_columns_indexes):
-               temp_index = list_lineitem_columns_indexes[counter]
-               if temp_index != len(list_lineitem_columns[counter]):
-                  found_all = False
-                  break
-               counter += 1
+      for index, key_y1, textboxes_at_y1 in container_instance.iterate_rows_of_y1_textboxes():
+
+         list_columns_to_search = []
+         dict_indexes = {}
+         counter = 0
+         while counter < len(list_lineitem_columns_indexes):
+            temp_index = list_lineitem_columns_indexes[counter]
+            if temp_index < len(list_lineitem_columns[counter]):
+               list_columns_to_search.append(list_lineitem_columns[counter][temp_index])
+               dict_indexes[len(list_columns_to_search)-1] = counter
+            counter += 1
+
+         search_start_index = 0
+         counters["textboxes_scanned"] += len(textboxes_at_y1)
+         for textbox_at_y1_x1 in textboxes_at_y1.values():
+            text_to_search = textbox_at_y1_x1.text
+            return_indexes, return_lengths = self._search_header_text(text_to_search, list_columns_to_search, search_start_index)
+            if return_indexes == None:
+               list_lineitem_columns_indexes = [0] * len(list_lineitem_columns)
+               break
+            else:
+               if len(return_indexes) != len(return_lengths):
+                  return -1, -1, None
+               counter = 0
+               len_text_to_search = len(text_to_search)
+               char_width = (textbox_at_y1_x1.x1 - textbox_at_y1_x1.x0)/len_text_to_search
+               start_x0 = textbox_at_y1_x1.x0
+               while counter < len(return_indexes):
+                  return_index = return_indexes[counter]
+                  return_length = return_lengths[counter]
+                  textbox = list_lineitem_header_textboxes[dict_indexes[return_index]]
+                  textbox.y1 = key_y1
+                  end_x1 = start_x0 + (return_length * char_width)
+                  if textbox.x0 == -1 or start_x0 < textbox.x0:
+                     textbox.x0 = start_x0
+                  if textbox.x1 == -1 or end_x1 > textbox.x1:
+                     textbox.x1 = end_x1
+                  if textbox.y0 == -1 or textbox_at_y1_x1.y0 < textbox.y0:
+                     textbox.y0 = textbox_at_y1_x1.y0
+                  if textbox.y1 == -1 or textbox_at_y1_x1.y1 > textbox.y1:
+                     textbox.y1 = textbox_at_y1_x1.y1                        
+                  list_lineitem_header_textboxes[dict_indexes[return_index]] = textbox
+                  start_x0 = end_x1 + char_width
+                  list_lineitem_columns_indexes[dict_indexes[return_index]] += 1
+                  search_start_index = return_index + 1
+                  counter += 1
+
+         found_all = True
+         counter = 0
+         while counter < len(list_lineitem_columns_indexes):
+            temp_index = list_lineitem_columns_indexes[counter]
+            if temp_index != len(list_lineitem_columns[counter]):
+               found_all = False
+               break
+            counter += 1
 
-            if found_all == True:
-               dict_column_text_widths = {}
-               for counter, column in enumerate(list_lineitem_columns):
-                  column_name = '\n'.join(column)
-                  dict_column_text_widths[column_name] = deepcopy(list_lineitem_header_textboxes[counter])
-               return index, key_y1, dict_column_text_widths
+         if found_all == True:
+            dict_column_text_widths = {}
+            counters["deepcopies"] += len(list_lineitem_columns)
+            for counter, column in enumerate(list_lineitem_columns):
+               column_name = '\n'.join(column)
+               dict_column_text_widths[column_name] = deepcopy(list_lineitem_header_textboxes[counter])
+            return index, key_y1, dict_column_text_widths
 
       return -1, -1, {}
 
@@ -433,29 +581,26 @@ class ObjectLayoutAlgorithms:
 
    def get_table_lineitem_end_location (self, regex_pattern, lineitems_start_page_location, lineitems_start_location):
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
 
       if container_instance.pdf_parsed == False :
          return -1, -1
 
-      for page_counter, rows_of_y1_textboxes in enumerate(container_instance.pagewise_rows_of_y1_textboxes):
-
-         if page_counter < lineitems_start_page_location:
-            continue  
+      regex = re.compile(regex_pattern)
+      counters = self._metrics.counters
 
-         for key_y1 in list(reversed(rows_of_y1_textboxes)):
+      # Rows below the start location, top to bottom
+      for page_counter, key_y1, textboxes_at_y1 in container_instance.iterate_rows_of_y1_textboxes(lineitems_start_page_location, \
+         lineitems_start_location):
 
-            if page_counter == lineitems_start_page_location and lineitems_start_location <= key_y1:
-                  continue  
+         for textbox_at_y1_x1 in textboxes_at_y1.values():
+            text_to_compare  = textbox_at_y1_x1.text
+            counters["textboxes_scanned"] += 1
+            counters["regex_evaluations"] += 1
 
-            textboxes_at_y1 = rows_of_y1_textboxes[key_y1]
-            for key_x1 in list(textboxes_at_y1):
-               textbox_at_y1_x1 = textboxes_at_y1[key_x1]
-               text_to_compare  = textbox_at_y1_x1.text
-
-               regex_search = re.search(regex_pattern, text_to_compare) 
-               if regex_search is not None:
-                  return page_counter, key_y1
+            regex_search = regex.search(text_to_compare) 
+            if regex_search is not None:
+               return page_counter, key_y1
 
       return -1, -1
 
@@ -464,7 +609,7 @@ class ObjectLayoutAlgorithms:
 
       logger = Logger.getLogger()
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
       configMgr = ConfigManager.getInstance()
       lineitem_end_location_margin = int(configMgr.get("object_layout_algorithms","lineitem_end_location_margin",5))
       horizontal_line_margin = int(configMgr.get("object_layout_algorithms","horizontal_line_margin",5))
@@ -476,6 +621,7 @@ class ObjectLayoutAlgorithms:
 
       list_of_line_items = []
       line_item_collector = {}
+      counters = self._metrics.counters
 
       # For case without Horizontal lines
       list_of_mapdata = []
@@ -485,347 +631,304 @@ class ObjectLayoutAlgorithms:
             map_row_start_col_collection_status[column.name] = 0
       line_start_index = 0
 
-      # Traverse all the pages
-      for page_number, rows_of_y1_textboxes in enumerate(container_instance.pagewise_rows_of_y1_textboxes):
-
-         # Look at only pages from start to end. Others discard
-         if page_number < lineitems_start_page_location:
-            continue
-            
-         if page_number > lineitems_end_page_location:
+      # Alignment windows of the columns, to bucketize the texts not placed by the ruling lines
+      column_windows = TableColumnWindows(list_of_column_information, dict_column_text_widths, alignment_margin)
+
+      # Traverse the rows from the header down to the end location, top to bottom
+      current_page_number = -1
+      for page_number, key_y1, textboxes_at_y1 in container_instance.iterate_rows_of_y1_textboxes(lineitems_start_page_location, \
+         lineitems_start_location, lineitems_end_page_location, lineitems_end_location):
+
+         # First row of the page
+         if page_number != current_page_number:
+            current_page_number = page_number
+            rows_of_y1_textboxes = container_instance.pagewise_rows_of_y1_textboxes[page_number]
+            previous_key_y1 = -1
+
+            # Ruling lines of the page, as column boundaries and row separators
+            table_grid = None
+            if has_vertical_lines == True or has_horizontal_lines == True:
+               table_grid = container_instance.get_table_grid(page_number)
+
+         if page_number == lineitems_end_page_location and ( key_y1 >= (lineitems_end_location-lineitem_end_location_margin) \
+            and key_y1 <= (lineitems_end_location+lineitem_end_location_margin) ):
+            if len(line_item_collector) > 0 :
+               self._append_table_lineitem(list_of_column_information, list_of_line_items,line_item_collector)
+               line_item_collector = {}   
+
+            # Flush the contents of list_of_mapdata
+            one_line_item_collector = {}
+            for counter, one_mapdata in enumerate(list_of_mapdata):
+               # Just copy the one_mapdata row to the collector
+               for column_name in one_mapdata:
+                  text = one_line_item_collector.get(column_name)
+                  if text == None:
+                     text = one_mapdata[column_name]
+                  else:
+                     text = text + "\n" + one_mapdata[column_name]
+                  one_line_item_collector[column_name] = text 
+            if len(one_line_item_collector) > 0 :
+               self._append_table_lineitem(list_of_column_information, list_of_line_items,one_line_item_collector)
+            del list_of_mapdata[:]   
             break
 
-         # Traverse through all the rows in the current page
-         previous_key_y1 = -1
-         list_reversed_rows_of_y1_textboxes = list(reversed(rows_of_y1_textboxes))
-         for row_number, key_y1 in enumerate(list_reversed_rows_of_y1_textboxes):    
+         one_row_of_line_item = {} 
+         current_column_index = 0
+
+         counters["textboxes_scanned"] += len(textboxes_at_y1)
+         
+         for textbox_at_y1_x1 in textboxes_at_y1.values():
 
-            if page_number == lineitems_start_page_location and lineitems_start_location <= key_y1:
+            if len(textbox_at_y1_x1.text.strip()) == 0:
                continue
 
-            if page_number == lineitems_end_page_location and ( key_y1 >= (lineitems_end_location-lineitem_end_location_margin) \
-               and key_y1 <= (lineitems_end_location+lineitem_end_location_margin) ):
-               if len(line_item_collector) > 0 :
-                  self._append_table_lineitem(list_of_column_information, list_of_line_items,line_item_collector)
-                  line_item_collector = {}   
+            found_column = False
+
+            if has_vertical_lines == True:
+               nearest_x0, nearest_x1 = table_grid.get_column_boundaries(textbox_at_y1_x1)
+               counters["vertical_line_comparisons"] += 1
+
+               column_name_to_add = ""
+               text_to_add_to_column = ""
+               logger.debug('NEAREST ' + textbox_at_y1_x1.text + ' x0=' + str(nearest_x0) + ' x1=' + str(nearest_x1))
+               if nearest_x0 != -1 and nearest_x1 != -1 :
+                  for column_name, textbox in list(dict_column_text_widths.items()):
+                     if textbox.x0 >= nearest_x0 and textbox.x1 <= nearest_x1:
+                        column_name_to_add = column_name
+                        text_to_add_to_column = textbox_at_y1_x1.text
+                        found_column = True
+                        break
+               elif nearest_x1 != -1:
+                  first_column_name = list_of_column_information[0].column_name
+                  second_column_name = list_of_column_information[1].column_name
+                  first_textbox = dict_column_text_widths[first_column_name]
+                  second_textbox = dict_column_text_widths[second_column_name]
+                  if nearest_x1 >= first_textbox.x1 and nearest_x1 <= second_textbox.x1:
+                     column_name_to_add = first_column_name
+                     text_to_add_to_column = textbox_at_y1_x1.text
+                     found_column = True
+               logger.debug('TEXT = ' + text_to_add_to_column + ' COLUMN = ' + column_name_to_add)                        
+               if found_column == True:
+                  text = one_row_of_line_item.get(column_name_to_add)
+                  if text == None:
+                     text = text_to_add_to_column
+                  else:
+                     text = text + "\n" + text_to_add_to_column
+                  one_row_of_line_item[column_name_to_add] = text     
+            
+            # Try the bucketizing algorithm
+            if found_column == False:
+               counter = column_windows.get_column_index(textbox_at_y1_x1, current_column_index)
+               if counter != None:
+                  column = list_of_column_information[counter]
+                  column_textbox = dict_column_text_widths[column.name]
+                  if column.alignment not in ("left", "right", "center"):
+                     logger.error("ERROR!! Unsupported alignment type " + column.alignment)
+                     return {}
+                  found_column = True
+                  found_multi_column_text = False                        
+                  # Check if the text extends to the next column
+                  if (counter+1) < len(list_of_column_information) and column.can_extend_text_to_neighbour == True:
+                     next_column = list_of_column_information[counter+1]
+                     next_column_textbox = dict_column_text_widths[next_column.name]
+                     if column.alignment == next_column.alignment:
+                        if next_column_textbox.x0 > textbox_at_y1_x1.x0 and next_column_textbox.x1 <= textbox_at_y1_x1.x1:
+                           logger.info("Text |" +textbox_at_y1_x1.text + "| extends to column " + next_column.name)
+                           if column.alignment == "center":
+                              text_to_process = textbox_at_y1_x1.text
+                              mid_point = column_textbox.x1 + (next_column_textbox.x0 - column_textbox.x1)/2
+                              len_text = len(text_to_process)
+                              char_width = (textbox_at_y1_x1.x1 - textbox_at_y1_x1.x0)/len_text
+                              start_index = int((mid_point - textbox_at_y1_x1.x0)/char_width)
+                              text_traversal_index = 0
+                              while found_multi_column_text == False:
+                                 before_index = start_index - text_traversal_index
+                                 after_index = start_index + text_traversal_index
+                                 reference_index = -1
+                                 if before_index > 0 and text_to_process[before_index] == ' ':
+                                    reference_index = before_index
+                                    found_multi_column_text = True
+                                 elif after_index < len_text and text_to_process[after_index] == ' ':
+                                    reference_index = after_index
+                                    found_multi_column_text = True
+                                 if found_multi_column_text == True:
+                                    column_text = text_to_process[0:reference_index]
+                                    text = one_row_of_line_item.get(column.name)
+                                    if text == None:
+                                       text = column_text
+                                    else:
+                                       text = text + "\n" + column_text
+                                    one_row_of_line_item[column.name] = text                                           
+                                    next_column_text = text_to_process[reference_index+1:]
+                                    text = one_row_of_line_item.get(next_column.name)
+                                    if text == None:
+                                       text = next_column_text
+                                    else:
+                                       text = text + "\n" + next_column_text
+                                    one_row_of_line_item[next_column.name] = text                                            
+
+                                 text_traversal_index += 1
+
+                  if found_multi_column_text == False:
+                     text = one_row_of_line_item.get(column.name)
+                     if text == None:
+                        text = textbox_at_y1_x1.text
+                     else:
+                        text = text + "\n" + textbox_at_y1_x1.text
+                     one_row_of_line_item[column.name] = text  
+
+                  current_column_index = counter + 1
+
+            if found_column == False:
+               ignore_textbox = False
+               # First check if this column falls extreme left before even the first column starts, so that we can ignore it
+               first_column = list_of_column_information[0]
+               if first_column.alignment == 'left':
+                  column_textbox = dict_column_text_widths[first_column.name]
+                  if (textbox_at_y1_x1.x0 < column_textbox.x0 and textbox_at_y1_x1.x1 < column_textbox.x0):
+                     logger.info("Ignoring |" +textbox_at_y1_x1.text + "| since its doesn't belong to a line item")
+                     ignore_textbox = True
+
+               if ignore_textbox == False:
+                  logger.warn("WARNING! Trying to fit since could not find column for text |" + textbox_at_y1_x1.text + "|")                     
+                  counter = 0
+                  while counter < len(list_of_column_information):
+                     column = list_of_column_information[counter]
+                     column_textbox = dict_column_text_widths[column.name]
+                     if (textbox_at_y1_x1.x0 >= column_textbox.x0 and textbox_at_y1_x1.x0 <= column_textbox.x1) or \
+                        (textbox_at_y1_x1.x0 <= column_textbox.x0):
+                        logger.debug("Found column |" + column.name + "| for text |" + textbox_at_y1_x1.text + "|")
+                        text = one_row_of_line_item.get(column.name)
+                        if text == None:
+                           text = textbox_at_y1_x1.text
+                        else:
+                           text = text + "\n" + textbox_at_y1_x1.text
+                        one_row_of_line_item[column.name] = text                         
+                        break
+                     counter += 1
+
+         if has_horizontal_lines == False:
+
+            # if One Row has all the row_start columns
+            found_all_row_start_columns = True
+            for column in list_of_column_information:
+               if column.row_start == True and one_row_of_line_item.get(column.name) == None:
+                     found_all_row_start_columns = False
+                     break    
+
+            if found_all_row_start_columns == True:
 
                # Flush the contents of list_of_mapdata
                one_line_item_collector = {}
                for counter, one_mapdata in enumerate(list_of_mapdata):
-                  # Just copy the one_mapdata row to the collector
-                  for column_name in one_mapdata:
-                     text = one_line_item_collector.get(column_name)
-                     if text == None:
-                        text = one_mapdata[column_name]
-                     else:
-                        text = text + "\n" + one_mapdata[column_name]
-                     one_line_item_collector[column_name] = text 
+                  if counter <= line_start_index :
+                     # Just copy the one_mapdata row to the collector
+                     for column_name in one_mapdata:
+                        text = one_line_item_collector.get(column_name)
+                        if text == None:
+                           text = one_mapdata[column_name]
+                        else:
+                           text = text + "\n" + one_mapdata[column_name]
+                        one_line_item_collector[column_name] = text 
                if len(one_line_item_collector) > 0 :
                   self._append_table_lineitem(list_of_column_information, list_of_line_items,one_line_item_collector)
-               del list_of_mapdata[:]   
-               break
+               del list_of_mapdata[0:line_start_index+1]
 
-            one_row_of_line_item = {} 
-            current_column_index = 0
+               # Add the new row to list_of_mapdata
+               list_of_mapdata.append(deepcopy(one_row_of_line_item))
+               counters["deepcopies"] += 1
+               
+               # Remember till where the list has to be flushed
+               line_start_index = len(list_of_mapdata) - 1
 
-            textboxes_at_y1 = rows_of_y1_textboxes[key_y1]
-            
-            for key_x1 in list(textboxes_at_y1):
+               # Clear the map status
+               for column_name in map_row_start_col_collection_status:
+                  map_row_start_col_collection_status[column_name] = 0
 
-               textbox_at_y1_x1 = textboxes_at_y1[key_x1]    
+            else:
 
-               if len(textbox_at_y1_x1.text.strip()) == 0:
-                  continue
+               # Is close to previous 
+               if previous_key_y1 != -1 and abs(key_y1-previous_key_y1) < lineitem_columns_closeness:
 
-               found_column = False
-
-               if has_vertical_lines == True:
-                  nearest_x0 = -1
-                  nearest_x1 = -1
-
-                  rows_of_vertical_lines = container_instance.pagewise_rows_of_vertical_lines[page_number]
-                  for key_x in list(rows_of_vertical_lines):
-                     lines_at_x = rows_of_vertical_lines[key_x]
-                     for key_y0 in list(lines_at_x):
-                        line_at_x_y0 = lines_at_x[key_y0]
-
-                        # Check if vertical_line_value y0 and y1 is in between text y0 and y1
-                        if line_at_x_y0.y0 <= textbox_at_y1_x1.y0 and ( line_at_x_y0.y1 >= textbox_at_y1_x1.y1 or \
-                           (line_at_x_y0.y1 >= textbox_at_y1_x1.y0 and line_at_x_y0.y1 <= textbox_at_y1_x1.y1)):
-                           if nearest_x0 == -1:
-                              if key_x <= textbox_at_y1_x1.x0:
-                                 nearest_x0 = key_x
-                           else:
-                              if key_x <= textbox_at_y1_x1.x0 and key_x > nearest_x0:
-                                 nearest_x0 = key_x
-                           if nearest_x1 == -1:
-                              if key_x > textbox_at_y1_x1.x1:
-                                 nearest_x1 = key_x
-                           else:
-                              if key_x <= textbox_at_y1_x1.x1 and key_x > nearest_x1:
-                                 nearest_x1 = key_x
-
-                  column_name_to_add = ""
-                  text_to_add_to_column = ""
-                  logger.debug('NEAREST ' + textbox_at_y1_x1.text + ' x0=' + str(nearest_x0) + ' x1=' + str(nearest_x1))
-                  if nearest_x0 != -1 and nearest_x1 != -1 :
-                     for column_name, textbox in list(dict_column_text_widths.items()):
-                        if textbox.x0 >= nearest_x0 and textbox.x1 <= nearest_x1:
-                           column_name_to_add = column_name
-                           text_to_add_to_column = textbox_at_y1_x1.text
-                           found_column = True
-                           break
-                  elif nearest_x1 != -1:
-                     first_column_name = list_of_column_information[0].column_name
-                     second_column_name = list_of_column_information[1].column_name
-                     first_textbox = dict_column_text_widths[first_column_name]
-                     second_textbox = dict_column_text_widths[second_column_name]
-                     if nearest_x1 >= first_textbox.x1 and nearest_x1 <= second_textbox.x1:
-                        column_name_to_add = first_column_name
-                        text_to_add_to_column = textbox_at_y1_x1.text
-                        found_column = True
-                  logger.debug('TEXT = ' + text_to_add_to_column + ' COLUMN = ' + column_name_to_add)                        
-                  if found_column == True:
-                     text = one_row_of_line_item.get(column_name_to_add)
-                     if text == None:
-                        text = text_to_add_to_column
-                     else:
-                        text = text + "\n" + text_to_add_to_column
-                     one_row_of_line_item[column_name_to_add] = text     
-               
-               # Try the bucketizing algorithm
-               if found_column == False:
-                  counter = current_column_index
-                  while counter < len(list_of_column_information):
-                     found_column = False                     
-                     column = list_of_column_information[counter]
-                     column_textbox = dict_column_text_widths[column.name]
-                     if column.alignment == "left":
-                        x_start = column_textbox.x0 - alignment_margin
-                        x_end = column_textbox.x0 + alignment_margin
-                        if textbox_at_y1_x1.x0 >= x_start and textbox_at_y1_x1.x0 <= x_end:
-                           found_column = True
-                     elif column.alignment == "right":
-                        x_start = column_textbox.x1 - alignment_margin
-                        x_end = column_textbox.x1 + alignment_margin
-                        if textbox_at_y1_x1.x1 >= x_start and textbox_at_y1_x1.x1 <= x_end:
-                           found_column = True                           
-                     elif column.alignment == "center":
-                        if textbox_at_y1_x1.x0 >= column_textbox.x0 and textbox_at_y1_x1.x0 <= column_textbox.x1 or \
-                           textbox_at_y1_x1.x1 >= column_textbox.x0 and textbox_at_y1_x1.x1 <= column_textbox.x1:
-                           found_column = True
-                        elif textbox_at_y1_x1.x0 < column_textbox.x0 and textbox_at_y1_x1.x1 > column_textbox.x1:
-                           found_column = True
-                     else:
-                        logger.error("ERROR!! Unsupported alignment type " + column.alignment)                        
-                        return {}
-
-                     if found_column == True:
-                        found_multi_column_text = False                        
-                        # Check if the text extends to the next column
-                        if (counter+1) < len(list_of_column_information) and column.can_extend_text_to_neighbour == True:
-                           next_column = list_of_column_information[counter+1]
-                           next_column_textbox = dict_column_text_widths[next_column.name]
-                           if column.alignment == next_column.alignment:
-                              if next_column_textbox.x0 > textbox_at_y1_x1.x0 and next_column_textbox.x1 <= textbox_at_y1_x1.x1:
-                                 logger.info("Text |" +textbox_at_y1_x1.text + "| extends to column " + next_column.name)
-                                 if column.alignment == "center":
-                                    text_to_process = textbox_at_y1_x1.text
-                                    mid_point = column_textbox.x1 + (next_column_textbox.x0 - column_textbox.x1)/2
-                                    len_text = len(text_to_process)
-                                    char_width = (textbox_at_y1_x1.x1 - textbox_at_y1_x1.x0)/len_text
-                                    start_index = int((mid_point - textbox_at_y1_x1.x0)/char_width)
-                                    text_traversal_index = 0
-                                    while found_multi_column_text == False:
-                                       before_index = start_index - text_traversal_index
-                                       after_index = start_index + text_traversal_index
-                                       reference_index = -1
-                                       if before_index > 0 and text_to_process[before_index] == ' ':
-                                          reference_index = before_index
-                                          found_multi_column_text = True
-                                       elif after_index < len_text and text_to_process[after_index] == ' ':
-                                          reference_index = after_index
-                                          found_multi_column_text = True
-                                       if found_multi_column_text == True:
-                                          column_text = text_to_process[0:reference_index]
-                                          text = one_row_of_line_item.get(column.name)
-                                          if text == None:
-                                             text = column_text
-                                          else:
-                                             text = text + "\n" + column_text
-                                          one_row_of_line_item[column.name] = text                                           
-                                          next_column_text = text_to_process[reference_index+1:]
-                                          text = one_row_of_line_item.get(next_column.name)
-                                          if text == None:
-                                             text = next_column_text
-                                          else:
-                                             text = text + "\n" + next_column_text
-                                          one_row_of_line_item[next_column.name] = text                                            
-
-                                       text_traversal_index += 1
-
-                        if found_multi_column_text == False:
-                           text = one_row_of_line_item.get(column.name)
-                           if text == None:
-                              text = textbox_at_y1_x1.text
-                           else:
-                              text = text + "\n" + textbox_at_y1_x1.text
-                           one_row_of_line_item[column.name] = text  
-
-                        current_column_index = counter + 1
-                        break                       
-
-                     counter +=1 
-
-               if found_column == False:
-                  ignore_textbox = False
-                  # First check if this column falls extreme left before even the first column starts, so that we can ignore it
-                  first_column = list_of_column_information[0]
-                  if first_column.alignment == 'left':
-                     column_textbox = dict_column_text_widths[first_column.name]
-                     if (textbox_at_y1_x1.x0 < column_textbox.x0 and textbox_at_y1_x1.x1 < column_textbox.x0):
-                        logger.info("Ignoring |" +textbox_at_y1_x1.text + "| since its doesn't belong to a line item")
-                        ignore_textbox = True
-
-                  if ignore_textbox == False:
-                     logger.warn("WARNING! Trying to fit since could not find column for text |" + textbox_at_y1_x1.text + "|")                     
-                     counter = 0
-                     while counter < len(list_of_column_information):
-                        column = list_of_column_information[counter]
-                        column_textbox = dict_column_text_widths[column.name]
-                        if (textbox_at_y1_x1.x0 >= column_textbox.x0 and textbox_at_y1_x1.x0 <= column_textbox.x1) or \
-                           (textbox_at_y1_x1.x0 <= column_textbox.x0):
-                           logger.debug("Found column |" + column.name + "| for text |" + textbox_at_y1_x1.text + "|")
-                           text = one_row_of_line_item.get(column.name)
-                           if text == None:
-                              text = textbox_at_y1_x1.text
-                           else:
-                              text = text + "\n" + textbox_at_y1_x1.text
-                           one_row_of_line_item[column.name] = text                         
-                           break
-                        counter += 1
-
-            if has_horizontal_lines == False:
-
-               # if One Row has all the row_start columns
-               found_all_row_start_columns = True
-               for column in list_of_column_information:
-                  if column.row_start == True and one_row_of_line_item.get(column.name) == None:
-                        found_all_row_start_columns = False
-                        break    
-
-               if found_all_row_start_columns == True:
-
-                  # Flush the contents of list_of_mapdata
-                  one_line_item_collector = {}
-                  for counter, one_mapdata in enumerate(list_of_mapdata):
-                     if counter <= line_start_index :
-                        # Just copy the one_mapdata row to the collector
-                        for column_name in one_mapdata:
-                           text = one_line_item_collector.get(column_name)
-                           if text == None:
-                              text = one_mapdata[column_name]
-                           else:
-                              text = text + "\n" + one_mapdata[column_name]
-                           one_line_item_collector[column_name] = text 
-                  if len(one_line_item_collector) > 0 :
-                     self._append_table_lineitem(list_of_column_information, list_of_line_items,one_line_item_collector)
-                  del list_of_mapdata[0:line_start_index+1]
-
-                  # Add the new row to list_of_mapdata
+                  # Add the new row to the list
                   list_of_mapdata.append(deepcopy(one_row_of_line_item))
-                  
-                  # Remember till where the list has to be flushed
-                  line_start_index = len(list_of_mapdata) - 1
+                  counters["deepcopies"] += 1
+
+                  # Set what all columns were found
+                  for column_name in one_row_of_line_item:
+                     map_row_start_col_collection_status[column_name] = 1
 
-                  # Clear the map status
+                  # Now if found all row_start columns
+                  found_all_row_start = True
                   for column_name in map_row_start_col_collection_status:
-                     map_row_start_col_collection_status[column_name] = 0
+                     if map_row_start_col_collection_status[column_name] == 0:
+                        found_all_row_start = False
+                        break
+
+                  # If all row_start found
+                  if found_all_row_start == True:
+                     # Flush the contents of list_of_mapdata
+
+                     one_line_item_collector = {}
+                     for counter, one_mapdata in enumerate(list_of_mapdata):
+                        if counter < line_start_index :
+                           # Just copy the one_mapdata row to the collector
+                           for column_name in one_mapdata:
+                              text = one_line_item_collector.get(column_name)
+                              if text == None:
+                                 text = one_mapdata[column_name]
+                              else:
+                                 text = text + "\n" + one_mapdata[column_name]
+                              one_line_item_collector[column_name] = text 
+                     if len(one_line_item_collector) > 0 :
+                        self._append_table_lineitem(list_of_column_information, list_of_line_items,one_line_item_collector)
+                     del list_of_mapdata[0:line_start_index]
+
+                     # Remember till where the list has to be flushed
+                     line_start_index = len(list_of_mapdata)
+                     
+                  else:
+                     # Not all row_start found
+                     pass
 
                else:
+                  # Not close to previous 
 
-                  # Is close to previous 
-                  if previous_key_y1 != -1 and abs(key_y1-previous_key_y1) < lineitem_columns_closeness:
-
-                     # Add the new row to the list
-                     list_of_mapdata.append(deepcopy(one_row_of_line_item))
-
-                     # Set what all columns were found
-                     for column_name in one_row_of_line_item:
-                        map_row_start_col_collection_status[column_name] = 1
-
-                     # Now if found all row_start columns
-                     found_all_row_start = True
-                     for column_name in map_row_start_col_collection_status:
-                        if map_row_start_col_collection_status[column_name] == 0:
-                           found_all_row_start = False
-                           break
-
-                     # If all row_start found
-                     if found_all_row_start == True:
-                        # Flush the contents of list_of_mapdata
-
-                        one_line_item_collector = {}
-                        for counter, one_mapdata in enumerate(list_of_mapdata):
-                           if counter < line_start_index :
-                              # Just copy the one_mapdata row to the collector
-                              for column_name in one_mapdata:
-                                 text = one_line_item_collector.get(column_name)
-                                 if text == None:
-                                    text = one_mapdata[column_name]
-                                 else:
-                                    text = text + "\n" + one_mapdata[column_name]
-                                 one_line_item_collector[column_name] = text 
-                        if len(one_line_item_collector) > 0 :
-                           self._append_table_lineitem(list_of_column_information, list_of_line_items,one_line_item_collector)
-                        del list_of_mapdata[0:line_start_index]
-
-                        # Remember till where the list has to be flushed
-                        line_start_index = len(list_of_mapdata)
-                        
-                     else:
-                        # Not all row_start found
-                        pass
-
-                  else:
-                     # Not close to previous 
-
-                     # First clear the map status
-                     for column_name in map_row_start_col_collection_status:
-                        map_row_start_col_collection_status[column_name] = 0
+                  # First clear the map status
+                  for column_name in map_row_start_col_collection_status:
+                     map_row_start_col_collection_status[column_name] = 0
 
-                     # Set what all columns were found
-                     for column_name in one_row_of_line_item:
-                        map_row_start_col_collection_status[column_name] = 1
+                  # Set what all columns were found
+                  for column_name in one_row_of_line_item:
+                     map_row_start_col_collection_status[column_name] = 1
 
-                     # Add the new row to the list
-                     list_of_mapdata.append(deepcopy(one_row_of_line_item))
+                  # Add the new row to the list
+                  list_of_mapdata.append(deepcopy(one_row_of_line_item))
+                  counters["deepcopies"] += 1
 
-                     line_start_index = len(list_of_mapdata) -1 
+                  line_start_index = len(list_of_mapdata) -1 
 
-            else:
+         else:
 
-               # Just copy the current row to the collector
-               for column_name in one_row_of_line_item:
-                  text = line_item_collector.get(column_name)
-                  if text == None:
-                     text = one_row_of_line_item[column_name]
-                  else:
-                     text = text + "\n" + one_row_of_line_item[column_name]
-                  line_item_collector[column_name] = text 
-     
-               # If the next text line has a horizontal line, complete a line item
-               if (row_number+1) < len(list_reversed_rows_of_y1_textboxes):
-                  next_key_y1 = list_reversed_rows_of_y1_textboxes[row_number+1]
-                  horizontal_lines = container_instance.pagewise_rows_of_horizontal_lines[page_number]
-                  for horizontal_line in horizontal_lines:
-                     if horizontal_line >= next_key_y1 and horizontal_line <= key_y1 and abs(next_key_y1-key_y1) >= horizontal_line_margin:
-                        if len(line_item_collector) > 0 :
-                           self._append_table_lineitem(list_of_column_information, list_of_line_items,line_item_collector)
-                           line_item_collector = {}    
-                        break 
-
-            previous_key_y1 = key_y1                                   
+            # Just copy the current row to the collector
+            for column_name in one_row_of_line_item:
+               text = line_item_collector.get(column_name)
+               if text == None:
+                  text = one_row_of_line_item[column_name]
+               else:
+                  text = text + "\n" + one_row_of_line_item[column_name]
+               line_item_collector[column_name] = text 
+  
+            # If the next text line has a horizontal line, complete a line item
+            row_index = rows_of_y1_textboxes.bisect_left(key_y1)
+            if row_index > 0:
+               next_key_y1 = rows_of_y1_textboxes.keys()[row_index-1]
+               if abs(next_key_y1-key_y1) >= horizontal_line_margin and table_grid.has_row_separator(next_key_y1, key_y1):
+                  if len(line_item_collector) > 0 :
+                     self._append_table_lineitem(list_of_column_information, list_of_line_items,line_item_collector)
+                     line_item_collector = {}    
+
+         previous_key_y1 = key_y1                                   
 
       return list_of_line_items
 
@@ -838,93 +941,80 @@ class ObjectLayoutAlgorithms:
 
    def get_regex_lineitem_header_location (self, lineitem_header_regex):
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
 
       if container_instance.pdf_parsed == False :
          return -1, -1
 
       lineitems_start_location = -1
       lineitems_start_page_location = -1
-
-      for index, rows_of_y1_textboxes in enumerate(container_instance.pagewise_rows_of_y1_textboxes):
-         for key_y1 in list(reversed(rows_of_y1_textboxes)):  
-            textboxes_at_y1 = rows_of_y1_textboxes[key_y1]
-            for key_x1 in list(textboxes_at_y1):
-               textbox_at_y1_x1 = textboxes_at_y1[key_x1]
-               text_to_compare = textbox_at_y1_x1.text
-               regex_search = re.search(lineitem_header_regex, text_to_compare) 
-               if regex_search is not None:
-                  lineitems_start_location = key_y1 
-                  lineitems_start_page_location = index
-                  return lineitems_start_page_location, lineitems_start_location
+      lineitem_header_regex = re.compile(lineitem_header_regex)
+      counters = self._metrics.counters
+
+      for index, key_y1, textboxes_at_y1 in container_instance.iterate_rows_of_y1_textboxes():
+         for textbox_at_y1_x1 in textboxes_at_y1.values():
+            text_to_compare = textbox_at_y1_x1.text
+            counters["textboxes_scanned"] += 1
+            counters["regex_evaluations"] += 1
+            regex_search = lineitem_header_regex.search(text_to_compare) 
+            if regex_search is not None:
+               lineitems_start_location = key_y1 
+               lineitems_start_page_location = index
+               return lineitems_start_page_location, lineitems_start_location
 
       return lineitems_start_page_location, lineitems_start_location          
 
-   def get_regex_lineitems(self, regex_lines, list_of_columns, lineitems_start_page_location, lineitems_start_location, \
+   def get_regex_lineitems(self, regex_lineitem_program, lineitems_start_page_location, lineitems_start_location, \
       lineitems_end_page_location, lineitems_end_location):
 
-      container_instance = ObjectLayoutContainer.getInstance()
+      container_instance = self._container
 
       if container_instance.pdf_parsed == False :
          return []
 
       list_of_line_items = []
+      line_regexes = regex_lineitem_program.line_regexes
+      line_groups = regex_lineitem_program.line_groups
+      start_regex = line_regexes[0]
+      start_groups = line_groups[0]
         
       prev_one_row_data = collections.OrderedDict()
+      # The line pattern expected next for the current line item, past the last one when it is complete
       last_index = 1
+      counters = self._metrics.counters
       
-      # Traverse all the pages
-      for page_number, rows_of_y1_textboxes in enumerate(container_instance.pagewise_rows_of_y1_textboxes):
+      # Traverse the rows from the start location down to the end location, top to bottom
+      for page_number, key_y1, textboxes_at_y1 in container_instance.iterate_rows_of_y1_textboxes(lineitems_start_page_location, \
+         lineitems_start_location, lineitems_end_page_location, lineitems_end_location):
 
-         # Look at only pages from start to end. Others discard
-         if page_number < lineitems_start_page_location:
-            continue
-            
-         if page_number > lineitems_end_page_location:
+         if page_number == lineitems_end_page_location and ( key_y1 >= (lineitems_end_location-5) and key_y1 <= (lineitems_end_location+5) ):
             break
 
-         # Traverse through all the rows in the current page
-         list_reversed_rows_of_y1_textboxes = list(reversed(rows_of_y1_textboxes))
-         for key_y1 in list_reversed_rows_of_y1_textboxes:    
-
-            if page_number == lineitems_start_page_location and lineitems_start_location <= key_y1:
-               continue
-
-            if page_number == lineitems_end_page_location and ( key_y1 >= (lineitems_end_location-5) and key_y1 <= (lineitems_end_location+5) ):
-               break
-
-            textboxes_at_y1 = rows_of_y1_textboxes[key_y1]
-            for key_x1 in list(textboxes_at_y1):
-               textbox_at_y1_x1 = textboxes_at_y1[key_x1]              
-               text_to_compare = textbox_at_y1_x1.text
-               regex_search = re.search(regex_lines[0], text_to_compare) 
-               if regex_search is not None:
-                  last_index = 1
-                  if len(prev_one_row_data) > 0 :
-                     list_of_line_items.append(prev_one_row_data)
-                     prev_one_row_data = collections.OrderedDict()
-                  for column_name in list_of_columns:
-                     try:
-                        column_value = regex_search.group(column_name)
-                        prev_one_row_data[column_name] = column_value                         
-                     except IndexError:
-                        pass
-               else:
-                  if last_index < len(regex_lines):
-                        regex_search_next = re.search(regex_lines[last_index], text_to_compare) 
-                        if regex_search_next is not None:
-                           for column_name in list_of_columns:
-                              try:
-                                    column_value = regex_search_next.group(column_name)
-                                    text = prev_one_row_data.get(column_name)
-                                    if text == None:
-                                       text = column_value
-                                    else:
-                                       text = text + "\n" + column_value
-                                    prev_one_row_data[column_name] = text 
-                              except IndexError:
-                                    pass
-                           last_index = last_index + 1
+         for textbox_at_y1_x1 in textboxes_at_y1.values():
+            text_to_compare = textbox_at_y1_x1.text
+            counters["textboxes_scanned"] += 1
+            counters["regex_evaluations"] += 1
+            regex_search = start_regex.search(text_to_compare) 
+            if regex_search is not None:
+               last_index = 1
+               if len(prev_one_row_data) > 0 :
+                  list_of_line_items.append(prev_one_row_data)
+                  prev_one_row_data = collections.OrderedDict()
+               for column_name, group_number in start_groups:
+                  prev_one_row_data[column_name] = regex_search.group(group_number)
+            elif last_index < len(line_regexes):
+               counters["regex_evaluations"] += 1
+               regex_search_next = line_regexes[last_index].search(text_to_compare) 
+               if regex_search_next is not None:
+                  for column_name, group_number in line_groups[last_index]:
+                     column_value = regex_search_next.group(group_number)
+                     text = prev_one_row_data.get(column_name)
+                     if text == None:
+                        text = column_value
+                     else:
+                        text = text + "\n" + column_value
+                     prev_one_row_data[column_name] = text 
+                  last_index = last_index + 1
                
       if len(prev_one_row_data) > 0 :
          list_of_line_items.append(prev_one_row_data)
@@ -10,88 +10,167 @@ import logging
 from logging.handlers import TimedRotatingFileHandler
 import os
 import errno
+import multiprocessing
 
 from Logger import Logger
-from copy import deepcopy
 
 from ConfigManager import ConfigManager
-
-from pdfminer.pdfparser import PDFParser
-from pdfminer.pdfdocument import PDFDocument
-from pdfminer.pdfpage import PDFPage
-from pdfminer.pdfpage import PDFTextExtractionNotAllowed
-from pdfminer.pdfinterp import PDFResourceManager
-from pdfminer.pdfinterp import PDFPageInterpreter
-from pdfminer.pdfdevice import PDFDevice
-from pdfminer.layout import LAParams
-from pdfminer.converter import PDFPageAggregator
-import pdfminer
+from SpatialIndex import PageSpatialIndex
+from TableGrid import PageTableGrid
+from LayoutCache import LayoutCache
+import LayoutBackend
 
 from sortedcontainers import SortedDict, SortedList
 
-class TextBox:
-  def __init__(self, x0, y0, x1, y1, text):
-    self.x0 = x0
-    self.y0 = y0
-    self.x1 = x1
-    self.y1 = y1
-    self.text = text
-
-class HorizontalLine:
-  def __init__(self, y, x0, x1):
-    self.y = y
-    self.x0 = x0
-    self.x1 = x1
-
-class VerticalLine:
-  def __init__(self, x, y0, y1, src):
-    self.x = x
-    self.y0 = y0
-    self.y1 = y1
-    self.src = src
+class PageLayout:
+  __slots__ = ("textboxes", "rows_of_y0_textboxes", "rows_of_y1_textboxes", "rows_of_horizontal_lines", "rows_of_vertical_lines", \
+    "text_index", "normalized_text_index", "spatial_index", "table_grid")
+  def __init__(self, textboxes, rows_of_horizontal_lines, rows_of_vertical_lines):
+    # Each textbox is stored once, in the order found. The rows and indexes refer to these same objects.
+    self.textboxes = textboxes
+    self.rows_of_y0_textboxes = None
+    self.rows_of_y1_textboxes = None
+    self.rows_of_horizontal_lines = rows_of_horizontal_lines
+    self.rows_of_vertical_lines = rows_of_vertical_lines
+    # Built the first time they are looked up, see PagewiseView. Most pages are only ever scanned by rows.
+    self.text_index = None
+    self.normalized_text_index = None
+    self.spatial_index = None
+    # Built when a ruled table is looked for on the page, see ObjectLayoutContainer.get_table_grid
+    self.table_grid = None
+
+class PagewiseView:
+   """ Read only, list like view of one structure of every page. Pages are parsed when first accessed, and the structure
+   built by build(page) if the page does not have it yet. """
+
+   __slots__ = ("_container", "_attribute", "_build")
+
+   def __init__(self, container, attribute, build = None):
+      self._container = container
+      self._attribute = attribute
+      self._build = build
+
+   def _get(self, page):
+      value = getattr(page, self._attribute)
+      if value is None and self._build is not None:
+         value = self._build(page)
+      return value
+
+   def __len__(self):
+      self._container.load_all_pages()
+      return len(self._container.pages)
+
+   def __getitem__(self, page_number):
+      if isinstance(page_number, slice) or page_number < 0:
+         self._container.load_all_pages()
+      else:
+         self._container.load_page(page_number)
+      if isinstance(page_number, slice):
+         return [self._get(page) for page in self._container.pages[page_number]]
+      return self._get(self._container.pages[page_number])
+
+   def __iter__(self):
+      page_number = 0
+      while self._container.load_page(page_number):
+         yield self._get(self._container.pages[page_number])
+         page_number = page_number + 1
+
+def normalize_text(text):
+   """ Case and whitespace insensitive form of the text. """
+   return " ".join(text.split()).casefold()
 
 class ObjectLayoutContainer:
 
    __instance = None
-   _pdf_parsed = False
-   _pagewise_rows_of_y0_textboxes = []
-   _pagewise_rows_of_y1_textboxes = []
-   _pagewise_rows_of_horizontal_lines = []
-   _pagewise_rows_of_vertical_lines = []   
+   # Process wide parse settings, see set_parse_workers
+   _parse_workers = None
+   _parallel_parse_min_pages = None
+   _layout_backend_name = None
 
    @staticmethod 
    def getInstance():
-      """ Static access method. """
+      """ Static access method. The process wide container, for callers without an ExtractionContext. """
       if ObjectLayoutContainer.__instance == None:
-         ObjectLayoutContainer()
+         ObjectLayoutContainer.__instance = ObjectLayoutContainer()
       return ObjectLayoutContainer.__instance
 
    def __init__(self):
-      """ Virtually private constructor. """
-      if ObjectLayoutContainer.__instance != None:
-         raise Exception("Error! Internal error ObjectLayoutContainer is a singleton.")
-      else:
-         ObjectLayoutContainer.__instance = self
+      """ An empty container. Each document being extracted has its own. """
+      self._layout_backend = None
+      self.reset()
+
+   def reset(self):
+      """ Discard the parsed pdf, so that the next pdf can be parsed by the same instance. """
+      self._pdf_parsed = False
+      self._close_pdf()
+      self._pages = []
+      self._cache_key = None
+      # Pages that came from the layout cache and the pdf pages they were parsed from, see _store_layout
+      self._cached_page_count = 0
+      self._source_page_count = 0
+      # (pdf, layout backend) of a partly cached layout, opened when a page beyond the cached ones is needed
+      self._pending_layout = None
 
    @property
    def pdf_parsed(self):
       return self._pdf_parsed
 
+   @property
+   def pages(self):
+      """ Pages parsed so far. """
+      return self._pages
+
    @property
    def pagewise_rows_of_y0_textboxes(self):
-      return self._pagewise_rows_of_y0_textboxes
+      return PagewiseView(self, "rows_of_y0_textboxes")
       
    @property
    def pagewise_rows_of_y1_textboxes(self):
-      return self._pagewise_rows_of_y1_textboxes
+      return PagewiseView(self, "rows_of_y1_textboxes")
 
    @property
    def pagewise_rows_of_horizontal_lines(self):
-      return self._pagewise_rows_of_horizontal_lines
+      return PagewiseView(self, "rows_of_horizontal_lines")
 
    @property
    def pagewise_rows_of_vertical_lines(self):
-      return self._pagewise_rows_of_vertical_lines
+      return PagewiseView(self, "rows_of_vertical_lines")
+
+   @property
+   def pagewise_text_index(self):
+      return PagewiseView(self, "text_index", self._build_text_index)
+
+   @property
+   def pagewise_normalized_text_index(self):
+      return PagewiseView(self, "normalized_text_index", self._build_normalized_text_index)
+
+   @property
+   def pagewise_spatial_index(self):
+      return PagewiseView(self, "spatial_index", self._build_spatial_index)
+
+   def iterate_rows_of_y1_textboxes(self, start_page = 0, start_y = None, end_page = None, end_y = None):
+      """ (page number, y1, SortedDict x1 -> TextBox) of the rows from start_page to end_page, top to bottom. On start_page
+      only the rows below start_y, on end_page only those down to end_y, included. None for no bound. The rows are looked up
+      by y, and the pages parsed, as the iteration reaches them. """
+
+      page_number = max(start_page, 0)
+      while (end_page == None or page_number <= end_page) and self.load_page(page_number):
+         rows_of_y1_textboxes = self._pages[page_number].rows_of_y1_textboxes
+         max_y1 = start_y if page_number == start_page else None
+         min_y1 = end_y if page_number == end_page else None
+         for key_y1 in rows_of_y1_textboxes.irange(min_y1, max_y1, inclusive=(True, False), reverse=True):
+            yield page_number, key_y1, rows_of_y1_textboxes[key_y1]
+         page_number += 1
+
+   def get_table_grid(self, page_number):
+      """ Grid of the ruling lines of the page, built the first time it is asked for. None if there is no such page. """
+
+      if self.load_page(page_number) == False:
+         return None
+      page = self._pages[page_number]
+      if page.table_grid == None:
+         page.table_grid = PageTableGrid(page.rows_of_horizontal_lines, page.rows_of_vertical_lines)
+      return page.table_grid
 
    def parse_pdf(self, pdf_file_name_with_path, text_dump_filename):
 
@@ -100,213 +179,263 @@ class ObjectLayoutContainer:
       if self._pdf_parsed == True:
          raise Exception('Error! PDF already parsed and loaded.')
 
-      # Open a PDF file.
-      fp = open(pdf_file_name_with_path, 'rb')
+      layout_backend = LayoutBackend.create_layout_backend(self._layout_backend_name)
 
-      # Create a PDF parser object associated with the file object.
-      parser = PDFParser(fp)
+      # Reuse the layout of a pdf parsed earlier with the same settings
+      layout_cache = LayoutCache.getInstance()
+      cache_key = layout_cache.get_key(pdf_file_name_with_path, layout_backend.get_settings())
+      cached_layout = layout_cache.load(cache_key)
 
-      # Create a PDF document object that stores the document structure.
-      # Password for initialization as 2nd parameter
-      document = PDFDocument(parser)
+      if cached_layout is None:
+         # Pages are parsed only when an algorithm first needs them
+         self._cache_key = cache_key
+         self._open_layout(pdf_file_name_with_path, layout_backend)
+      else:
+         list_page_layouts, source_page_count, complete = cached_layout
+         for list_textboxes, list_horizontal_lines, list_vertical_lines in list_page_layouts:
+            self._add_pages([LayoutBackend.build_page_objects(list_textboxes, list_horizontal_lines, list_vertical_lines)])
+         # Parsing stopped early the last time, the rest of the pages are parsed from where it stopped
+         if complete == False:
+            self._cache_key = cache_key
+            self._cached_page_count = len(self._pages)
+            self._source_page_count = source_page_count
+            self._pending_layout = (pdf_file_name_with_path, layout_backend)
 
-      # Check if the document allows text extraction. If not, abort.
-      if not document.is_extractable:
-         raise PDFTextExtractionNotAllowed
+      self._dump_data_structures()
 
-      # Create a PDF resource manager object that stores shared resources.
-      rsrcmgr = PDFResourceManager()
+      if text_dump_filename is not None:
+         self._dump_text(text_dump_filename)
 
-      # Create a PDF device object.
-      device = PDFDevice(rsrcmgr)
+      # If things came till here, successful parse
+      self._pdf_parsed = True
 
-      # BEGIN LAYOUT ANALYSIS
-      # Set parameters for analysis.
-      laparams = LAParams()
+   def load_page(self, page_number):
+      """ Parse pages till the given page is available. False if the document has fewer pages. """
+
+      while page_number >= len(self._pages):
+         if self._parse_next_layout() == False:
+            return False
+      return True
+
+   def load_all_pages(self):
+
+      while self._parse_next_layout() == True:
+         pass
+
+   def set_parse_workers(self, parse_workers, parallel_parse_min_pages = None):
+      """ Overrides the configured parse settings, for every container in the process. """
+      ObjectLayoutContainer._parse_workers = parse_workers
+      ObjectLayoutContainer._parallel_parse_min_pages = parallel_parse_min_pages
+
+   def set_layout_backend(self, layout_backend_name):
+      """ Overrides the configured layout backend, for every container in the process. """
+      ObjectLayoutContainer._layout_backend_name = layout_backend_name
+
+   def save_layout_snapshot(self, snapshot_file_name):
+      """ Record the layout of every page, to be replayed by the replay layout backend. """
+      self.load_all_pages()
+      LayoutBackend.write_layout_snapshot(self._pages, snapshot_file_name)
+
+   def _get_parse_workers(self):
+
+      parse_workers = self._parse_workers
+      if parse_workers == None:
+         configMgr = ConfigManager.getInstance()
+         parse_workers = int(configMgr.get("object_layout_container","parse_workers",1))
+
+      if parse_workers <= 0:
+         parse_workers = os.cpu_count() or 1
+
+      # Worker processes of a batch are daemons, which can't have a pool of their own
+      if multiprocessing.current_process().daemon == True:
+         parse_workers = 1
+
+      return parse_workers
+
+   def _open_layout(self, pdf_file_name_with_path, layout_backend, first_page = 0):
+
+      # The document is kept open till all the pages are parsed or the container is reset
+      layout_backend.open(pdf_file_name_with_path)
+
+      try:
+         # Long documents are parsed up front, page ranges spread over a pool of processes
+         parse_workers = self._get_parse_workers()
+         if parse_workers > 1:
+            parallel_parse_min_pages = self._parallel_parse_min_pages
+            if parallel_parse_min_pages == None:
+               configMgr = ConfigManager.getInstance()
+               parallel_parse_min_pages = int(configMgr.get("object_layout_container","parallel_parse_min_pages",16))
+            page_count = layout_backend.count_pages()
+            if page_count != None and page_count - first_page >= parallel_parse_min_pages:
+               layout_backend.close()
+               self._parse_layout_in_parallel(pdf_file_name_with_path, layout_backend, first_page, page_count, parse_workers)
+               self._source_page_count = page_count
+               self._finish_parsing()
+               return
+         # Past the pages that came from the layout cache
+         layout_backend.skip_pages(first_page)
+      except:
+         layout_backend.close()
+         raise
+
+      self._layout_backend = layout_backend
+
+   def _parse_next_layout(self):
+      """ Parse the next page of the pdf. False once all the pages are parsed. """
+
+      if self._pending_layout != None:
+         page_count = len(self._pages)
+         pdf_file_name_with_path, layout_backend = self._pending_layout
+         self._pending_layout = None
+         self._open_layout(pdf_file_name_with_path, layout_backend, self._source_page_count)
+         # The rest of the pages may have been parsed in parallel
+         if self._layout_backend == None:
+            return len(self._pages) > page_count
+
+      if self._layout_backend == None:
+         return False
+
+      try:
+         list_page_objects = self._layout_backend.next_page_objects()
+         if list_page_objects is not None:
+            self._add_pages(list_page_objects)
+            self._source_page_count = self._source_page_count + 1
+      except:
+         # Pages of a failed parse are not cached
+         self._cache_key = None
+         self._close_pdf()
+         raise
+
+      if list_page_objects is None:
+         self._finish_parsing()
+         return False
+
+      return True
+
+   def _parse_layout_in_parallel(self, pdf_file_name_with_path, layout_backend, first_page, page_count, parse_workers):
+
+      # Contiguous page ranges, a couple per worker so that a slow range does not hold up the others
+      range_page_count = page_count - first_page
+      range_count = min(range_page_count, parse_workers * 2)
+      list_jobs = []
+      for range_number in range(range_count):
+         start_page = first_page + (range_page_count * range_number) // range_count
+         end_page = first_page + (range_page_count * (range_number+1)) // range_count
+         list_jobs.append((layout_backend, pdf_file_name_with_path, start_page, end_page))
+
+      Logger.getLogger().info("Parsing %d pages in %d ranges using %d workers", range_page_count, range_count, parse_workers)
+
+      # Results come back in the order of the ranges, i.e. the same page order as parsing sequentially
+      with multiprocessing.Pool(processes=min(parse_workers, range_count)) as pool:
+         for list_page_objects in pool.map(ObjectLayoutContainer._parse_page_range, list_jobs):
+            self._add_pages(list_page_objects)
+
+   @staticmethod
+   def _parse_page_range(job):
+      """ Runs in a worker process. Objects of the pages from start_page till (not including) end_page. """
+
+      layout_backend, pdf_file_name_with_path, start_page, end_page = job
+      return layout_backend.parse_page_range(pdf_file_name_with_path, start_page, end_page)
+
+   def _add_pages(self, list_page_objects):
+
+      for textboxes, rows_of_horizontal_lines, rows_of_vertical_lines in list_page_objects:
+         self._pages.append(self._build_page(textboxes, rows_of_horizontal_lines, rows_of_vertical_lines))
+
+   def _finish_parsing(self):
+
+      # All the pages are parsed, keep them for the next time
+      self._close_pdf()
+      self._perform_sanity_check()
+      self._store_layout(True)
 
-      # Create a PDF page aggregator object.
-      device = PDFPageAggregator(rsrcmgr, laparams=laparams)
+   def _store_layout(self, complete):
 
-      # Create a PDF interpreter object.
-      interpreter = PDFPageInterpreter(rsrcmgr, device)
-         
-      # loop over all pages in the document
-      for page in PDFPage.create_pages(document):
+      # Once per document, when its parsing is done or stopped. Pages parsed early on are cached even if the rest never are,
+      # a later extraction of the document starts from where this one stopped and extends the cache entry.
+      if self._cache_key != None and (complete == True or len(self._pages) > self._cached_page_count):
+         LayoutCache.getInstance().store(self._cache_key, self._pages, self._source_page_count, complete)
+      self._cache_key = None
 
-         # read the page into a layout object
-         interpreter.process_page(page)
-         layout = device.get_result()
+   def close(self):
+      """ Release the pdf file, caching the pages parsed till now. Pages not parsed till now are not available any more. """
+      self._close_pdf()
+      self._pending_layout = None
+      self._store_layout(False)
 
-         # extract text from this object
-         self._parse_obj(layout._objs)
+   def _close_pdf(self):
 
-      self._perform_sanity_check()
+      if self._layout_backend != None:
+         self._layout_backend.close()
+         self._layout_backend = None
 
-      self._dump_data_structures()
+   def _build_page(self, textboxes, rows_of_horizontal_lines, rows_of_vertical_lines):
 
-      if text_dump_filename is not None:
-         self._dump_text(text_dump_filename)
+      page = PageLayout(textboxes, rows_of_horizontal_lines, rows_of_vertical_lines)
 
-      # If things came till here, successful parse
-      self._pdf_parsed = True
+      # y0 and y1 based rows, built in one go over the same textboxes. A later textbox at the same place wins.
+      dict_rows_of_y0_textboxes = {}
+      dict_rows_of_y1_textboxes = {}
+      for textbox in textboxes:
+         textboxes_at_y0 = dict_rows_of_y0_textboxes.get(textbox.y0)
+         if textboxes_at_y0 == None:
+            textboxes_at_y0 = {}
+            dict_rows_of_y0_textboxes[textbox.y0] = textboxes_at_y0
+         textboxes_at_y0[textbox.x0] = textbox
+         textboxes_at_y1 = dict_rows_of_y1_textboxes.get(textbox.y1)
+         if textboxes_at_y1 == None:
+            textboxes_at_y1 = {}
+            dict_rows_of_y1_textboxes[textbox.y1] = textboxes_at_y1
+         textboxes_at_y1[textbox.x1] = textbox
+
+      page.rows_of_y0_textboxes = SortedDict((key_y0, SortedDict(textboxes_at_y0)) for key_y0, textboxes_at_y0 in dict_rows_of_y0_textboxes.items())
+      page.rows_of_y1_textboxes = SortedDict((key_y1, SortedDict(textboxes_at_y1)) for key_y1, textboxes_at_y1 in dict_rows_of_y1_textboxes.items())
+
+      return page
+
+   def _build_text_index(self, page):
+
+      page.text_index = self._index_texts(page.rows_of_y0_textboxes, None)
+      return page.text_index
+
+   def _build_normalized_text_index(self, page):
 
-   def _parse_obj(self, lt_objs):
+      page.normalized_text_index = self._index_texts(page.rows_of_y0_textboxes, normalize_text)
+      return page.normalized_text_index
+
+   def _index_texts(self, rows_of_y0_textboxes, normalize):
+
+      # text -> [TextBox], in the order of a top to bottom, left to right scan
+      text_index = {}
+
+      for key_y0 in reversed(rows_of_y0_textboxes):
+         textboxes_at_y0 = rows_of_y0_textboxes[key_y0]
+         for textbox_at_y0_x0 in textboxes_at_y0.values():
+            text = textbox_at_y0_x0.text
+            if normalize is not None:
+               text = normalize(text)
+            textboxes = text_index.get(text)
+            if textboxes == None:
+               textboxes = []
+               text_index[text] = textboxes
+            textboxes.append(textbox_at_y0_x0)
+
+      return text_index
+
+   def _build_spatial_index(self, page):
 
       configMgr = ConfigManager.getInstance()
-      character_closeness = int(configMgr.get("object_layout_container","character_closeness",2))
-
-      rows_of_y0_textboxes = SortedDict()
-      rows_of_y1_textboxes = SortedDict()
-      rows_of_horizontal_lines = SortedDict()
-      rows_of_vertical_lines = SortedDict()
-
-      prev_TextBox = TextBox(0,0,0,0,"")
-
-      # loop over the object list
-      for obj in lt_objs:
-
-         # if it's a textbox, process text and location
-         if isinstance(obj, pdfminer.layout.LTChar):
-            x0 = obj.bbox[0]
-            y0 = obj.bbox[1]
-            x1 = obj.bbox[2]
-            y1 = obj.bbox[3]
-            if prev_TextBox.y0 == y0 and prev_TextBox.y1 == y1 and (x0 - prev_TextBox.x1) <= character_closeness:
-                prev_TextBox.text += obj.get_text()
-                prev_TextBox.x1 = x1
-            else:
-                # y1 based list
-                textboxes_at_y1 = rows_of_y1_textboxes.get(prev_TextBox.y1)
-                if textboxes_at_y1 == None:
-                   textboxes_at_y1 = SortedDict()
-                textboxes_at_y1[prev_TextBox.x1] = deepcopy(prev_TextBox)
-                rows_of_y1_textboxes[prev_TextBox.y1] = textboxes_at_y1                
-                # y0 based list
-                textboxes_at_y0 = rows_of_y0_textboxes.get(prev_TextBox.y0)
-                if textboxes_at_y0 == None:
-                   textboxes_at_y0 = SortedDict()
-                textboxes_at_y0[prev_TextBox.x0] = deepcopy(prev_TextBox)
-                rows_of_y0_textboxes[prev_TextBox.y0] = textboxes_at_y0                
-                prev_TextBox = TextBox(x0,y0,x1,y1,obj.get_text())        
-
-         elif isinstance(obj, pdfminer.layout.LTTextBoxHorizontal):
-            for o in obj._objs:
-               if isinstance(o, pdfminer.layout.LTTextLineHorizontal):
-                  # Get the (x0,y0) & (x1,y1) co-ordinates of the TextBox
-                  x0 = o.bbox[0]
-                  y0 = o.bbox[1]
-                  x1 = o.bbox[2]
-                  y1 = o.bbox[3]
-
-                  text = o.get_text().rstrip('\n')
-                  # y1 based list
-                  textboxes_at_y1 = rows_of_y1_textboxes.get(y1)
-                  if textboxes_at_y1 == None:
-                     textboxes_at_y1 = SortedDict()
-                  textboxes_at_y1[x1] = TextBox(x0,y0,x1,y1,text)
-                  rows_of_y1_textboxes[y1] = textboxes_at_y1
-                  # y0 based list
-                  textboxes_at_y0 = rows_of_y0_textboxes.get(y0)
-                  if textboxes_at_y0 == None:
-                     textboxes_at_y0 = SortedDict()
-                  textboxes_at_y0[x0] = TextBox(x0,y0,x1,y1,text)
-                  rows_of_y0_textboxes[y0] = textboxes_at_y0
-                   
-         # if it's a line, copy its location
-         elif isinstance(obj, pdfminer.layout.LTLine):
-
-               # Get the (x0,y0) & (x1,y1) co-ordinates of the Line
-               x0 = obj.bbox[0]
-               y0 = obj.bbox[1]
-               x1 = obj.bbox[2]
-               y1 = obj.bbox[3]
-
-               # If its a horizontal line
-               if y0 == y1 :
-                  horizontal_lines_at_y = rows_of_horizontal_lines.get(y0)
-                  if horizontal_lines_at_y == None:
-                     horizontal_lines_at_y = SortedDict()
-                  horizontal_lines_at_y[x0] = HorizontalLine(y0,x0,x1)
-                  rows_of_horizontal_lines[y0] = horizontal_lines_at_y
-               # If its a Vertical line
-               elif x0 == x1:
-                  vertical_lines_at_x = rows_of_vertical_lines.get(x0)
-                  if vertical_lines_at_x == None:
-                     vertical_lines_at_x = SortedDict()
-                  vertical_line_at_x_y0 = vertical_lines_at_x.get(y0)
-                  if vertical_line_at_x_y0 == None:
-                     vertical_lines_at_x[y0] = VerticalLine(x0,y0,y1, "LINE")
-                  else:
-                     if vertical_line_at_x_y0.y1 < y1:
-                        vertical_line_at_x_y0.y1 = y1
-                        vertical_lines_at_x[y0] = vertical_line_at_x_y0
-                  rows_of_vertical_lines[x0] = vertical_lines_at_x                    
-                  
-         # if it's a rectangle, copy its boundaries
-         elif isinstance(obj, pdfminer.layout.LTRect) :
-
-               # Get the (x0,y0) & (x1,y1) co-ordinates of the Line
-               x0 = obj.bbox[0]
-               y0 = obj.bbox[1]
-               x1 = obj.bbox[2]
-               y1 = obj.bbox[3]
-
-               # Convert Rectangle boundaries to horizontal and vertical lines
-               list_hor_lines = [y0,y1]
-               for y in list_hor_lines:
-                  horizontal_lines_at_y = rows_of_horizontal_lines.get(y)
-                  if horizontal_lines_at_y == None:
-                     horizontal_lines_at_y = SortedDict()
-                  horizontal_lines_at_y[x0] = HorizontalLine(y,x0,x1)
-                  rows_of_horizontal_lines[y] = horizontal_lines_at_y
-               list_ver_lines = [x0,x1]
-               for x in list_ver_lines:
-                  vertical_lines_at_x = rows_of_vertical_lines.get(x)
-                  if vertical_lines_at_x == None:
-                     vertical_lines_at_x = SortedDict()
-                  vertical_line_at_x_y0 = vertical_lines_at_x.get(y0)
-                  if vertical_line_at_x_y0 == None:
-                     vertical_lines_at_x[y0] = VerticalLine(x,y0,y1, "RECT")
-                  else:
-                     if vertical_line_at_x_y0.y1 < y1:
-                        vertical_line_at_x_y0.y1 = y1
-                        vertical_lines_at_x[y0] = vertical_line_at_x_y0
-                  rows_of_vertical_lines[x] = vertical_lines_at_x                
-                  
-         # if it's a container, recurse
-         elif isinstance(obj, pdfminer.layout.LTFigure):
-               self._parse_obj(obj._objs)
-   
-      if prev_TextBox != None:
-         # y1 based list
-         textboxes_at_y1 = rows_of_y1_textboxes.get(prev_TextBox.y1)
-         if textboxes_at_y1 == None:
-            textboxes_at_y1 = SortedDict()
-         textboxes_at_y1[prev_TextBox.x1] = deepcopy(prev_TextBox)
-         rows_of_y1_textboxes[prev_TextBox.y1] = textboxes_at_y1                
-         # y0 based list
-         textboxes_at_y0 = rows_of_y0_textboxes.get(prev_TextBox.y0)
-         if textboxes_at_y0 == None:
-            textboxes_at_y0 = SortedDict()
-         textboxes_at_y0[prev_TextBox.x0] = deepcopy(prev_TextBox)
-         rows_of_y0_textboxes[prev_TextBox.y0] = textboxes_at_y0          
+      spatial_index_cell_size = float(configMgr.get("object_layout_container","spatial_index_cell_size",20))
 
-      self._pagewise_rows_of_y0_textboxes.append(rows_of_y0_textboxes)
-      self._pagewise_rows_of_y1_textboxes.append(rows_of_y1_textboxes)
-      self._pagewise_rows_of_horizontal_lines.append(rows_of_horizontal_lines)
-      self._pagewise_rows_of_vertical_lines.append(rows_of_vertical_lines)
+      page.spatial_index = PageSpatialIndex(page.rows_of_y0_textboxes, page.rows_of_y1_textboxes, spatial_index_cell_size)
+      return page.spatial_index
 
    def _perform_sanity_check(self):
 
-      # Check if the size of the different lists are same (# of pages)
-      pages_y0_textboxes_len = len(self._pagewise_rows_of_y0_textboxes)
-      pages_y1_textboxes_len = len(self._pagewise_rows_of_y1_textboxes)
-      pages_hor_lines_len = len(self._pagewise_rows_of_horizontal_lines)
-      pages_ver_lines_len = len(self._pagewise_rows_of_vertical_lines)
-
-      if pages_y0_textboxes_len != pages_y1_textboxes_len or pages_y0_textboxes_len != pages_hor_lines_len or \
-         pages_y0_textboxes_len != pages_ver_lines_len:
-         raise Exception("Error! # of Pages don't match.")
+      # Check if the rows of every page are built, the indexes are built when first looked up
+      for page in self._pages:
+         if page.rows_of_y0_textboxes is None or page.rows_of_y1_textboxes is None:
+            raise Exception("Error! Page structures not built.")
 
    def _dump_data_structures(self):
       logger = Logger.getLogger()
@@ -316,12 +445,12 @@ class ObjectLayoutContainer:
 
          page_counter = 0
 
-         while page_counter < len(self._pagewise_rows_of_y0_textboxes) :
+         while page_counter < len(self.pagewise_rows_of_y0_textboxes) :
             
             logger.debug("PAGE #{0:3d}".format(page_counter))
 
             logger.debug('====== y0 TextBoxes ======')
-            rows_of_y0_textboxes = self._pagewise_rows_of_y0_textboxes[page_counter]
+            rows_of_y0_textboxes = self.pagewise_rows_of_y0_textboxes[page_counter]
             for key_y0 in list(reversed(rows_of_y0_textboxes)):
                row_text = "{0:7.2f}".format(key_y0) + " "
                textboxes_at_y0 = rows_of_y0_textboxes[key_y0]
@@ -331,7 +460,7 @@ class ObjectLayoutContainer:
                         "{0:7.2f}".format(textbox_at_y0_x0.x1) + ")"
                logger.debug(row_text)
             logger.debug('====== y1 TextBoxes ======')
-            rows_of_y1_textboxes = self._pagewise_rows_of_y1_textboxes[page_counter]
+            rows_of_y1_textboxes = self.pagewise_rows_of_y1_textboxes[page_counter]
             for key_y1 in list(reversed(rows_of_y1_textboxes)):
                row_text = "{0:7.2f}".format(key_y1) + " "
                textboxes_at_y1 = rows_of_y1_textboxes[key_y1]
@@ -341,7 +470,7 @@ class ObjectLayoutContainer:
                         "{0:7.2f}".format(textbox_at_y1_x1.x1) + ")"
                logger.debug(row_text)            
             logger.debug('====== Horizontal Lines ======')
-            rows_of_horizontal_lines = self._pagewise_rows_of_horizontal_lines[page_counter]
+            rows_of_horizontal_lines = self.pagewise_rows_of_horizontal_lines[page_counter]
             for key_y in list(reversed(rows_of_horizontal_lines)):
                row_text = "{0:7.2f}".format(key_y) + " "
                lines_at_y = rows_of_horizontal_lines[key_y]
@@ -350,7 +479,7 @@ class ObjectLayoutContainer:
                      row_text = row_text + " (" + "{0:7.2f}".format(line_at_y_x0.x0) + "," + "{0:7.2f}".format(line_at_y_x0.x1) + ")"
                logger.debug(row_text)          
             logger.debug('====== Vertical Lines ======')
-            rows_of_vertical_lines = self._pagewise_rows_of_vertical_lines[page_counter]
+            rows_of_vertical_lines = self.pagewise_rows_of_vertical_lines[page_counter]
             for key_x in list(reversed(rows_of_vertical_lines)):
                row_text = "{0:7.2f}".format(key_x) + " "
                lines_at_x = rows_of_vertical_lines[key_x]
@@ -372,13 +501,13 @@ class ObjectLayoutContainer:
          with open(text_dump_filename, "w") as write_file:
                page_counter = 0
 
-               while page_counter < len(self._pagewise_rows_of_y0_textboxes) :
+               while page_counter < len(self.pagewise_rows_of_y0_textboxes) :
                   
                   write_file.write("=========\n")
                   write_file.write("PAGE #{0:3d}\n".format(page_counter))
                   write_file.write("=========\n")
 
-                  rows_of_y0_textboxes = self._pagewise_rows_of_y0_textboxes[page_counter]
+                  rows_of_y0_textboxes = self.pagewise_rows_of_y0_textboxes[page_counter]
                   for key_y0 in list(reversed(rows_of_y0_textboxes)):
                      write_file.write(" {0:7.2f}\n".format(key_y0))
                      textboxes_at_y0 = rows_of_y0_textboxes[key_y0]
@@ -6,16 +6,19 @@ __author__      = "Balaji Sundaresan"
 __copyright__   = "Copyright 2019-20, mAnava"
 __version__     = "0.0.2"
 
-from ObjectLayoutContainer import ObjectLayoutContainer
+from ExtractionContext import ExtractionContext
 import FieldExtractor
 import LineItemExtractor
 import TemplateChoser
 import io
 import json
+import logging
 import Checker
+import ExtractionMetrics
 
 from Logger import Logger
 from PluginManager import PluginManager
+from ConfigManager import ConfigManager
 
 class Orchestrator:
 
@@ -35,36 +38,52 @@ class Orchestrator:
          raise Exception("Error! Internal error Orchestrator is a singleton.")
       else:
          Orchestrator.__instance = self
+         configMgr = ConfigManager.getInstance()
+         self._attach_metrics = int(configMgr.get("metrics", "attach_to_result", 0)) != 0
 
-   def go(self, text_dump_filename, template_information, pdf_file_with_path, output_file_with_path):
+   def go(self, text_dump_filename, template_information, pdf_file_with_path, output_file_with_path, metrics = None):
+
+      # A context of its own for every document, so that go can run for many documents, also from many threads
+      context = ExtractionContext(pdf_file_with_path, template_information, metrics)
+      try:
+         return self.extract(context, text_dump_filename, output_file_with_path)
+      finally:
+         context.metrics.counters["pages_parsed"] = len(context.container.pages)
+         context.close()
+         self._log_metrics(context.metrics)
+
+   def extract(self, context, text_dump_filename, output_file_with_path):
 
       logger = Logger.getLogger()
+      metrics = context.metrics
 
-      olb = ObjectLayoutContainer.getInstance()
-      olb.parse_pdf(pdf_file_with_path, text_dump_filename)
+      with metrics.stage("parse_pdf"):
+         context.container.parse_pdf(context.pdf_file_with_path, text_dump_filename)
 
       try:
-         template_file_name = TemplateChoser.get_template_name(template_information)
+         with metrics.stage("get_template"):
+            context.template = TemplateChoser.get_template(context)
       except Exception as ex:
          logger.error(str(ex))
-         return
+         return None
 
-      plugin_manager = None
-      plugin_name = self._get_plugin_name(template_file_name)
+      plugin_name = context.template.plugin
       if plugin_name is not None:
-         plugin_manager = PluginManager.getInstance()
-         plugin_manager.load_plugin(plugin_name)
+         context.plugin = PluginManager.getInstance().load_plugin(plugin_name)
          logger.info('Loaded plugin %s', plugin_name)
 
-      dict_of_field_values = FieldExtractor.extract_fields(template_file_name)
+      with metrics.stage("extract_fields"):
+         dict_of_field_values = FieldExtractor.extract_fields(context)
 
-      self._transform_field_values(plugin_manager, dict_of_field_values)
+         self._transform_field_values(context.plugin, dict_of_field_values)
 
-      dict_of_line_items = LineItemExtractor.extract_line_items(template_file_name)
+      with metrics.stage("extract_line_items"):
+         dict_of_line_items = LineItemExtractor.extract_line_items(context)
 
-      self._transform_lineitem_values(plugin_manager, dict_of_line_items)
+         self._transform_lineitem_values(context.plugin, dict_of_line_items)
 
-      check_status = Checker.check_total(plugin_manager, template_file_name, dict_of_field_values, dict_of_line_items)
+      with metrics.stage("check_total"):
+         check_status = Checker.check_total(context, dict_of_field_values, dict_of_line_items)
 
       if len(dict_of_field_values) > 0 or len(dict_of_line_items) > 0 or len(check_status) >  0:
          extracted_data = {}
@@ -76,40 +95,53 @@ class Orchestrator:
             extracted_data["checkstatus"] = check_status
             logger.info("Check Status Match = %s", str(check_status["match_status"]))
 
-         returned_extraced_value = self._invoke_post_processor(plugin_manager, extracted_data)
+         with metrics.stage("post_processor"):
+            returned_extraced_value = self._invoke_post_processor(context, extracted_data)
+
+         # Till here, serialization is not part of the attached metrics
+         if self._attach_metrics == True and isinstance(returned_extraced_value, dict):
+            metrics.counters["pages_parsed"] = len(context.container.pages)
+            returned_extraced_value["metrics"] = metrics.to_dict()
 
-         with io.open(output_file_with_path, 'w', encoding='utf-8') as f:
-               f.write(str(json.dumps(returned_extraced_value, ensure_ascii=False, indent = 4)))
+         # No output file when the caller (e.g. the extraction server) takes the returned value
+         if output_file_with_path is not None:
+            with metrics.stage("serialization"):
+               with io.open(output_file_with_path, 'w', encoding='utf-8') as f:
+                     f.write(str(json.dumps(returned_extraced_value, ensure_ascii=False, indent = 4)))
 
-   def _get_plugin_name(self, template_file_name):
+         return returned_extraced_value
+
+      return None
 
-      with open(template_file_name, "r") as read_file:
-         json_template = json.load(read_file)     
-         
-      return json_template.get("plugin")
+   def _log_metrics(self, metrics):
+
+      logger = Logger.getLogger()
+      if logger.isEnabledFor(logging.INFO):
+         logger.info("Stage times (wall/cpu ms) : " + ", ".join("%s=%.1f/%.1f" % (name, wall_time * 1000, cpu_time * 1000) \
+            for name, (wall_time, cpu_time) in metrics.stages.items()))
+         logger.info("Hot path counts : " + ", ".join("%s=%d" % (name, metrics.counters[name]) for name in ExtractionMetrics.COUNTERS))
 
-   def _transform_field_values(self, plugin_manager, dict_of_field_values):
+   def _transform_field_values(self, plugin, dict_of_field_values):
 
-      if plugin_manager is not None and len(dict_of_field_values) > 0 :
+      if plugin is not None and len(dict_of_field_values) > 0 :
          for key, value in list(dict_of_field_values.items()):
-            returned_value = plugin_manager.get("field", key, value)
+            returned_value = plugin.get("field", key, value)
             dict_of_field_values[key] = returned_value
 
-   def _transform_lineitem_values(self, plugin_manager, dict_of_line_items):
+   def _transform_lineitem_values(self, plugin, dict_of_line_items):
 
-      if plugin_manager is not None and len(dict_of_line_items) > 0 :
+      if plugin is not None and len(dict_of_line_items) > 0 :
          index = 0
          for line_item in dict_of_line_items:
             for key, value in list(line_item.items()):
-               returned_value = plugin_manager.get_line_item(index, key, value)
+               returned_value = plugin.get_line_item(index, key, value)
                line_item[key] = returned_value
             index += 1
 
-   def _invoke_post_processor(self, plugin_manager, extracted_data):
+   def _invoke_post_processor(self, context, extracted_data):
 
-      if plugin_manager is not None:
-         container_instance = ObjectLayoutContainer.getInstance()
-         returned_extraced_value = plugin_manager.post_processor(extracted_data, container_instance)
+      if context.plugin is not None:
+         returned_extraced_value = context.plugin.post_processor(extracted_data, context.container)
          return returned_extraced_value
       else:
          return extracted_data
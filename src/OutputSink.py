@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+"""OutputSink.py: Where extracted data goes. A folder of json files, an ndjson stream, a csv of line items or sqlite."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import csv
+import io
+import json
+import os
+import sqlite3
+
+from ConfigManager import ConfigManager
+
+SINK_TYPES = ["json", "ndjson", "csv", "sqlite"]
+
+class OutputSink:
+   """ Documents are buffered and written in bulk, every batch_size documents and on flush/close. """
+
+   def __init__(self, output):
+      configMgr = ConfigManager.getInstance()
+      self.output = output
+      self._batch_size = max(1, int(configMgr.get("output", "batch_size", 100)))
+      self._list_pending = []
+
+   @property
+   def pending_count(self):
+      return len(self._list_pending)
+
+   def write(self, name, pdf_file_with_path, extracted_data):
+      """ name is unique per document, e.g. the pdf file name without its extension. """
+      self._list_pending.append((name, pdf_file_with_path, extracted_data))
+      if len(self._list_pending) >= self._batch_size:
+         self.flush()
+
+   def flush(self):
+      if len(self._list_pending) > 0:
+         self._write_documents(self._list_pending)
+         self._list_pending = []
+
+   def discard(self):
+      """ Drops the buffered documents, e.g. after a failed flush, so that they are not written along with the next batch. """
+      self._list_pending = []
+
+   def close(self):
+      self.flush()
+
+   def _write_documents(self, list_documents):
+      raise NotImplementedError()
+
+class JsonDirectorySink(OutputSink):
+   """ One pretty printed json file per document, as written for a single pdf. """
+
+   def __init__(self, output):
+      OutputSink.__init__(self, output)
+      os.makedirs(output, exist_ok=True)
+
+   def _write_documents(self, list_documents):
+      for name, _, extracted_data in list_documents:
+         output_file_with_path = os.path.join(self.output, name + ".json")
+         # Renamed into place, readers of the folder never see half a file
+         temp_file_with_path = os.path.join(self.output, "." + name + ".json.tmp")
+         with io.open(temp_file_with_path, 'w', encoding='utf-8') as f:
+            f.write(str(json.dumps(extracted_data, ensure_ascii=False, indent = 4)))
+         os.replace(temp_file_with_path, output_file_with_path)
+
+class NdjsonSink(OutputSink):
+   """ Appends a line {"name", "file", "data"} per document. """
+
+   def _write_documents(self, list_documents):
+      list_lines = []
+      for name, pdf_file_with_path, extracted_data in list_documents:
+         document = {"name": name, "file": pdf_file_with_path, "data": extracted_data}
+         list_lines.append(json.dumps(document, ensure_ascii=False) + "\n")
+      with io.open(self.output, 'a', encoding='utf-8') as f:
+         f.write("".join(list_lines))
+
+class CsvLineItemSink(OutputSink):
+   """ Appends a row (name, lineitem #, column, value) per line item value. Columns differ between templates, hence a
+   long rather than a wide table. """
+
+   CSV_HEADER = ["name", "lineitem", "column", "value"]
+
+   def _write_documents(self, list_documents):
+      write_header = os.path.exists(self.output) == False or os.path.getsize(self.output) == 0
+      with io.open(self.output, 'a', encoding='utf-8', newline='') as f:
+         writer = csv.writer(f)
+         if write_header == True:
+            writer.writerow(self.CSV_HEADER)
+         for name, _, extracted_data in list_documents:
+            for lineitem_number, line_item in enumerate(extracted_data.get("lineitems", []), 1):
+               for column, value in line_item.items():
+                  writer.writerow([name, lineitem_number, column, value])
+
+class SqliteSink(OutputSink):
+   """ documents, fields and lineitems tables. Every batch of documents is one transaction. """
+
+   def __init__(self, output):
+      OutputSink.__init__(self, output)
+      self._connection = sqlite3.connect(output)
+      with self._connection:
+         self._connection.execute("CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, name TEXT, file TEXT, " \
+            "match_status TEXT, data TEXT)")
+         self._connection.execute("CREATE TABLE IF NOT EXISTS fields (document_id INTEGER REFERENCES documents(id), " \
+            "name TEXT, value TEXT)")
+         self._connection.execute("CREATE TABLE IF NOT EXISTS lineitems (document_id INTEGER REFERENCES documents(id), " \
+            "lineitem INTEGER, name TEXT, value TEXT)")
+
+   def _write_documents(self, list_documents):
+      with self._connection:
+         cursor = self._connection.cursor()
+         for name, pdf_file_with_path, extracted_data in list_documents:
+            match_status = None
+            if extracted_data.get("checkstatus") is not None:
+               match_status = str(extracted_data["checkstatus"].get("match_status"))
+            cursor.execute("INSERT INTO documents (name, file, match_status, data) VALUES (?, ?, ?, ?)", \
+               (name, pdf_file_with_path, match_status, json.dumps(extracted_data, ensure_ascii=False)))
+            document_id = cursor.lastrowid
+            cursor.executemany("INSERT INTO fields (document_id, name, value) VALUES (?, ?, ?)", \
+               [(document_id, field_name, str(value)) for field_name, value in extracted_data.get("fields", {}).items()])
+            cursor.executemany("INSERT INTO lineitems (document_id, lineitem, name, value) VALUES (?, ?, ?, ?)", \
+               [(document_id, lineitem_number, column, str(value)) \
+                  for lineitem_number, line_item in enumerate(extracted_data.get("lineitems", []), 1) \
+                  for column, value in line_item.items()])
+
+   def close(self):
+      OutputSink.close(self)
+      self._connection.close()
+
+def create_sink(sink_type, output):
+   """ output is a folder for the json sink, a file for the others. """
+
+   if sink_type == None:
+      sink_type = ConfigManager.getInstance().get("output", "sink", "json")
+
+   if sink_type == "json":
+      return JsonDirectorySink(output)
+
+   # The file based sinks append, make sure the folder is there
+   output_folder = os.path.dirname(output)
+   if len(output_folder) > 0:
+      os.makedirs(output_folder, exist_ok=True)
+
+   if sink_type == "ndjson":
+      return NdjsonSink(output)
+   elif sink_type == "csv":
+      return CsvLineItemSink(output)
+   elif sink_type == "sqlite":
+      return SqliteSink(output)
+
+   raise Exception("Error! Unknown output sink " + str(sink_type) + ", expected one of " + ", ".join(SINK_TYPES))
@@ -6,15 +6,53 @@ __author__      = "Balaji Sundaresan"
 __copyright__   = "Copyright 2019-20, mAnava"
 __version__     = "0.0.2"
 
+import threading
+
 from Logger import Logger
 from pluginbase import PluginBase
 
+class Plugin:
+   """ A loaded plugin. Carried by the ExtractionContext of every document using it. """
+
+   def __init__(self, plugin_name, plugin_module):
+      self.name = plugin_name
+      self._plugin_module = plugin_module
+
+   def get(self, _type, type_name, type_value):
+
+      try:
+         return self._plugin_module.transform(_type, type_name, type_value)
+      except:
+         logger = Logger.getLogger()
+         logger.error('Error! Failed to transform (%s,%s,%s) in plugin.', _type, type_name, type_value )
+         return type_value
+
+   def get_line_item(self, index, type_name, type_value):
+
+      try:
+         return self._plugin_module.transform_line_item(index, type_name, type_value)
+      except:
+         logger = Logger.getLogger()
+         logger.error('Error! Failed to transform (%s,%s,%s) in plugin.', index, type_name, type_value )
+         return type_value  
+
+   def post_processor(self, extracted_data, container_instance):
+
+      try:
+         return self._plugin_module.post_processor(extracted_data, container_instance)
+      except:
+         logger = Logger.getLogger()
+         logger.error('Error! Failed to perform post processing in plugin.')
+         return extracted_data               
+
 class PluginManager:
 
    __instance = None
    __plugin_base = None
    __plugin_source = None
    __loaded_plugin = None
+   __loaded_plugins = None
+   __lock = None
 
    @staticmethod 
    def getInstance():
@@ -30,6 +68,8 @@ class PluginManager:
          raise Exception("Error! Internal error Orchestrator is a singleton.")
       else:
          PluginManager.__instance = self
+         self.__loaded_plugins = {}
+         self.__lock = threading.Lock()
          try:
             self.__plugin_base = PluginBase(package='plugins')
             self.__plugin_source = self.__plugin_base.make_plugin_source(searchpath=['./plugins'])
@@ -40,45 +80,51 @@ class PluginManager:
             self.__plugin_source = None
 
    def load_plugin(self, plugin_name):
+      """ The Plugin, None if it failed to load. Also made the current plugin of the get/get_line_item/post_processor shims. """
+      # Plugins are loaded once and kept, so that many documents (and threads) can share them
+      with self.__lock:
+         plugin = self.__loaded_plugins.get(plugin_name)
+         if plugin is None:
+            try:
+               if self.__plugin_source is not None:
+                  plugin = Plugin(plugin_name, self.__plugin_source.load_plugin(plugin_name))
+                  self.__loaded_plugins[plugin_name] = plugin
+            except Exception as e:
+               logger = Logger.getLogger()
+               logger.error('Error! Failed to load plugin %s. Plugin transformation will be unavailable. %s', plugin_name, e)
+      self.__loaded_plugin = plugin
+      return plugin
+
+   def preload_plugins(self):
+      if self.__plugin_source is None:
+         return
       try:
-         if self.__plugin_source is not None:
-            self.__loaded_plugin = self.__plugin_source.load_plugin(plugin_name)
+         plugin_names = self.__plugin_source.list_plugins()
       except Exception as e:
          logger = Logger.getLogger()
-         logger.error('Error! Failed to load plugin %s. Plugin transformation will be unavailable.', plugin_name )
+         logger.error('Error! Failed to list plugins. %s', e)
+         return
+      for plugin_name in plugin_names:
+         self.load_plugin(plugin_name)
+      self.__loaded_plugin = None
 
    def get(self, _type, type_name, type_value):
 
       if self.__loaded_plugin == None:
          return type_value
-         
-      try:
-         return self.__loaded_plugin.transform(_type, type_name, type_value)
-      except:
-         logger = Logger.getLogger()
-         logger.error('Error! Failed to transform (%s,%s,%s) in plugin.', _type, type_name, type_value )
-         return type_value
+
+      return self.__loaded_plugin.get(_type, type_name, type_value)
 
    def get_line_item(self, index, type_name, type_value):
 
       if self.__loaded_plugin == None:
          return type_value
-         
-      try:
-         return self.__loaded_plugin.transform_line_item(index, type_name, type_value)
-      except:
-         logger = Logger.getLogger()
-         logger.error('Error! Failed to transform (%s,%s,%s) in plugin.', index, type_name, type_value )
-         return type_value  
+
+      return self.__loaded_plugin.get_line_item(index, type_name, type_value)
 
    def post_processor(self, extracted_data, container_instance):
 
       if self.__loaded_plugin == None:
          return extracted_data
-         
-      try:
-         return self.__loaded_plugin.post_processor(extracted_data, container_instance)
-      except:
-         logger = Logger.getLogger()
-         logger.error('Error! Failed to perform post processing in plugin.')
-         return extracted_data               
+
+      return self.__loaded_plugin.post_processor(extracted_data, container_instance)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+"""Profiler.py: cProfile the extraction of documents, merge their profiles and report the hot functions."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import cProfile
+import io
+import os
+import pstats
+
+from Logger import Logger
+from ConfigManager import ConfigManager
+
+PROFILE_FILE_EXTENSION = ".pstats"
+COLLAPSED_STACKS_FILE_EXTENSION = ".collapsed"
+
+def profile_call(pstats_file_name, function, *args):
+
+    # The profile is saved also when the function fails, a failing document is as interesting as a slow one
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        return function(*args)
+    finally:
+        profile.disable()
+        try:
+            profile.dump_stats(pstats_file_name)
+        except OSError:
+            Logger.getLogger().error("ERROR!! Failed to save profile " + pstats_file_name)
+
+def merge_profiles(list_pstats_file_names):
+
+    stats = None
+    for pstats_file_name in list_pstats_file_names:
+        if os.path.exists(pstats_file_name) == False:
+            continue
+        if stats is None:
+            stats = pstats.Stats(pstats_file_name)
+        else:
+            stats.add(pstats_file_name)
+    return stats
+
+def get_function_name(function):
+
+    file_name, line_number, function_name = function
+    # Built-ins have no file, e.g. ('~', 0, "<method 'search' of 're.Pattern' objects>")
+    if file_name == "~":
+        return function_name
+    return "%s:%d(%s)" % (os.path.basename(file_name), line_number, function_name)
+
+def write_collapsed_stacks(stats, collapsed_file_name):
+    """ One line per call stack, functions separated by ; and the microseconds spent in the last of them. cProfile keeps
+    caller/callee pairs and not whole stacks, so the time of a function is split over its callers in proportion to the time
+    it spent under each. Good enough for a flame graph. """
+
+    configMgr = ConfigManager.getInstance()
+    max_depth = int(configMgr.get("profile", "max_stack_depth", 64))
+
+    dict_callees = {}
+    list_roots = []
+    for function, (_, _, _, _, dict_callers) in stats.stats.items():
+        if len(dict_callers) == 0:
+            list_roots.append(function)
+        for caller, edge in dict_callers.items():
+            dict_callees.setdefault(caller, []).append((function, edge[3]))
+
+    dict_stack_times = {}
+
+    def walk(function, list_stack, share):
+        _, _, total_time, cumulative_time, _ = stats.stats[function]
+        list_stack.append(get_function_name(function))
+        stack = ";".join(list_stack)
+        dict_stack_times[stack] = dict_stack_times.get(stack, 0.0) + total_time * share
+        if len(list_stack) < max_depth:
+            for callee, edge_cumulative_time in dict_callees.get(function, []):
+                callee_cumulative_time = stats.stats[callee][3]
+                callee_share = share * edge_cumulative_time / callee_cumulative_time if callee_cumulative_time > 0 else 0.0
+                # Recursive calls are not followed, nor what takes less than a microsecond
+                if get_function_name(callee) not in list_stack and callee_cumulative_time * callee_share >= 0.000001:
+                    walk(callee, list_stack, callee_share)
+        list_stack.pop()
+
+    for root in list_roots:
+        walk(root, [], 1.0)
+
+    with io.open(collapsed_file_name, 'w', encoding='utf-8') as f:
+        for stack, stack_time in dict_stack_times.items():
+            microseconds = int(round(stack_time * 1000000))
+            if microseconds > 0:
+                f.write("%s %d\n" % (stack, microseconds))
+
+def report_profile(stats, report_name, profile_folder, collapsed_stacks):
+
+    logger = Logger.getLogger()
+    configMgr = ConfigManager.getInstance()
+    top_functions = int(configMgr.get("profile", "top_functions", 25))
+
+    if collapsed_stacks == True:
+        collapsed_file_name = os.path.join(profile_folder, report_name + COLLAPSED_STACKS_FILE_EXTENSION)
+        write_collapsed_stacks(stats, collapsed_file_name)
+        logger.info("Collapsed stacks written to %s", collapsed_file_name)
+
+    # Where the time is spent, in the functions themselves
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("tottime").print_stats(top_functions)
+    logger.info("Hot functions of %s :\n%s", report_name, stream.getvalue())
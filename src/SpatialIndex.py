@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+"""SpatialIndex.py: Per page index of textboxes for neighbour (right, bottom) queries."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import math
+from bisect import bisect_left, bisect_right
+
+class PageSpatialIndex:
+
+   def __init__(self, rows_of_y0_textboxes, rows_of_y1_textboxes, cell_size):
+
+      self._cell_size = cell_size
+      self._rows_of_y0_textboxes = rows_of_y0_textboxes
+      self._rows_of_y1_textboxes = rows_of_y1_textboxes
+
+      # y1 -> (textboxes of the row in x1 order, x0 of those textboxes sorted, their index in the row)
+      self._y1_rows = {}
+      # y0 -> (textboxes of the row in x0 order, x0 of those textboxes)
+      self._y0_rows = {}
+
+      # Uniform grid. Each textbox of the y1 rows is placed in every cell its y (x) range covers.
+      # A cell entry is (-y1, index in the row, textbox, textboxes of the row), i.e. in top to bottom, left to right order.
+      dict_y_cells = {}
+      dict_x_cells = {}
+      self._all_entries = []
+
+      for key_y1, textboxes_at_y1 in rows_of_y1_textboxes.items():
+         row_textboxes = list(textboxes_at_y1.values())
+         list_x0_index = sorted((textbox.x0, index) for index, textbox in enumerate(row_textboxes))
+         self._y1_rows[key_y1] = (row_textboxes, [x0 for x0, _ in list_x0_index], [index for _, index in list_x0_index])
+         for index, textbox in enumerate(row_textboxes):
+            entry = (-key_y1, index, textbox, row_textboxes)
+            self._all_entries.append(entry)
+            for cell in self._get_cells(min(textbox.y0, textbox.y1), max(textbox.y0, textbox.y1)):
+               dict_y_cells.setdefault(cell, []).append(entry)
+            for cell in self._get_cells(min(textbox.x0, textbox.x1), max(textbox.x0, textbox.x1)):
+               dict_x_cells.setdefault(cell, []).append(entry)
+
+      for key_y0, textboxes_at_y0 in rows_of_y0_textboxes.items():
+         self._y0_rows[key_y0] = (list(textboxes_at_y0.values()), list(textboxes_at_y0.keys()))
+
+      self._all_entries.sort(key=self._entry_order)
+      self._y_cells = {}
+      for cell, list_entries in dict_y_cells.items():
+         list_entries.sort(key=self._entry_order)
+         self._y_cells[cell] = list_entries
+      self._x_cells = {}
+      for cell, list_entries in dict_x_cells.items():
+         list_entries.sort(key=self._entry_order)
+         self._x_cells[cell] = ([entry[0] for entry in list_entries], list_entries)
+
+   @staticmethod
+   def _entry_order(entry):
+      return entry[0], entry[1]
+
+   def _get_cell(self, value):
+      return int(math.floor(value / self._cell_size))
+
+   def _get_cells(self, start, end):
+      return range(self._get_cell(start), self._get_cell(end) + 1)
+
+   def get_textboxes_to_right(self, position, textbox_location):
+      """ Textboxes to the right of the location, in the order of a scan of the y1 rows, the y0 rows and then the
+      textboxes enclosing the location vertically. With position 2 the textbox following each one in its row is taken. """
+
+      list_textboxes = []
+      set_seen = set()
+
+      # Rows whose y1 is within the location's y range, top to bottom
+      for key_y1 in self._rows_of_y1_textboxes.irange(textbox_location.y0, textbox_location.y1, reverse=True):
+         row_textboxes, list_x0, list_index = self._y1_rows[key_y1]
+         start = bisect_left(list_x0, textbox_location.x1)
+         for index in sorted(list_index[start:]):
+            self._add_textbox(list_textboxes, set_seen, position, row_textboxes, index)
+
+      # Rows whose y0 is within the location's y range, bottom to top
+      for key_y0 in self._rows_of_y0_textboxes.irange(textbox_location.y0, textbox_location.y1):
+         row_textboxes, list_x0 = self._y0_rows[key_y0]
+         start = bisect_left(list_x0, textbox_location.x1)
+         for index in range(start, len(row_textboxes)):
+            self._add_textbox(list_textboxes, set_seen, position, row_textboxes, index)
+
+      # Textboxes taller than the location on both sides. They all cover the location's y1.
+      if textbox_location.y0 <= textbox_location.y1:
+         list_entries = self._y_cells.get(self._get_cell(textbox_location.y1), [])
+      else:
+         list_entries = self._all_entries
+      for _, index, textbox, row_textboxes in list_entries:
+         if textbox.x0 >= textbox_location.x1 and textbox.y1 > textbox_location.y1 and textbox.y0 < textbox_location.y0:
+            self._add_textbox(list_textboxes, set_seen, position, row_textboxes, index)
+
+      return list_textboxes
+
+   def _add_textbox(self, list_textboxes, set_seen, position, row_textboxes, index):
+
+      if position == 1:
+         textbox = row_textboxes[index]
+      elif position == 2 and index < (len(row_textboxes)-1):
+         textbox = row_textboxes[index+1]
+      else:
+         return
+
+      # Same textbox reached from more than one row
+      coordinates = (textbox.x0, textbox.y0, textbox.x1, textbox.y1)
+      if coordinates not in set_seen:
+         set_seen.add(coordinates)
+         list_textboxes.append(textbox)
+
+   def get_textbox_at_bottom(self, textbox_location):
+      """ First textbox below the location (top to bottom, left to right) overlapping its x range. """
+
+      location_x0 = textbox_location.x0
+      location_x1 = textbox_location.x1
+      neg_location_y1 = -textbox_location.y1
+
+      best_entry = None
+      for cell in self._get_cells(location_x0, max(location_x0, location_x1)):
+         cell_entries = self._x_cells.get(cell)
+         if cell_entries is None:
+            continue
+         list_neg_y1, list_entries = cell_entries
+         start = bisect_right(list_neg_y1, neg_location_y1)
+         for entry in list_entries[start:]:
+            if best_entry is not None and self._entry_order(entry) >= self._entry_order(best_entry):
+               break
+            textbox = entry[2]
+            if (textbox.x0 < location_x0 and textbox.x1 > location_x0) or textbox.x0 == location_x0 or \
+               (textbox.x0 > location_x0 and textbox.x0 <= location_x1):
+               best_entry = entry
+               break
+
+      if best_entry is None:
+         return None
+      return best_entry[2]
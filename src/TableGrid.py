@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+"""TableGrid.py: Lookups placing the texts of a table in its cells, by the ruling lines of the page or the column alignments."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+from bisect import bisect_left, bisect_right
+
+class PageTableGrid:
+
+   def __init__(self, rows_of_horizontal_lines, rows_of_vertical_lines):
+
+      # Row separators, the y of the horizontal lines in ascending order
+      self._row_separators = list(rows_of_horizontal_lines.keys())
+
+      # The y0 and y1 of the vertical lines cut the page into bands: each of these y, and the open range between two
+      # consecutive ones. The x of the vertical lines running through a band are its column boundaries, merged and sorted.
+      dict_line_starts = {}
+      dict_line_ends = {}
+      for key_x, lines_at_x in rows_of_vertical_lines.items():
+         for vertical_line in lines_at_x.values():
+            if vertical_line.y0 > vertical_line.y1:
+               continue
+            dict_line_starts.setdefault(vertical_line.y0, []).append((key_x, vertical_line.y1))
+            dict_line_ends.setdefault(vertical_line.y1, []).append((key_x, vertical_line.y0))
+
+      # Band 2*i is at the i-th y, band 2*i+1 is between the i-th and the next y
+      self._band_y = sorted(set(dict_line_starts) | set(dict_line_ends))
+      self._band_column_boundaries = []
+
+      # x -> number of vertical lines at x running through the current open range
+      dict_active_lines = {}
+      for y in self._band_y:
+         line_starts = dict_line_starts.get(y, [])
+         line_ends = dict_line_ends.get(y, [])
+         set_x = set(dict_active_lines)
+         set_x.update(key_x for key_x, _ in line_starts)
+         set_x.update(key_x for key_x, _ in line_ends)
+         self._band_column_boundaries.append(sorted(set_x))
+
+         for key_x, y1 in line_starts:
+            if y1 > y:
+               dict_active_lines[key_x] = dict_active_lines.get(key_x, 0) + 1
+         for key_x, y0 in line_ends:
+            if y0 < y:
+               dict_active_lines[key_x] -= 1
+               if dict_active_lines[key_x] == 0:
+                  del dict_active_lines[key_x]
+         self._band_column_boundaries.append(sorted(dict_active_lines))
+
+   def get_column_boundaries(self, textbox):
+      """ x of the nearest vertical lines running through the textbox's y0, at or before its x0 and after its x1. -1 when
+      there is no such line. """
+
+      index = bisect_left(self._band_y, textbox.y0)
+      if index < len(self._band_y) and self._band_y[index] == textbox.y0:
+         list_x = self._band_column_boundaries[2*index]
+      elif index > 0 and index < len(self._band_y):
+         list_x = self._band_column_boundaries[2*index-1]
+      else:
+         return -1, -1
+
+      left_index = bisect_right(list_x, textbox.x0)
+      nearest_x0 = list_x[left_index-1] if left_index > 0 else -1
+      right_index = bisect_right(list_x, textbox.x1)
+      nearest_x1 = list_x[right_index] if right_index < len(list_x) else -1
+      return nearest_x0, nearest_x1
+
+   def has_row_separator(self, y_bottom, y_top):
+      """ Whether there is a horizontal line from y_bottom to y_top, both included. """
+
+      index = bisect_left(self._row_separators, y_bottom)
+      return index < len(self._row_separators) and self._row_separators[index] <= y_top
+
+class IntervalIndex:
+   """ Which of a set of closed intervals contain a point. The intervals are numbered, the lookups return the numbers. """
+
+   def __init__(self, list_intervals):
+
+      # Same bands as of PageTableGrid: band 2*i is at the i-th end point, band 2*i+1 between it and the next one
+      self._band_x = sorted(set(start for start, _, _ in list_intervals) | set(end for _, end, _ in list_intervals))
+      self._bands = [[] for _ in range(2*len(self._band_x))]
+      for start, end, number in sorted(list_intervals, key=lambda interval: interval[2]):
+         if start > end:
+            continue
+         for band in range(2*bisect_left(self._band_x, start), 2*bisect_left(self._band_x, end)+1):
+            self._bands[band].append(number)
+
+   def get_first(self, x, start_number):
+      """ Smallest number, not below start_number, of the intervals containing x. None when there is none. """
+
+      index = bisect_left(self._band_x, x)
+      if index < len(self._band_x) and self._band_x[index] == x:
+         list_numbers = self._bands[2*index]
+      elif index > 0 and index < len(self._band_x):
+         list_numbers = self._bands[2*index-1]
+      else:
+         return None
+
+      position = bisect_left(list_numbers, start_number)
+      if position < len(list_numbers):
+         return list_numbers[position]
+      return None
+
+class TableColumnWindows:
+   """ Alignment windows of the columns of a table, for tables without ruling lines. A left (right) aligned column takes
+   the texts whose x0 (x1) is within the margin of its header's x0 (x1), a center aligned one the texts with an end within
+   its header or spanning it. """
+
+   def __init__(self, list_of_column_information, dict_column_text_widths, alignment_margin):
+
+      # The left windows are looked up by the x0 of the text, the right ones by its x1 and the center ones by both. A text
+      # spanning a center window has the window's start after its x0 and not after its x1. The window of an inverted
+      # center header (x0 > x1) contains no point, such a header only takes texts spanning it and is checked on its own.
+      list_x0_windows = []
+      list_x1_windows = []
+      list_center_starts = []
+      self._inverted_center_windows = []
+      self._unsupported_column_indexes = []
+      # Per column (alignment, start, end) of its window
+      self._column_windows = []
+      for index, column in enumerate(list_of_column_information):
+         column_textbox = dict_column_text_widths[column.name]
+         if column.alignment == "left":
+            window = (column_textbox.x0 - alignment_margin, column_textbox.x0 + alignment_margin, index)
+            list_x0_windows.append(window)
+         elif column.alignment == "right":
+            window = (column_textbox.x1 - alignment_margin, column_textbox.x1 + alignment_margin, index)
+            list_x1_windows.append(window)
+         elif column.alignment == "center":
+            window = (column_textbox.x0, column_textbox.x1, index)
+            list_x0_windows.append(window)
+            list_x1_windows.append(window)
+            if column_textbox.x0 <= column_textbox.x1:
+               list_center_starts.append((column_textbox.x0, index))
+            else:
+               self._inverted_center_windows.append(window)
+         else:
+            window = (None, None, index)
+            self._unsupported_column_indexes.append(index)
+         self._column_windows.append((column.alignment, window[0], window[1]))
+
+      self._x0_windows = IntervalIndex(list_x0_windows)
+      self._x1_windows = IntervalIndex(list_x1_windows)
+      list_center_starts.sort()
+      self._center_start_x = [start for start, _ in list_center_starts]
+      self._center_start_indexes = [index for _, index in list_center_starts]
+
+   def get_column_index(self, textbox, start_index):
+      """ Index of the first column, from start_index, whose window takes the textbox, i.e. the column found by trying the
+      columns one after the other. A column of an unsupported alignment ends the search and its index is returned. None
+      when no column takes the textbox. """
+
+      # The texts of a row mostly come column after column, try the column at start_index first
+      if start_index < len(self._column_windows):
+         alignment, start, end = self._column_windows[start_index]
+         if alignment == "left":
+            if textbox.x0 >= start and textbox.x0 <= end:
+               return start_index
+         elif alignment == "right":
+            if textbox.x1 >= start and textbox.x1 <= end:
+               return start_index
+         elif alignment == "center":
+            if self._is_in_center_window(textbox, start, end) == True:
+               return start_index
+         else:
+            return start_index
+         start_index += 1
+
+      column_index = self._x0_windows.get_first(textbox.x0, start_index)
+
+      x1_column_index = self._x1_windows.get_first(textbox.x1, start_index)
+      if x1_column_index != None and (column_index == None or x1_column_index < column_index):
+         column_index = x1_column_index
+
+      # Center windows within the text, usually none
+      position = bisect_right(self._center_start_x, textbox.x0)
+      while position < len(self._center_start_x) and self._center_start_x[position] <= textbox.x1:
+         center_column_index = self._center_start_indexes[position]
+         if center_column_index >= start_index and (column_index == None or center_column_index < column_index):
+            column_index = center_column_index
+         position += 1
+
+      for start, end, center_column_index in self._inverted_center_windows:
+         if column_index != None and center_column_index >= column_index:
+            break
+         if center_column_index >= start_index and self._is_in_center_window(textbox, start, end) == True:
+            column_index = center_column_index
+            break
+
+      if len(self._unsupported_column_indexes) > 0:
+         position = bisect_left(self._unsupported_column_indexes, start_index)
+         if position < len(self._unsupported_column_indexes) and \
+            (column_index == None or self._unsupported_column_indexes[position] < column_index):
+            column_index = self._unsupported_column_indexes[position]
+
+      return column_index
+
+   @staticmethod
+   def _is_in_center_window(textbox, start, end):
+      return textbox.x0 >= start and textbox.x0 <= end or textbox.x1 >= start and textbox.x1 <= end or \
+         textbox.x0 < start and textbox.x1 > end
@@ -6,80 +6,80 @@ __author__      = "Balaji Sundaresan"
 __copyright__   = "Copyright 2019-20, mAnava"
 __version__     = "0.0.2"
 
-import json
 import os
 
 from Logger import Logger
-from jsonschema import validate
-from jsonschema import exceptions
-from ObjectLayoutAlgorithms import ObjectLayoutAlgorithms
+from ConfigManager import ConfigManager
+from TemplateRegistry import TemplateRegistry
 
-def get_template_name(template_information):
+def get_template(context):
 
-    # Load the schema json file 
-    schema = None
-    with open('../schema/invoice-schema-1_0_0.json', "r") as read_file:
-        schema = json.load(read_file)
-
-    # Check if schema load was successful
-    if schema == None:
-        raise Exception("Error! Failed to load the json schema file.")
+    logger = Logger.getLogger()
+    registry = TemplateRegistry.getInstance()
+    template_information = context.template_information
 
     # If a template file name is given, check if this is the correct match
     if os.path.isfile(template_information):
-        file_name = check_if_template_matches(template_information, schema)
-        if file_name != None:
-            return file_name
+        # Check if its a json file
+        if template_information.endswith(".json") == False:
+            logger.error("ERROR!! Template file should a json file.")
+            raise Exception("Error! Template file did not match.")
+        template = registry.get_template(template_information)
+        if template != None and check_if_template_matches(context, template):
+            return template
         else:
             raise Exception("Error! Template file did not match.")
     # If a folder name is given, recursively check which template file matches
     elif os.path.isdir(template_information):
-        for root, directories, filenames in os.walk(template_information):
-            for filename in filenames:
-                full_path_template_file_name = os.path.join(root,filename)
-                if full_path_template_file_name.endswith(".json"): 
-                    file_name = check_if_template_matches(full_path_template_file_name, schema)
-                    if file_name != None:
-                        return file_name
-        
+        keyword_index = registry.get_keyword_index(template_information)
+        objectlayoutalgo_instance = context.algorithms
+        set_found_keyword_ids = objectlayoutalgo_instance.find_keywords(keyword_index.automaton)
+        list_candidates = keyword_index.rank_templates(set_found_keyword_ids)
+        list_matching_candidates = [candidate for candidate in list_candidates if candidate.complete]
+        context.template_candidates = list_candidates
+        context.template_ambiguous = len(list_matching_candidates) > 1
+        if context.template_ambiguous == True:
+            logger.warning("WARNING! Ambiguous template, %d templates match all keywords : %s", len(list_matching_candidates), \
+                describe_candidates(list_matching_candidates))
+        for candidate in list_matching_candidates:
+            template = registry.get_template(candidate.template_file_name)
+            if template != None:
+                logger.info("Picked template file " + template.file_name)  
+                return template
+
+        if len(list_candidates) > 0:
+            logger.info("Closest templates : " + describe_candidates(list_candidates))
         raise Exception("Error! Could not find a suitable template for the given file.")  
     # Oops!      
     else:
         raise Exception("Error! Template file neither a file nor a directory.")
 
+def describe_candidates(list_candidates):
 
+    configMgr = ConfigManager.getInstance()
+    max_candidates_logged = int(configMgr.get("template_registry", "max_candidates_logged", 5))
+    list_descriptions = ["%s (%d/%d keywords)" % (candidate.template_file_name, candidate.found_keyword_count, candidate.keyword_count) \
+        for candidate in list_candidates[:max_candidates_logged]]
+    if len(list_candidates) > max_candidates_logged:
+        list_descriptions.append("%d more" % (len(list_candidates) - max_candidates_logged))
+    return ", ".join(list_descriptions)
 
-def check_if_template_matches(full_path_template_file_name, schema):
-
-    logger = Logger.getLogger()
-    objectlayoutalgo_instance = ObjectLayoutAlgorithms.getInstance()
+def get_template_name(context):
 
-    # Check if its a json file
-    if full_path_template_file_name.endswith(".json") == False:     
-        logger.error("ERROR!! Template file should a json file.")      
-        return None
+    return get_template(context).file_name
 
-    # Load the template json file
-    try: 
-        with open(full_path_template_file_name, "r") as read_file:
-            json_template = json.load(read_file)            
-    except IOError:
-        logger.error("ERROR!! Failed to load template file " + full_path_template_file_name)      
-        return None
+def check_if_template_matches(context, template):
 
-    # Validate the template file and check if this is the template file that matches pdf contents
-    try:
-        validate(instance=json_template, schema=schema)
+    logger = Logger.getLogger()
+    objectlayoutalgo_instance = context.algorithms
 
-        set_keywords = set(json_template["keywords"][:])  
+    # Check if this is the template file that matches pdf contents
+    set_keywords = set(template.keywords)
 
-        found_all_keywords = objectlayoutalgo_instance.check_if_all_text_present(set_keywords)
+    found_all_keywords = objectlayoutalgo_instance.check_if_all_text_present(set_keywords)
 
-        if found_all_keywords == True:
-            logger.info("Picked template file " + full_path_template_file_name)  
-            return full_path_template_file_name
-        else:
-            return None
-    except (exceptions.ValidationError, exceptions.SchemaError):
-        logger.error("ERROR!! Template file " + full_path_template_file_name + " failed schema validation.")      
-        return None
+    if found_all_keywords == True:
+        logger.info("Picked template file " + template.file_name)  
+        return True
+    else:
+        return False
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+
+"""TemplateRegistry.py: Load, validate and compile templates once per process."""
+
+__author__      = "Balaji Sundaresan"
+__copyright__   = "Copyright 2019-20, mAnava"
+__version__     = "0.0.2"
+
+import collections
+import hashlib
+import json
+import os
+import re
+import time
+
+from Logger import Logger
+from ConfigManager import ConfigManager
+from KeywordIndex import KeywordIndex
+from jsonschema import exceptions
+from jsonschema.validators import validator_for
+from ObjectLayoutAlgorithms import ColumnInformation
+from ObjectLayoutAlgorithms import RegexLineItemProgram
+from ObjectLayoutAlgorithms import SearchScope
+from ObjectLayoutContainer import normalize_text
+
+# A regex referring to a group by number or name, or a conditional on a group
+GROUP_REFERENCE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+class CompiledField:
+  def __init__(self, field):
+    self.name = field["name"]
+    self.location = field["location"]
+    self.identifier = field["identifier"]
+    self.ordinal = int(field["ordinal"]) if field.get("ordinal") is not None else None
+    self.normalized = field.get("match") == "normalized"
+    self.regex = re.compile(self.identifier) if self.location.startswith("regex") else None
+    # The key of the identifier in the (normalized) text index
+    self.label = None
+    if self.regex is None:
+      self.label = normalize_text(self.identifier) if self.normalized == True else self.identifier
+    # Pages and region the identifier is searched in, None for the whole document
+    self.scope = None
+    if field.get("pages") is not None or field.get("region") is not None:
+      pages = field.get("pages", {})
+      region = field.get("region", {})
+      last_page = pages.get("last")
+      self.scope = SearchScope(pages.get("first", 1) - 1, last_page - 1 if last_page is not None else None, \
+        region.get("x0"), region.get("y0"), region.get("x1"), region.get("y1"))
+
+def _get_max_locations(max_locations, ordinal):
+  # Locations needed by the fields sharing a search, the largest of their ordinals. None (all) for a field without one.
+  if max_locations == None or ordinal == None:
+    return None
+  return max(max_locations, ordinal)
+
+class CompiledFieldPlan:
+  """ What the fields of a template search for, so that the document is gone through once for all of them. A search is
+  a label (exact or normalized) or a regex, in a scope, with the locations it needs (None for all). """
+  def __init__(self, fields):
+    # (label, normalized, scope) -> locations needed
+    self.label_searches = {}
+    # [regex, scope, locations needed], in the order of the fields
+    self.regex_searches = []
+    # Per field, ("label", key of its label search) or ("regex", index of its regex search)
+    self.field_searches = []
+    dict_regex_indexes = {}
+    for field in fields:
+      if field.regex is not None:
+        key = (field.regex.pattern, field.scope)
+        regex_index = dict_regex_indexes.get(key)
+        if regex_index is None:
+          regex_index = len(self.regex_searches)
+          dict_regex_indexes[key] = regex_index
+          self.regex_searches.append([field.regex, field.scope, field.ordinal])
+        else:
+          self.regex_searches[regex_index][2] = _get_max_locations(self.regex_searches[regex_index][2], field.ordinal)
+        self.field_searches.append(("regex", regex_index))
+      else:
+        key = (field.label, field.normalized, field.scope)
+        if key not in self.label_searches:
+          self.label_searches[key] = field.ordinal
+        else:
+          self.label_searches[key] = _get_max_locations(self.label_searches[key], field.ordinal)
+        self.field_searches.append(("label", key))
+
+    # All the regexes in one, to skip the textboxes none of them matches with a single search. Not when a regex refers to
+    # its groups, those would refer to groups of the other regexes once combined.
+    list_patterns = list(collections.OrderedDict.fromkeys(regex.pattern for regex, _, _ in self.regex_searches))
+    self.prefilter = None
+    if len(list_patterns) > 1 and all(GROUP_REFERENCE.search(pattern) is None for pattern in list_patterns):
+      try:
+        self.prefilter = re.compile("|".join("(?:" + pattern + ")" for pattern in list_patterns))
+      except re.error:
+        # E.g. inline flags or the same group name in two regexes
+        self.prefilter = None
+
+class CompiledTableLineItems:
+  def __init__(self, table_lineitems):
+    self.list_lineitem_columns = [column["name"].split('\n') for column in table_lineitems["columns"]]
+    self.list_of_column_information = []
+    for column in table_lineitems["columns"]:
+      can_extend_text_to_neighbour = False
+      if column.get("can_extend_text_to_neighbour") != None:
+        can_extend_text_to_neighbour = column["can_extend_text_to_neighbour"]
+      self.list_of_column_information.append(ColumnInformation(column["name"], column["alignment"], column["row_start"], \
+        can_extend_text_to_neighbour))
+    self.has_vertical_lines = table_lineitems["vertical_lines"]
+    self.has_horizontal_lines = table_lineitems["horizontal_lines"]
+    self.line_end = re.compile(table_lineitems["line_end"])
+
+class CompiledRegexLineItems:
+  def __init__(self, regex_lineitems):
+    self.line_start = re.compile(regex_lineitems["line_start"])
+    self.line_end = re.compile(regex_lineitems["line_end"])
+    self.program = RegexLineItemProgram(regex_lineitems["lines"], regex_lineitems["columns"])
+
+class CompiledCheck:
+  def __init__(self, check):
+    self.field_name = check["field"]["name"]
+    self.lineitem_name = check["lineitem"]["name"]
+    self.field_regex = re.compile(check["field"]["regex"]) if check["field"].get("regex") is not None else None
+    self.lineitem_regex = re.compile(check["lineitem"]["regex"]) if check["lineitem"].get("regex") is not None else None
+
+class CompiledTemplate:
+  def __init__(self, file_name, json_template):
+    self.file_name = file_name
+    self.json_template = json_template
+    self.name = json_template["name"]
+    self.keywords = list(json_template["keywords"])
+    self.plugin = json_template.get("plugin")
+    self.fields = [CompiledField(field) for field in json_template.get("fields", [])]
+    self.field_plan = CompiledFieldPlan(self.fields)
+    self.table_lineitems = None
+    if json_template.get("table_lineitems") is not None:
+      self.table_lineitems = CompiledTableLineItems(json_template["table_lineitems"])
+    self.regex_lineitems = None
+    if json_template.get("regex_lineitems") is not None:
+      self.regex_lineitems = CompiledRegexLineItems(json_template["regex_lineitems"])
+    self.check = None
+    if json_template.get("check") is not None:
+      self.check = CompiledCheck(json_template["check"])
+
+class TemplateRegistry:
+
+   __instance = None
+   __validator = None
+   __templates = None
+   __keyword_indexes = None
+   __folder_check_times = None
+
+   @staticmethod
+   def getInstance():
+      """ Static access method. """
+      if TemplateRegistry.__instance == None:
+         TemplateRegistry()
+      return TemplateRegistry.__instance
+
+   def __init__(self):
+      """ Virtually private constructor. """
+      if TemplateRegistry.__instance != None:
+         raise Exception("Error! Internal error TemplateRegistry is a singleton.")
+      else:
+         TemplateRegistry.__instance = self
+         # file name -> ((mtime, size), CompiledTemplate or None if the template is invalid)
+         self.__templates = {}
+         # template folder -> KeywordIndex
+         self.__keyword_indexes = {}
+         # template folder -> time.monotonic() its files were last checked for changes
+         self.__folder_check_times = {}
+         configMgr = ConfigManager.getInstance()
+         self._folder_check_seconds = float(configMgr.get("template_registry", "folder_check_seconds", 2))
+
+   def _get_validator(self):
+
+      if self.__validator is None:
+         # Load the schema json file
+         schema = None
+         with open('../schema/invoice-schema-1_0_0.json', "r") as read_file:
+            schema = json.load(read_file)
+
+         # Check if schema load was successful
+         if schema == None:
+            raise Exception("Error! Failed to load the json schema file.")
+
+         validator_class = validator_for(schema)
+         validator_class.check_schema(schema)
+         self.__validator = validator_class(schema)
+
+      return self.__validator
+
+   def get_template(self, full_path_template_file_name):
+
+      logger = Logger.getLogger()
+
+      try:
+         stat_result = os.stat(full_path_template_file_name)
+      except OSError:
+         logger.error("ERROR!! Failed to load template file " + full_path_template_file_name)
+         return None
+
+      # Reuse the compiled template as long as the file is not modified
+      file_version = (stat_result.st_mtime_ns, stat_result.st_size)
+      cached_entry = self.__templates.get(full_path_template_file_name)
+      if cached_entry is not None and cached_entry[0] == file_version:
+         return cached_entry[1]
+
+      template = self._compile_template(full_path_template_file_name)
+      self.__templates[full_path_template_file_name] = (file_version, template)
+      return template
+
+   def get_templates(self, template_folder):
+
+      list_templates = []
+      for root, directories, filenames in os.walk(template_folder):
+         for filename in filenames:
+            full_path_template_file_name = os.path.join(root,filename)
+            if full_path_template_file_name.endswith(".json"):
+               template = self.get_template(full_path_template_file_name)
+               if template is not None:
+                  list_templates.append(template)
+
+      return list_templates
+
+   def get_keyword_index(self, template_folder):
+
+      # The folder is walked for added, removed or modified templates at most every folder_check_seconds, not for every
+      # document
+      keyword_index = self.__keyword_indexes.get(template_folder)
+      check_time = time.monotonic()
+      if keyword_index is not None and check_time - self.__folder_check_times[template_folder] < self._folder_check_seconds:
+         return keyword_index
+
+      signature = self._get_folder_signature(template_folder)
+      self.__folder_check_times[template_folder] = check_time
+
+      if keyword_index is not None and keyword_index.signature == signature:
+         return keyword_index
+
+      # Use the index persisted by an earlier run (or another process). A fresh copy, the one in use may be read by other
+      # threads while this one is updated.
+      index_file_name = self._get_keyword_index_file_name(template_folder)
+      keyword_index = KeywordIndex.load(index_file_name)
+      if keyword_index is None:
+         keyword_index = KeywordIndex()
+
+      # Only the templates added, removed or modified since are (re)loaded
+      if keyword_index.signature != signature:
+         dict_indexed_versions = dict((file_name, (mtime, size)) for file_name, mtime, size in keyword_index.signature)
+         dict_versions = dict((file_name, (mtime, size)) for file_name, mtime, size in signature)
+         list_removed_template_file_names = [file_name for file_name, version in dict_indexed_versions.items() \
+            if dict_versions.get(file_name) != version]
+         list_added_template_keywords = []
+         for file_name, version in dict_versions.items():
+            if dict_indexed_versions.get(file_name) != version:
+               template = self.get_template(file_name)
+               if template is not None:
+                  list_added_template_keywords.append((template.file_name, template.keywords))
+
+         Logger.getLogger().info("Updating keyword index for templates in %s : %d removed or modified, %d added or modified", \
+            template_folder, len(list_removed_template_file_names), len(list_added_template_keywords))
+         keyword_index.update(signature, list_removed_template_file_names, list_added_template_keywords)
+         keyword_index.save(index_file_name)
+
+      self.__keyword_indexes[template_folder] = keyword_index
+      return keyword_index
+
+   def _get_folder_signature(self, template_folder):
+
+      list_file_versions = []
+      for root, directories, filenames in os.walk(template_folder):
+         for filename in filenames:
+            full_path_template_file_name = os.path.join(root,filename)
+            if full_path_template_file_name.endswith(".json"):
+               try:
+                  stat_result = os.stat(full_path_template_file_name)
+               except OSError:
+                  continue
+               list_file_versions.append((full_path_template_file_name, stat_result.st_mtime_ns, stat_result.st_size))
+
+      list_file_versions.sort()
+      return tuple(list_file_versions)
+
+   def _get_keyword_index_file_name(self, template_folder):
+
+      configMgr = ConfigManager.getInstance()
+      index_folder = configMgr.get("template_registry", "keyword_index_folder", "../cache")
+      folder_hash = hashlib.sha1(os.path.abspath(template_folder).encode("utf-8")).hexdigest()[:16]
+      return os.path.join(index_folder, "keyword-index-" + folder_hash + ".pickle")
+
+   def _compile_template(self, full_path_template_file_name):
+
+      logger = Logger.getLogger()
+
+      # Load the template json file
+      try:
+         with open(full_path_template_file_name, "r") as read_file:
+            json_template = json.load(read_file)
+      except (IOError, ValueError):
+         logger.error("ERROR!! Failed to load template file " + full_path_template_file_name)
+         return None
+
+      # Validate the template file
+      try:
+         self._get_validator().validate(json_template)
+      except (exceptions.ValidationError, exceptions.SchemaError):
+         logger.error("ERROR!! Template file " + full_path_template_file_name + " failed schema validation.")
+         return None
+
+      # Compile the regular expressions and column information once
+      try:
+         return CompiledTemplate(full_path_template_file_name, json_template)
+      except re.error as ex:
+         logger.error("ERROR!! Template file " + full_path_template_file_name + " has an invalid regex. " + str(ex))
+         return None